@@ -0,0 +1,245 @@
+"""
+Runner for the benchmark suite: times the cases of `benchmarks.suite`, records the
+results as JSON baselines, and compares two recordings to flag regressions.
+
+Run with:
+    python -m benchmarks run [--full] [--sizes 1,1000] [--filter account] [--save baseline.json]
+    python -m benchmarks compare baseline.json current.json [--threshold 0.1]
+    python -m benchmarks run --compare baseline.json
+    python -m benchmarks check [--sizes 1,1000] [--filter metrics]
+
+`compare` (and `run --compare`) exits with status 1 when a case is slower than the
+baseline by more than the threshold, so it can gate CI jobs. `check` exits with status 1
+when a case is slower than its `baseline` case by more than its `max_overhead`.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import timeit
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import google.protobuf
+
+from benchmarks.suite import FULL_SIZES, SIZES, Case, get_cases
+
+# Minimum duration of one timed round; fast cases are called several times per round.
+MIN_TIME = 0.2
+REPEAT = 5
+THRESHOLD = 0.1
+
+
+def time_case(case: Case, repeat: int = REPEAT, min_time: float = MIN_TIME) -> Dict[str, Any]:
+    """
+    Times a case: the best, median and mean duration of one call over `repeat` rounds.
+    """
+    func = case.setup(case.size)
+    timer = timeit.Timer(func)
+    with case.context():
+        # Warms up caches and measures how many calls fill a round.
+        number, elapsed = _calibrate(func, min_time)
+        if elapsed > min_time * 5:
+            # Slow cases (large batches) get fewer rounds.
+            repeat = min(repeat, 3)
+        times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return {
+        'size': case.size,
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'per_item': min(times) / case.size,
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def _calibrate(func: Any, min_time: float) -> Tuple[int, float]:
+    """
+    Calls `func` once and returns how many calls fill `min_time`, and the time of the call.
+    """
+    start = timeit.default_timer()
+    func()
+    elapsed = timeit.default_timer() - start
+    return (max(1, int(min_time / elapsed)) if elapsed > 0 else 1), elapsed
+
+
+def measure_overhead(case: Case, baseline: Case, rounds: int = 30, min_time: float = 0.02) -> float:
+    """
+    Returns the median slowdown of `case` relative to `baseline`.
+
+    Short rounds of both alternate, and each is compared with the round before it, so that
+    drifts of the machine affect them alike.
+    """
+    func, baseline_func = case.setup(case.size), baseline.setup(baseline.size)
+    with baseline.context():
+        number, elapsed = _calibrate(baseline_func, min_time)
+    if elapsed > min_time * 5:
+        # Slow cases (large batches) get fewer rounds.
+        rounds = min(rounds, 5)
+    ratios = []
+    for _ in range(rounds):
+        with baseline.context():
+            without = timeit.timeit(baseline_func, number=number)
+        with case.context():
+            ratios.append(timeit.timeit(func, number=number) / without)
+    return statistics.median(ratios) - 1
+
+
+def check(
+    sizes: Iterable[int] = SIZES,
+    pattern: Optional[str] = None,
+    out: Any = sys.stdout,
+) -> bool:
+    """
+    Measures the cases that have a `baseline` and returns whether all are within their bound.
+    """
+    cases = {case.name: case for case in get_cases(tuple(sizes))}
+    passed = True
+    for case in cases.values():
+        if case.baseline is None or case.max_overhead is None or (pattern and pattern not in case.name):
+            continue
+        overhead = measure_overhead(case, cases[case.baseline])
+        within = overhead <= case.max_overhead
+        passed = passed and within
+        if out is not None:
+            print('{:<40} {:>+8.1f}% of {:<32} (max {:+.0f}%) {}'.format(
+                case.name, overhead * 100, case.baseline, case.max_overhead * 100, 'ok' if within else 'EXCEEDED'
+            ), file=out, flush=True)
+    return passed
+
+
+def run(
+    sizes: Iterable[int] = SIZES,
+    pattern: Optional[str] = None,
+    repeat: int = REPEAT,
+    min_time: float = MIN_TIME,
+    out: Any = sys.stdout,
+) -> Dict[str, Any]:
+    """
+    Runs the cases and returns a recording: {'meta': {...}, 'results': {name: timings}}.
+    """
+    results = {}
+    for case in get_cases(tuple(sizes)):
+        if pattern and pattern not in case.name:
+            continue
+        results[case.name] = timing = time_case(case, repeat=repeat, min_time=min_time)
+        if out is not None:
+            print('{:<40} {:>12} {:>14}'.format(
+                case.name, format_time(timing['min']), format_time(timing['per_item']) + '/item'
+            ), file=out, flush=True)
+    return {'meta': get_meta(), 'results': results}
+
+
+def get_meta() -> Dict[str, Any]:
+    return {
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'protobuf': google.protobuf.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '%.2f %s' % (seconds / scale, unit)
+    return '%.1f ns' % (seconds * 1e9)
+
+
+def save(recording: Dict[str, Any], path: str) -> None:
+    with open(path, 'w') as file:
+        json.dump(recording, file, indent=2, sort_keys=True)
+        file.write('\n')
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = THRESHOLD,
+) -> List[Tuple[str, str, Optional[float]]]:
+    """
+    Compares the best times of two recordings.
+
+    :return: (name, status, ratio of current to baseline) per case, where status is
+        'regression', 'improvement', 'ok', 'new' (only in current) or 'missing'.
+    """
+    old, new = baseline['results'], current['results']
+    rows = []
+    for name in sorted(set(old) | set(new)):
+        if name not in old:
+            rows.append((name, 'new', None))
+        elif name not in new:
+            rows.append((name, 'missing', None))
+        else:
+            ratio = new[name]['min'] / old[name]['min']
+            if ratio > 1 + threshold:
+                status = 'regression'
+            elif ratio < 1 - threshold:
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append((name, status, ratio))
+    return rows
+
+
+def report(rows: List[Tuple[str, str, Optional[float]]], out: Any = sys.stdout) -> bool:
+    """
+    Prints a comparison and returns whether it has no regressions.
+    """
+    for name, status, ratio in rows:
+        change = '' if ratio is None else '{:+.1f}%'.format((ratio - 1) * 100)
+        print('{:<40} {:>9} {}'.format(name, change, status.upper() if status == 'regression' else status), file=out)
+    regressions = [row for row in rows if row[1] == 'regression']
+    print('{} regression(s) in {} case(s)'.format(len(regressions), len(rows)), file=out)
+    return not regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Protolizer benchmark suite.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the benchmarks')
+    run_parser.add_argument('--full', action='store_true', help='include batches of 1M items')
+    run_parser.add_argument('--sizes', help='comma-separated batch sizes (default: 1,1000,100000)')
+    run_parser.add_argument('--filter', help='only run cases whose name contains this')
+    run_parser.add_argument('--repeat', type=int, default=REPEAT)
+    run_parser.add_argument('--min-time', type=float, default=MIN_TIME)
+    run_parser.add_argument('--save', help='write the results to this JSON file')
+    run_parser.add_argument('--compare', help='compare the results with this baseline')
+    run_parser.add_argument('--threshold', type=float, default=THRESHOLD)
+
+    check_parser = commands.add_parser('check', help='check the overhead of cases relative to their baseline')
+    check_parser.add_argument('--sizes', help='comma-separated batch sizes (default: 1,1000,100000)')
+    check_parser.add_argument('--filter', help='only check cases whose name contains this')
+
+    compare_parser = commands.add_parser('compare', help='compare two recordings')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                                help='relative slowdown flagged as a regression (default: 0.1)')
+
+    args = parser.parse_args(argv)
+    if args.command == 'compare':
+        return 0 if report(compare(load(args.baseline), load(args.current), args.threshold)) else 1
+
+    if args.sizes:
+        sizes = tuple(int(size) for size in args.sizes.split(','))
+    else:
+        sizes = FULL_SIZES if getattr(args, 'full', False) else SIZES
+    if args.command == 'check':
+        return 0 if check(sizes, args.filter) else 1
+    recording = run(sizes, args.filter, args.repeat, args.min_time)
+    if args.save:
+        save(recording, args.save)
+    if args.compare:
+        return 0 if report(compare(load(args.compare), recording, args.threshold)) else 1
+    return 0
@@ -0,0 +1,635 @@
+"""
+Benchmark cases for the serializer hot paths.
+
+Each case is a setup function taking a batch size and returning the callable to time.
+Cases are run by `python -m benchmarks run` (see `benchmarks.runner`), or by pytest-benchmark
+through `benchmarks/test_suite.py`.
+
+Names are `<group>.<direction>[<size>]`, e.g. `account.to_data[1000]`: `to_data` converts
+protobuf messages to `.data`, `to_protobuf` converts dicts to `.protobuf`, `to_bytes` encodes
+dicts with `.to_bytes()`. Groups compare alternatives for the same work, e.g. `flat.is_valid`
+and `flat.is_valid_columnar`, `account.single_to_protobuf` and `pool.single_to_protobuf`,
+`flat.to_representation` and `compiled.to_representation`. Cases with a `baseline` are also
+checked against it by `python -m benchmarks check`.
+"""
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from protolizer import Serializer, ValidationError, fields, profile
+from protolizer.cache import LRU
+from protolizer.metrics import InMemoryMetrics, add_hook, remove_hook
+from protolizer.parallel import convert
+from protolizer.pool import SerializerPool
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings, FieldsMessage, TypesMessage
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+# Batch sizes of the `many=True` cases; 1M is only run with `--full`.
+SIZES = (1, 1000, 100000)
+FULL_SIZES = SIZES + (1000000,)
+
+
+class AccountSettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = AccountSettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class FieldsSerializer(Serializer):
+    int32_field = fields.IntField()
+    float_field = fields.FloatField()
+    double_field = fields.FloatField()
+    bool_field = fields.BooleanField()
+    string_field = fields.CharField()
+    repeated_string_field = fields.ListField(child=fields.CharField())
+    nested_field = AccountSerializer()
+    repeated_nested_field = AccountSerializer(many=True)
+
+    class Meta:
+        schema = FieldsMessage
+
+
+class ContextSettingsSerializer(AccountSettingsSerializer):
+
+    def to_representation(self, instance):
+        return {'is_public': self.context.get('is_public', False)}
+
+
+class ContextAccountSerializer(AccountSerializer):
+    settings = ContextSettingsSerializer(context='self')
+
+    class Meta:
+        schema = Account
+
+
+def account(index: int) -> Dict[str, Any]:
+    return {'username': 'user-%d' % index, 'balance': index + 1, 'settings': {'is_public': index % 2 == 0}}
+
+
+def fields_message(index: int) -> Dict[str, Any]:
+    return {
+        'int32_field': index,
+        'float_field': index * 0.5,
+        'double_field': index * 0.25,
+        'bool_field': index % 2 == 0,
+        'string_field': 'row-%d' % index,
+        'repeated_string_field': ['a', 'b', 'c'],
+        'nested_field': account(index),
+        'repeated_nested_field': [account(index), account(index + 1)],
+    }
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[int], Callable[[], Any]]
+    size: int
+    # Context manager entered around the timed calls, e.g. to register a hook.
+    context: Callable[[], ContextManager[Any]] = nullcontext
+    # Case of the same size this one is compared with by `python -m benchmarks check`,
+    # and the slowdown allowed relative to it.
+    baseline: Optional[str] = None
+    max_overhead: Optional[float] = None
+
+
+_GROUPS: List[Tuple[str, Callable[[int], Callable[[], Any]], bool, Dict[str, Any]]] = []
+
+
+def case(
+    name: str,
+    many: bool = True,
+    context: Callable[[], ContextManager[Any]] = nullcontext,
+    baseline: Optional[str] = None,
+    max_overhead: Optional[Dict[int, float]] = None,
+) -> Callable[[Callable[[int], Callable[[], Any]]], Any]:
+    """
+    Registers a setup function; `many=False` cases are only run with a size of 1.
+
+    :param context: Context manager entered around the timed calls.
+    :param baseline: Name of the group this one is checked against, size for size.
+    :param max_overhead: {minimum size: allowed slowdown relative to `baseline`}, e.g.
+        `{1: 0.15, 1000: 0.03}` allows 15% below 1000 items and 3% from 1000 on. Negative
+        bounds require a speedup: -0.5 fails unless the case is twice as fast.
+    """
+    def register(setup: Callable[[int], Callable[[], Any]]) -> Callable[[int], Callable[[], Any]]:
+        _GROUPS.append((name, setup, many, {'context': context, 'baseline': baseline, 'bounds': max_overhead}))
+        return setup
+    return register
+
+
+def _bound(bounds: Optional[Dict[int, float]], size: int) -> Optional[float]:
+    sizes = [minimum for minimum in sorted(bounds or ()) if minimum <= size]
+    return bounds[sizes[-1]] if sizes else None
+
+
+def get_cases(sizes: Tuple[int, ...] = SIZES) -> List[Case]:
+    return [
+        Case(
+            '%s[%d]' % (name, size), setup, size, options['context'],
+            '%s[%d]' % (options['baseline'], size) if options['baseline'] else None,
+            _bound(options['bounds'], size),
+        )
+        for name, setup, many, options in _GROUPS
+        for size in (sizes if many else (1,))
+    ]
+
+
+def _batch(serializer_class: Any, make: Callable[[int], Dict[str, Any]], size: int) -> List[Any]:
+    return [serializer_class.Meta.schema(**make(index)) for index in range(size)]
+
+
+@case('fields.to_data')
+def fields_to_data(size):
+    messages = _batch(FieldsSerializer, fields_message, size)
+    return lambda: FieldsSerializer(messages, many=True).data
+
+
+@case('fields.to_protobuf')
+def fields_to_protobuf(size):
+    items = [fields_message(index) for index in range(size)]
+    return lambda: FieldsSerializer(items, many=True).protobuf
+
+
+@case('fields.to_bytes')
+def fields_to_bytes(size):
+    items = [fields_message(index) for index in range(size)]
+    return lambda: FieldsSerializer(items, many=True).to_bytes()
+
+
+@case('account.to_data')
+def account_to_data(size):
+    messages = _batch(AccountSerializer, account, size)
+    return lambda: AccountSerializer(messages, many=True).data
+
+
+@case('account.to_protobuf')
+def account_to_protobuf(size):
+    items = [account(index) for index in range(size)]
+    return lambda: AccountSerializer(items, many=True).protobuf
+
+
+@case('account.single_to_data', many=False)
+def account_single_to_data(size):
+    message = Account(**account(1))
+    return lambda: AccountSerializer(message).data
+
+
+@case('account.single_to_protobuf', many=False)
+def account_single_to_protobuf(size):
+    item = account(1)
+    return lambda: AccountSerializer(item).protobuf
+
+
+@case('account.is_valid')
+def account_is_valid(size):
+    items = [account(index) for index in range(size)]
+
+    def run():
+        assert AccountSerializer(data=items, many=True).is_valid()
+    return run
+
+
+@case('account.is_valid_errors')
+def account_is_valid_errors(size):
+    items = [account(index) for index in range(size)]
+    for item in items[::10]:
+        item['balance'] = -1
+
+    def run():
+        assert not AccountSerializer(data=items, many=True).is_valid()
+    return run
+
+
+@case('account.is_valid_sparse_errors')
+def account_is_valid_sparse_errors(size):
+    items = [account(index) for index in range(size)]
+    for item in items[::10]:
+        item['balance'] = -1
+
+    def run():
+        assert not AccountSerializer(data=items, many=True, sparse_errors=True).is_valid()
+    return run
+
+
+@case('account.is_valid_fail_fast')
+def account_is_valid_fail_fast(size):
+    items = [account(index) for index in range(size)]
+    items[min(9, size - 1)]['balance'] = -1
+
+    def run():
+        assert not AccountSerializer(data=items, many=True).is_valid(fail_fast=True)
+    return run
+
+
+@case('account.is_valid_max_errors')
+def account_is_valid_max_errors(size):
+    items = [account(index) for index in range(size)]
+    for item in items[::10]:
+        item['balance'] = -1
+
+    def run():
+        assert not AccountSerializer(data=items, many=True).is_valid(max_errors=10)
+    return run
+
+
+@case('context_self.to_data')
+def context_self_to_data(size):
+    messages = _batch(ContextAccountSerializer, account, size)
+    return lambda: ContextAccountSerializer(messages, many=True, context={'is_public': True}).data
+
+
+@case('context_self.to_protobuf')
+def context_self_to_protobuf(size):
+    items = [account(index) for index in range(size)]
+    return lambda: ContextAccountSerializer(items, many=True, context={'is_public': True}).protobuf
+
+
+@case('account.profiled_to_protobuf')
+def account_profiled_to_protobuf(size):
+    items = [account(index) for index in range(size)]
+
+    def run():
+        with profile():
+            AccountSerializer(items, many=True).protobuf  # noqa
+    return run
+
+
+@contextmanager
+def metrics_hook() -> Iterator[InMemoryMetrics]:
+    metrics = InMemoryMetrics()
+    add_hook(metrics)
+    try:
+        yield metrics
+    finally:
+        remove_hook(metrics)
+
+
+# Each top-level conversion queues one observation, about 1 us whatever its size: a few
+# percent of the smallest conversions, and much less of batches.
+METRICS_OVERHEAD = {1: 0.05, 1000: 0.03}
+
+
+@case('metrics.single_to_protobuf', many=False, context=metrics_hook,
+      baseline='account.single_to_protobuf', max_overhead=METRICS_OVERHEAD)
+def metrics_single_to_protobuf(size):
+    return account_single_to_protobuf(size)
+
+
+@case('metrics.to_protobuf', context=metrics_hook, baseline='account.to_protobuf', max_overhead=METRICS_OVERHEAD)
+def metrics_to_protobuf(size):
+    return account_to_protobuf(size)
+
+
+@case('metrics.is_valid', context=metrics_hook, baseline='account.is_valid', max_overhead=METRICS_OVERHEAD)
+def metrics_is_valid(size):
+    return account_is_valid(size)
+
+
+# ORM-like objects: 25 attributes and 5 methods, read through compiled accessors.
+ROW_FIELDS = 30
+
+
+class Row:
+
+    def __init__(self, index):
+        for i in range(ROW_FIELDS - 5):
+            setattr(self, 'column_%d' % i, 'value-%d-%d' % (index, i))
+        self.index = index
+
+    def get_label(self):
+        return 'row-%d' % self.index
+
+    for i in range(ROW_FIELDS - 5, ROW_FIELDS):
+        locals()['column_%d' % i] = lambda self: self.get_label()
+    del i
+
+
+RowSerializer = type('RowSerializer', (Serializer,), {
+    'column_%d' % i: fields.CharField() for i in range(ROW_FIELDS)
+})
+
+
+@case('objects.to_data')
+def objects_to_data(size):
+    rows = [Row(index) for index in range(size)]
+    return lambda: RowSerializer(rows, many=True).data
+
+
+@case('objects.is_valid')
+def objects_is_valid(size):
+    rows = [Row(index) for index in range(size)]
+
+    def run():
+        assert RowSerializer(data=rows, many=True).is_valid()
+    return run
+
+
+def _getter(name):
+    return staticmethod(lambda obj: getattr(obj, name))
+
+
+# 60 fields read by custom getters, which share one copy of each input.
+GetterSerializer = type('GetterSerializer', (Serializer,), dict(
+    {'field_%d' % i: fields.CharField(custom=True) for i in range(60)},
+    **{'get_custom_field_%d' % i: _getter('field_%d' % i) for i in range(60)}
+))
+
+
+@case('getters.is_valid')
+def getters_is_valid(size):
+    items = [{'field_%d' % i: 'value-%d-%d' % (index, i) for i in range(60)} for index in range(size)]
+
+    def run():
+        assert GetterSerializer(data=items, many=True).is_valid()
+    return run
+
+
+class SummarySerializer(Serializer):
+    int32_field = fields.IntField()
+    string_field = fields.CharField()
+    bool_field = fields.BooleanField()
+
+    class Meta:
+        schema = FieldsMessage
+
+
+def _large_message() -> bytes:
+    return FieldsMessage(
+        int32_field=7,
+        string_field='summary',
+        bool_field=True,
+        bytes_field=b'\x00' * 65536,
+        repeated_string_field=['tag-%d' % index for index in range(500)],
+        repeated_nested_field=[Account(username='user-%d' % index, balance=index) for index in range(500)],
+    ).SerializeToString()
+
+
+@case('summary.from_string_load', many=False)
+def summary_from_string_load(size):
+    payload = _large_message()
+    return lambda: SummarySerializer.load(FieldsMessage.FromString(payload))
+
+
+@case('summary.from_bytes', many=False)
+def summary_from_bytes(size):
+    payload = _large_message()
+    return lambda: SummarySerializer.from_bytes(payload)
+
+
+# Per-instance setup: the class-level plan, and `.fields` copied and bound per instance
+# as every instance used to.
+@case('setup.plan', many=False)
+def setup_plan(size):
+    item = account(1)
+    return lambda: AccountSerializer(item).get_plan()
+
+
+@case('setup.bound_fields', many=False)
+def setup_bound_fields(size):
+    item = account(1)
+
+    def run():
+        serializer = AccountSerializer(item)
+        serializer.fields  # noqa
+        return serializer.get_plan()
+    return run
+
+
+@case('setup.bound_fields_to_data', many=False)
+def setup_bound_fields_to_data(size):
+    item = account(1)
+
+    def run():
+        serializer = AccountSerializer(item)
+        serializer.fields  # noqa
+        return serializer.data
+    return run
+
+
+class DynamicAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+
+    def get_fields(self):
+        return super().get_fields()
+
+
+class CachedAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        cache = LRU(maxsize=128)
+
+
+@case('pool.single_to_protobuf', many=False)
+def pool_single_to_protobuf(size):
+    item, pool = account(1), SerializerPool(AccountSerializer, prefill=1)
+
+    def run():
+        with pool.borrow(item) as serializer:
+            return serializer.protobuf
+    return run
+
+
+@case('dynamic.single_to_protobuf', many=False)
+def dynamic_single_to_protobuf(size):
+    item = account(1)
+    return lambda: DynamicAccountSerializer(item).protobuf
+
+
+@case('dynamic.pool_single_to_protobuf', many=False)
+def dynamic_pool_single_to_protobuf(size):
+    item, pool = account(1), SerializerPool(DynamicAccountSerializer, prefill=1)
+
+    def run():
+        with pool.borrow(item) as serializer:
+            return serializer.protobuf
+    return run
+
+
+@case('cache.single_to_data', many=False)
+def cache_single_to_data(size):
+    message = Account(**account(1))
+    return lambda: CachedAccountSerializer(message).data
+
+
+@case('cache.single_to_protobuf', many=False)
+def cache_single_to_protobuf(size):
+    message = Account(**account(1))
+    return lambda: CachedAccountSerializer(message).protobuf
+
+
+# Flat messages of scalars, for the compiled methods and the batch strategies.
+class FlatSerializer(Serializer):
+    int32_field = fields.IntField()
+    float_field = fields.FloatField()
+    double_field = fields.FloatField()
+    bool_field = fields.BooleanField()
+    string_field = fields.CharField()
+
+    class Meta:
+        schema = FieldsMessage
+
+
+class CompiledFlatSerializer(FlatSerializer):
+
+    class Meta:
+        schema = FieldsMessage
+        compile = True
+
+
+def flat_message(index: int) -> Dict[str, Any]:
+    return {
+        'int32_field': index,
+        'float_field': index * 0.5,
+        'double_field': index * 0.25,
+        'bool_field': index % 2 == 0,
+        'string_field': 'row-%d' % index,
+    }
+
+
+@case('flat.to_internal_value', many=False)
+def flat_to_internal_value(size):
+    serializer, item = FlatSerializer(), flat_message(1)
+    return lambda: serializer.to_internal_value(item)
+
+
+@case('flat.to_representation', many=False)
+def flat_to_representation(size):
+    serializer, item = FlatSerializer(), flat_message(1)
+    return lambda: serializer.to_representation(item)
+
+
+# The compiled methods must be at least 3 times as fast as the generic plan loop.
+COMPILE_SPEEDUP = {1: 1 / 3 - 1}
+
+
+@case('compiled.to_internal_value', many=False,
+      baseline='flat.to_internal_value', max_overhead=COMPILE_SPEEDUP)
+def compiled_to_internal_value(size):
+    serializer, item = CompiledFlatSerializer(), flat_message(1)
+    return lambda: serializer.to_internal_value(item)
+
+
+@case('compiled.to_representation', many=False,
+      baseline='flat.to_representation', max_overhead=COMPILE_SPEEDUP)
+def compiled_to_representation(size):
+    serializer, item = CompiledFlatSerializer(), flat_message(1)
+    return lambda: serializer.to_representation(item)
+
+
+@case('flat.is_valid')
+def flat_is_valid(size):
+    items = [flat_message(index) for index in range(size)]
+
+    def run():
+        assert FlatSerializer(data=items, many=True).is_valid()
+    return run
+
+
+@case('flat.is_valid_columnar')
+def flat_is_valid_columnar(size):
+    items = [flat_message(index) for index in range(size)]
+
+    def run():
+        assert FlatSerializer(data=items, many=True, columnar=True).is_valid()
+    return run
+
+
+@case('flat.to_protobuf')
+def flat_to_protobuf(size):
+    items = [flat_message(index) for index in range(size)]
+    return lambda: FlatSerializer(items, many=True).protobuf
+
+
+@functools.lru_cache(maxsize=None)
+def _process_pool() -> ProcessPoolExecutor:
+    # Started once, so that the cases time the conversions rather than the worker startup.
+    return ProcessPoolExecutor()
+
+
+@case('flat.to_protobuf_parallel')
+def flat_to_protobuf_parallel(size):
+    items = [flat_message(index) for index in range(size)]
+    return lambda: convert(FlatSerializer, items, executor=_process_pool())
+
+
+# Offloaded from the event loop. These time the whole conversion; `LoopMonitor` measures
+# how long the loop is blocked meanwhile.
+@case('flat.to_protobuf_async')
+def flat_to_protobuf_async(size):
+    items = [flat_message(index) for index in range(size)]
+    return lambda: asyncio.run(FlatSerializer(items, many=True).to_protobuf_async())
+
+
+@case('flat.to_protobuf_async_process')
+def flat_to_protobuf_async_process(size):
+    items = [flat_message(index) for index in range(size)]
+    return lambda: asyncio.run(FlatSerializer(items, many=True).to_protobuf_async(executor=_process_pool()))
+
+
+@case('flat.to_protobuf_async_cooperative')
+def flat_to_protobuf_async_cooperative(size):
+    items = [flat_message(index) for index in range(size)]
+    return lambda: asyncio.run(FlatSerializer(items, many=True).to_protobuf_async(yield_every=100))
+
+
+# Repeated numeric fields as lists and as NumPy arrays; the size is the number of values.
+class ListTelemetrySerializer(Serializer):
+    samples = fields.ListField(fields.IntField())
+    readings = fields.ListField(fields.FloatField())
+
+    class Meta:
+        schema = TypesMessage
+
+
+class ArrayTelemetrySerializer(Serializer):
+    samples = fields.ListField(fields.IntField(), as_array=True)
+    readings = fields.ListField(fields.FloatField(), as_array=True)
+
+    class Meta:
+        schema = TypesMessage
+
+
+if numpy is not None:
+    @case('telemetry.lists_to_protobuf')
+    def telemetry_lists_to_protobuf(size):
+        item = {'samples': list(range(size)), 'readings': [index / size for index in range(size)]}
+
+        def run():
+            serializer = ListTelemetrySerializer(data=item)
+            assert serializer.is_valid()
+            return serializer.protobuf
+        return run
+
+    @case('telemetry.arrays_to_protobuf')
+    def telemetry_arrays_to_protobuf(size):
+        item = {'samples': numpy.arange(size, dtype=numpy.int32), 'readings': numpy.linspace(0, 1, size)}
+
+        def run():
+            serializer = ArrayTelemetrySerializer(data=item)
+            assert serializer.is_valid()
+            return serializer.protobuf
+        return run
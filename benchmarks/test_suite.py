@@ -0,0 +1,18 @@
+"""
+The benchmark suite as pytest-benchmark tests.
+
+Run with: pytest benchmarks/test_suite.py --benchmark-only [--benchmark-save=baseline]
+Compare with: pytest benchmarks/test_suite.py --benchmark-only --benchmark-compare --benchmark-compare-fail=min:10%
+"""
+import pytest
+
+from benchmarks.suite import get_cases
+
+pytest.importorskip('pytest_benchmark')
+
+
+@pytest.mark.parametrize('case', get_cases(), ids=lambda case: case.name)
+def test_case(benchmark, case):
+    func = case.setup(case.size)
+    with case.context():
+        benchmark(func)
@@ -1,6 +1,8 @@
 from .serializer import *
 from .fields import *
+from .profiling import profile
 
 __all__ = [
     'Serializer',
+    'profile',
 ] + fields.__all__
@@ -0,0 +1,132 @@
+"""
+Helpers for the async serializer API (`ais_valid()`, `adata`, `aprotobuf`).
+
+`get_custom_<name>` getters and `validate_<name>` hooks may be coroutine functions.
+The async API awaits them concurrently, across the fields of a serializer and across
+the items of a `many=True` serializer, with an optional limit on the number of hooks
+running at once (`Meta.async_concurrency`, or the `concurrency` argument of `ais_valid()`).
+
+`LoopMonitor` measures how long the event loop is blocked, for `to_protobuf_async()`.
+"""
+import asyncio
+import inspect
+from typing import Any, Awaitable, Iterable, List, Optional, Tuple
+
+from protolizer.exceptions import ValidationError
+
+__all__ = [
+    'Limiter',
+    'capture',
+    'discard',
+    'gather',
+    'get_concurrency',
+    'LoopMonitor',
+]
+
+
+class Limiter:
+    """
+    Awaits hook results, with at most `concurrency` of them pending at once.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None) -> None:
+        if concurrency is not None and concurrency < 1:
+            raise ValueError('`concurrency` must be a positive integer.')
+        self.semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def resolve(self, value: Any) -> Any:
+        """
+        Returns the value, awaiting it first if it is awaitable.
+        """
+        if not inspect.isawaitable(value):
+            return value
+        if self.semaphore is None:
+            return await value
+        async with self.semaphore:
+            return await value
+
+
+async def capture(awaitable: Awaitable[Any]) -> Tuple[Optional[ValidationError], Any]:
+    """
+    Awaits a value, and returns `(error, None)` instead of raising a `ValidationError`.
+    """
+    try:
+        return None, await awaitable
+    except ValidationError as exc:
+        return exc, None
+
+
+def discard(awaitables: Iterable[Any]) -> None:
+    """
+    Drops awaitables that will not be awaited: coroutines are closed, so they never run
+    nor warn that they were never awaited, and futures are cancelled.
+    """
+    for awaitable in awaitables:
+        if inspect.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            awaitable.cancel()
+
+
+async def gather(awaitables: Iterable[Awaitable[Any]]) -> List[Any]:
+    """
+    Like `asyncio.gather()`, but when one awaitable raises, or the caller is cancelled,
+    the others are cancelled and awaited before the error propagates, as in a `TaskGroup`.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+        for task in tasks:
+            if not task.cancelled():
+                # Retrieved, so that later errors of the siblings are not logged as unhandled.
+                task.exception()
+        raise
+
+
+def get_concurrency(serializer: Any) -> Optional[int]:
+    """
+    Returns the `Meta.async_concurrency` option of a serializer (or of its child).
+    """
+    serializer = getattr(serializer, 'child', None) or serializer
+    return getattr(getattr(serializer, 'Meta', None), 'async_concurrency', None)
+
+
+class LoopMonitor:
+    """
+    Measures the longest time the running event loop goes without running callbacks.
+
+    While active, a callback is scheduled every `interval` seconds; the longest delay
+    of those callbacks is stored as `max_blocking_time` (seconds), with a resolution
+    of about `interval`. Use it as a context manager from a coroutine:
+
+        with LoopMonitor() as monitor:
+            await convert()
+        print(monitor.max_blocking_time)
+    """
+
+    def __init__(self, interval: float = 0.001) -> None:
+        self.interval = interval
+        self.max_blocking_time = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._last = 0.0
+
+    def _tick(self) -> None:
+        now = self._loop.time()
+        self.max_blocking_time = max(self.max_blocking_time, now - self._last - self.interval)
+        self._last = now
+        self._handle = self._loop.call_later(self.interval, self._tick)
+
+    def __enter__(self) -> 'LoopMonitor':
+        self._loop = asyncio.get_running_loop()
+        self._last = self._loop.time()
+        self._handle = self._loop.call_later(self.interval, self._tick)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._handle.cancel()
+        self.max_blocking_time = max(self.max_blocking_time, self._loop.time() - self._last - self.interval)
@@ -0,0 +1,208 @@
+"""
+Support for `numpy.ndarray` and `array.array` values in repeated numeric fields.
+
+NumPy is optional. Without it, `array.array` is used for array output and values
+are written element by element.
+"""
+import array
+from typing import Any, Optional
+
+from google.protobuf.descriptor import FieldDescriptor
+
+from protolizer.wire import encode_varint
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+__all__ = [
+    'numpy',
+    'is_array',
+    'to_int_array',
+    'to_float_array',
+    'pack_repeated',
+]
+
+_INT32_RANGE = (-2 ** 31, 2 ** 31 - 1)
+_UINT32_RANGE = (0, 2 ** 32 - 1)
+_FLOAT_MAX = 3.4028234663852886e38
+# Past 2**53 a float64 array may already have rounded the original integers.
+_FLOAT_INT_MAX = 2 ** 53
+_INT64_MAX = 2 ** 63 - 1
+
+_ARRAY_TYPES = (array.array,) if numpy is None else (array.array, numpy.ndarray)
+
+# Little-endian layouts of the fixed-width scalar types, for packed encoding.
+_FIXED_DTYPES = {
+    FieldDescriptor.TYPE_DOUBLE: '<f8',
+    FieldDescriptor.TYPE_FLOAT: '<f4',
+    FieldDescriptor.TYPE_FIXED64: '<u8',
+    FieldDescriptor.TYPE_SFIXED64: '<i8',
+    FieldDescriptor.TYPE_FIXED32: '<u4',
+    FieldDescriptor.TYPE_SFIXED32: '<i4',
+}
+
+_VARINT_RANGES = {
+    FieldDescriptor.TYPE_INT32: _INT32_RANGE,
+    FieldDescriptor.TYPE_SINT32: _INT32_RANGE,
+    FieldDescriptor.TYPE_ENUM: _INT32_RANGE,
+    FieldDescriptor.TYPE_UINT32: _UINT32_RANGE,
+    FieldDescriptor.TYPE_INT64: None,
+    FieldDescriptor.TYPE_SINT64: None,
+    FieldDescriptor.TYPE_UINT64: None,
+}
+
+_FIXED_RANGES = {
+    FieldDescriptor.TYPE_SFIXED32: _INT32_RANGE,
+    FieldDescriptor.TYPE_FIXED32: _UINT32_RANGE,
+}
+
+
+def is_array(value: Any) -> bool:
+    """
+    True if the value is a `numpy.ndarray` or an `array.array`.
+    """
+    return isinstance(value, _ARRAY_TYPES)
+
+
+def _numeric(values):
+    if numpy is None:
+        return None
+    values = numpy.asarray(values)
+    if values.ndim != 1 or values.dtype.kind not in 'biuf':
+        return None
+    return values
+
+
+def to_int_array(values: Any, coerce) -> Any:
+    """
+    Converts values to an int64 array (an `array.array('q')` without NumPy).
+
+    Numeric NumPy input is converted in one step; anything else goes through
+    `coerce`, the field's own per-value conversion, so invalid values raise the
+    same errors. Returns a list if the values do not fit in 64 bits.
+    """
+    numeric = _numeric(values)
+    if numeric is not None:
+        kind = numeric.dtype.kind
+        if kind == 'f':
+            if numpy.isfinite(numeric).all() and numpy.abs(numeric).max(initial=0) <= _FLOAT_INT_MAX:
+                return numeric.astype(numpy.int64)
+        elif kind != 'u' or numeric.max(initial=0) <= _INT64_MAX:
+            return numeric.astype(numpy.int64)
+
+    converted = [coerce(value) for value in values]
+    try:
+        if numpy is None:
+            return array.array('q', converted)
+        return numpy.asarray(converted, dtype=numpy.int64)
+    except OverflowError:
+        return converted
+
+
+def to_float_array(values: Any, coerce) -> Any:
+    """
+    Converts values to a float64 array (an `array.array('d')` without NumPy).
+    """
+    numeric = _numeric(values)
+    if numeric is not None:
+        return numeric.astype(numpy.float64)
+
+    converted = [coerce(value) for value in values]
+    if numpy is None:
+        return array.array('d', converted)
+    return numpy.asarray(converted, dtype=numpy.float64)
+
+
+def _encode_varints(values) -> bytes:
+    """
+    Varint-encodes a uint64 NumPy array without per-element Python objects.
+    """
+    if not len(values):
+        return b''
+    width = max(1, (int(values.max()).bit_length() + 6) // 7)
+    if width == 1:
+        return values.astype(numpy.uint8).tobytes()
+    groups = numpy.empty((len(values), width), dtype=numpy.uint8)
+    lengths = numpy.ones(len(values), dtype=numpy.intp)
+    rest = values.copy()
+    for index in range(width):
+        groups[:, index] = rest & numpy.uint64(0x7f)
+        rest >>= numpy.uint64(7)
+        if index < width - 1:
+            more = rest != 0
+            groups[:, index] |= more.view(numpy.uint8) << 7
+            lengths += more
+    return groups[numpy.arange(width) < lengths[:, None]].tobytes()
+
+
+def _in_range(values, bounds) -> bool:
+    if bounds is None or not len(values):
+        return True
+    return bounds[0] <= values.min() and values.max() <= bounds[1]
+
+
+def _pack_payload(field: FieldDescriptor, values) -> Optional[bytes]:
+    kind = values.dtype.kind
+    field_type = field.type
+
+    if field_type == FieldDescriptor.TYPE_BOOL:
+        return values.astype(numpy.uint8).tobytes() if kind == 'b' else None
+
+    if field_type in (FieldDescriptor.TYPE_DOUBLE, FieldDescriptor.TYPE_FLOAT):
+        if kind == 'b' or not numpy.isfinite(values).all():
+            return None
+        if field_type == FieldDescriptor.TYPE_FLOAT and len(values) and numpy.abs(values).max() > _FLOAT_MAX:
+            return None
+        return values.astype(_FIXED_DTYPES[field_type]).tobytes()
+
+    # Integer fields only take integer arrays, like `ParseDict` rejects bools.
+    if kind not in 'iu':
+        return None
+    if kind == 'u' and values.max(initial=0) > _INT64_MAX:
+        if field_type not in (FieldDescriptor.TYPE_UINT64, FieldDescriptor.TYPE_FIXED64):
+            return None
+        signed = None
+    else:
+        signed = values.astype(numpy.int64)
+
+    if field_type in _FIXED_DTYPES:
+        if signed is not None and not _in_range(signed, _FIXED_RANGES.get(field_type)):
+            return None
+        if signed is not None and field_type == FieldDescriptor.TYPE_FIXED64 and signed.min(initial=0) < 0:
+            return None
+        return values.astype(_FIXED_DTYPES[field_type]).tobytes()
+
+    if field_type not in _VARINT_RANGES:
+        return None
+    if signed is None:
+        return _encode_varints(values.astype(numpy.uint64))
+    if not _in_range(signed, _VARINT_RANGES[field_type]):
+        return None
+    if field_type == FieldDescriptor.TYPE_UINT64 and signed.min(initial=0) < 0:
+        return None
+    if field_type in (FieldDescriptor.TYPE_SINT32, FieldDescriptor.TYPE_SINT64):
+        # ZigZag encoding; for values in the int32 range it matches the 32-bit variant.
+        signed = (signed << 1) ^ (signed >> 63)
+    return _encode_varints(signed.view(numpy.uint64))
+
+
+def pack_repeated(field: FieldDescriptor, values: Any) -> Optional[bytes]:
+    """
+    Encodes an array as a packed repeated field, ready for `Message.MergeFromString`.
+
+    Range checks are done on the whole array. Returns `None` when NumPy is not
+    installed, or when the values must be checked element by element instead
+    (wrong kind, out of range, NaN/Infinity, ...).
+    """
+    if numpy is None:
+        return None
+    values = numpy.asarray(values)
+    if values.ndim != 1 or values.dtype.kind not in 'biuf':
+        return None
+    payload = _pack_payload(field, values)
+    if payload is None:
+        return None
+    tag = encode_varint((field.number << 3) | 2)
+    return tag + encode_varint(len(payload)) + payload
@@ -0,0 +1,186 @@
+"""
+Memoization of message conversions, for serializers that convert the same messages often.
+
+    class CatalogEntrySerializer(Serializer):
+        ...
+
+        class Meta:
+            schema = CatalogEntry
+            cache = LRU(maxsize=1024)
+
+When a serializer with `Meta.cache` is given a protobuf message as its instance, the
+message bytes are hashed, and the `.data` and `.protobuf` converted for the same bytes,
+context and field mask are reused instead of decoding and converting the message again.
+
+Cached `.data` is frozen: nested dicts and lists raise `TypeError` on modification, and
+`thaw()` returns a mutable copy. `.protobuf` returns a copy of the cached message, and
+`pre_serialize` receives a mutable copy of the data, once per cache entry.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from google.protobuf.message import Message
+
+__all__ = [
+    'LRU',
+    'FrozenDict',
+    'FrozenList',
+    'freeze',
+    'thaw',
+    'message_key',
+]
+
+
+def _read_only(self: Any, *args: Any, **kwargs: Any) -> None:
+    raise TypeError('Cached serializer data is read-only; use `protolizer.cache.thaw()` to get a copy.')
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict, equal to (and JSON-serializable like) a plain dict.
+    """
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """
+    Read-only list, equal to (and JSON-serializable like) a plain list.
+    """
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def copy(self) -> list:
+        return list(self)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return list, (list(self),)
+
+
+def freeze(value: Any) -> Any:
+    """
+    Returns a read-only copy of nested dicts and lists; other values are kept as they are.
+    """
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """
+    Returns a mutable copy of nested dicts and lists (frozen or not).
+    """
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+    return value
+
+
+def message_key(message: Message, context: Any, paths: Any = None) -> Tuple[Optional[Hashable], int]:
+    """
+    Returns a key identifying the content of a message, the context and the field mask,
+    and the size of the message in bytes. The key is `None` when the context is not hashable.
+    """
+    payload = message.SerializeToString(deterministic=True)
+    try:
+        if isinstance(context, dict):
+            context = frozenset(context.items()) if context else None
+        hash(context)
+    except TypeError:
+        return None, len(payload)
+    digest = hashlib.blake2b(payload, digest_size=16).digest()
+    return (message.DESCRIPTOR.full_name, digest, context, paths), len(payload)
+
+
+class CacheEntry:
+    """
+    Cached results for one message: the frozen `.data`, and the `.protobuf` once computed.
+    """
+    __slots__ = ('data', 'protobuf', 'size')
+
+    def __init__(self, data: Any, size: int) -> None:
+        self.data = data
+        self.protobuf: Optional[Message] = None
+        self.size = size
+
+
+class LRU:
+    """
+    Thread-safe least-recently-used cache of converted messages, for `Meta.cache`.
+
+    :param maxsize: Maximum number of cached messages.
+    :param max_bytes: Maximum total size of the cached messages (their serialized bytes),
+        or `None` for no limit.
+    """
+
+    def __init__(self, maxsize: int = 1024, max_bytes: Optional[int] = None) -> None:
+        if maxsize < 1:
+            raise ValueError('`maxsize` must be a positive integer.')
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries: 'OrderedDict[Hashable, CacheEntry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the cache: hits, misses, evictions, cached entries and their bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self._entries), 'bytes': self.bytes,
+            }
+
+    def get(self, key: Hashable) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, data: Any, size: int) -> CacheEntry:
+        """
+        Caches the frozen data of a message, evicting the least recently used entries
+        when a limit is exceeded, and returns the new entry.
+        """
+        entry = CacheEntry(freeze(data), size)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += size
+            while len(self._entries) > self.maxsize or (
+                self.max_bytes is not None and self.bytes > self.max_bytes and len(self._entries) > 1
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.size
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
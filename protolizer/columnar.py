@@ -0,0 +1,206 @@
+"""
+Column-wise validation of large `many=True` batches.
+
+The batch is transposed into one column per field and each field's coercion runs over
+its whole column at once. Columns of the built-in `IntField`, `FloatField` and
+`BooleanField` are converted with NumPy when it is installed and the column is
+already numeric; `CharField` and the pure Python paths convert with `map()`. Any other
+field, and any column that needs per-value handling, goes through the field as usual.
+
+Results and errors are the same as validating row by row, with one difference:
+`validate_<name>` hooks and nested serializers run column by column rather than row
+by row.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from protolizer.exceptions import InvalidDataError, ValidationError
+from protolizer.fields import (
+    BooleanField, CharField, Empty, FloatField, IntField, getter_input, set_value, to_text,
+)
+from protolizer.helpers import SparseErrors
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+__all__ = [
+    'column_owner',
+    'validate_columns',
+    'columns_to_rows',
+]
+
+# The `ListSerializer` whose `.is_valid()` is in progress, which keeps its validated columns.
+# Others, such as the instance shared by stateless `load(many=True)` calls, never store them.
+column_owner: ContextVar = ContextVar('protolizer_column_owner', default=None)
+
+_INT64_MAX = 2 ** 63 - 1
+_FLOAT_INT_MAX = 2 ** 53
+
+# Placeholder for values whose validation failed.
+_MISSING = object()
+
+
+def _numeric_array(values):
+    if numpy is None:
+        return None
+    array = numpy.asarray(values)
+    if array.ndim != 1 or array.dtype.kind not in 'biuf':
+        return None
+    return array
+
+
+def _convert_int(field, values):
+    array = _numeric_array(values)
+    if array is not None:
+        kind = array.dtype.kind
+        # Past 2**53 the float64 column may already have rounded the original integers.
+        if kind == 'f' and not (numpy.isfinite(array).all() and numpy.abs(array).max(initial=0) <= _FLOAT_INT_MAX):
+            return None
+        if kind == 'u' and array.max(initial=0) > _INT64_MAX:
+            return None
+        return array.astype(numpy.int64)
+    return list(map(int, values))
+
+
+def _convert_float(field, values):
+    array = _numeric_array(values)
+    if array is not None:
+        return array.astype(numpy.float64)
+    return list(map(float, values))
+
+
+def _convert_bool(field, values):
+    array = _numeric_array(values)
+    if array is not None:
+        if array.dtype.kind == 'b':
+            return array
+        if ((array == 0) | (array == 1)).all():
+            return array != 0
+        return None
+    lookup = dict.fromkeys(field.NULL_VALUES)
+    lookup.update(dict.fromkeys(field.FALSE_VALUES, False))
+    lookup.update(dict.fromkeys(field.TRUE_VALUES, True))
+    column = [lookup.get(value, _MISSING) for value in values]
+    return None if _MISSING in column else column
+
+
+def _convert_char(field, values):
+    column = list(map(to_text, values))
+    if field.trim_whitespace:
+        column = [value.strip() for value in column]
+    return column
+
+
+_CONVERTERS = {
+    IntField: _convert_int,
+    FloatField: _convert_float,
+    BooleanField: _convert_bool,
+    CharField: _convert_char,
+}
+
+
+def _convert_column(entry, values, errors) -> Tuple[Any, Optional[Tuple[int, Exception]]]:
+    """
+    Runs the field validation over a column.
+
+    :return: (column, failure) where failure is the index and `InvalidDataError`
+        of the first value that could not be converted.
+    """
+    field = entry.field
+    convert = _CONVERTERS.get(type(field))
+    if convert is not None and field.source != '*' and None not in values and Empty not in values:
+        try:
+            column = convert(field, values)
+        except (TypeError, ValueError, OverflowError):
+            column = None
+        if column is not None:
+            return column, None
+
+    column = []
+    run_validation = entry.run_validation
+    for index, value in enumerate(values):
+        try:
+            column.append(run_validation(value))
+        except ValidationError as exc:
+            errors.setdefault(index, {})[entry.name] = exc.detail
+            column.append(_MISSING)
+        except InvalidDataError as exc:
+            return column, (index, exc)
+    return column, None
+
+
+def validate_columns(serializer: Any, rows: List[Mapping[str, Any]], sparse: bool = False) -> Dict[str, Any]:
+    """
+    Validates rows column-wise with the execution plan of a serializer.
+
+    :param serializer: Serializer used for every row (the child of a `ListSerializer`).
+    :param rows: List of mappings.
+    :param sparse: Raise the errors as `SparseErrors` instead of a list.
+    :return: {field_name: column}, where columns are lists or NumPy arrays.
+    :raises ValidationError: With a list of per-row errors, like `ListSerializer`.
+    """
+    cls = type(serializer)
+    columns: Dict[str, Any] = {}
+    errors: Dict[int, Dict[str, Any]] = {}
+    failure = None
+    getters = None
+
+    for entry in serializer.get_plan():
+        if entry.get_value is not None:
+            if getters is None:
+                # Custom getters share one copy of each row (see `getter_input`).
+                getters = [getter_input(row) for row in rows]
+            values = [entry.get_value(row, serializer) for row in getters]
+        else:
+            name = entry.name
+            values = [row[name] if name in row else Empty for row in rows]
+
+        column, bad = _convert_column(entry, values, errors)
+        if bad is not None:
+            # Fields are visited in order, so ties keep the first field, like row-wise validation.
+            if failure is None or bad[0] < failure[0]:
+                failure = bad
+            continue
+
+        if entry.validator is not None:
+            hook = entry.validator.__get__(serializer, cls)
+            column = column.tolist() if numpy is not None and isinstance(column, numpy.ndarray) else column
+            for index, value in enumerate(values):
+                if column[index] is _MISSING:
+                    continue
+                try:
+                    column[index] = hook(value)
+                except ValidationError as exc:
+                    errors.setdefault(index, {})[entry.name] = exc.detail
+                    column[index] = _MISSING
+        columns[entry.name] = column
+
+    if failure is not None:
+        raise failure[1]
+    if errors and sparse:
+        raise ValidationError(SparseErrors(sorted(errors.items()), size=len(rows)))
+    if errors:
+        raise ValidationError([errors.get(index, {}) for index in range(len(rows))])
+    return columns
+
+
+def columns_to_rows(serializer: Any, columns: Dict[str, Any], length: int) -> List[Dict[str, Any]]:
+    """
+    Reassembles the rows from the columns returned by `validate_columns()`.
+    """
+    plan = serializer.get_plan()
+    values = [
+        column.tolist() if numpy is not None and isinstance(column, numpy.ndarray) else column
+        for column in (columns[entry.name] for entry in plan)
+    ]
+    if all(entry.target is not None for entry in plan):
+        keys = [entry.target for entry in plan]
+        return [dict(zip(keys, row)) for row in zip(*values)] if keys else [{} for _ in range(length)]
+
+    rows: List[Dict[str, Any]] = [{} for _ in range(length)]
+    for entry, column in zip(plan, values):
+        for row, value in zip(rows, column):
+            set_value(row, list(entry.attributes), value)
+    return rows
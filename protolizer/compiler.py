@@ -0,0 +1,219 @@
+"""
+Code generation of specialised `to_internal_value`/`to_representation` methods.
+
+Serializers that set `Meta.compile = True` get straight-line Python source generated
+from their execution plan once, at class creation. The coercion of the built-in
+`IntField`, `FloatField`, `CharField` and `BooleanField` is inlined; every other
+field, custom getter and `validate_<name>` hook is still called as usual.
+
+The generated source is available as `SerializerClass._compiled.source`, and
+tracebacks through it point at real lines.
+"""
+import linecache
+from typing import Any, Callable, Dict, List, NamedTuple
+
+from protolizer.exceptions import InvalidDataError, ValidationError
+from protolizer.fields import (
+    BaseField, BooleanField, CharField, Empty, FloatField, IntField, getter_input, set_value, to_text,
+)
+
+__all__ = [
+    'CompiledSerializer',
+    'compile_serializer',
+]
+
+
+class CompiledSerializer(NamedTuple):
+    source: str
+    to_internal_value: Callable[[Any, Any], Dict[str, Any]]
+    to_representation: Callable[[Any, Any], Dict[str, Any]]
+
+
+_INLINE_TYPES = (IntField, FloatField, CharField, BooleanField)
+
+
+def _is_inlined(field: BaseField) -> bool:
+    return type(field) in _INLINE_TYPES and field.source != '*'
+
+
+def _internal_value_lines(i: int, field: BaseField, name: str) -> List[str]:
+    """
+    Lines converting the primitive value `v` (never `Empty` or `None`) to `value`.
+    """
+    cls = type(field)
+    if cls is IntField or cls is FloatField:
+        convert, expected = ('int', 'integer') if cls is IntField else ('float', 'float')
+        return [
+            'try:',
+            '    value = v if type(v) is %s else %s(v)' % (convert, convert),
+            'except (TypeError, ValueError):',
+            '    raise InvalidDataError(field=%r, data=v, expected_type=%r)' % (name, expected),
+        ]
+    if cls is CharField:
+        if field.trim_whitespace:
+            return ['value = (v if type(v) is str else to_text(v)).strip()']
+        return ['value = v if type(v) is str else to_text(v)']
+    return [
+        'if v is True or v is False:',
+        '    value = v',
+        'elif v in true_values_%d:' % i,
+        '    value = True',
+        'elif v in false_values_%d:' % i,
+        '    value = False',
+        'elif v in null_values_%d:' % i,
+        '    value = None',
+        'else:',
+        '    raise InvalidDataError(field=%r, data=v, expected_type=%r)' % (name, 'boolean/None'),
+    ]
+
+
+def _representation_lines(i: int, field: BaseField) -> List[str]:
+    """
+    Lines converting the attribute `v` (never `None`) to `value`.
+    """
+    cls = type(field)
+    if cls is IntField:
+        return ['value = v if type(v) is int else int(v)']
+    if cls is FloatField:
+        return ['value = v if type(v) is float else float(v)']
+    if cls is CharField:
+        return ['value = v if type(v) is str else to_text(v)']
+    return [
+        'if v is True or v is False:',
+        '    value = v',
+        'elif v in true_values_%d:' % i,
+        '    value = True',
+        'elif v in false_values_%d:' % i,
+        '    value = False',
+        'elif v in null_values_%d:' % i,
+        '    value = None',
+        'else:',
+        '    value = bool(v)',
+    ]
+
+
+def _indent(lines: List[str], level: int) -> List[str]:
+    return ['    ' * level + line for line in lines]
+
+
+def compile_serializer(cls) -> CompiledSerializer:
+    """
+    Generates and compiles the specialised methods of a serializer class.
+
+    :param cls: Serializer class, with its `_plan` already built.
+    :return: The generated source and the compiled functions.
+    """
+    namespace: Dict[str, Any] = {
+        'Empty': Empty,
+        'ValidationError': ValidationError,
+        'InvalidDataError': InvalidDataError,
+        'set_value': set_value,
+        'getter_input': getter_input,
+        'to_text': to_text,
+        'cls': cls,
+    }
+    internal = [
+        'def to_internal_value(self, data):',
+        '    ret = {}',
+        '    errors = {}',
+    ]
+    if any(entry.get_value is not None for entry in cls._plan):  # noqa
+        # Custom getters share one copy of the input (see `getter_input`).
+        internal.append('    getters = getter_input(data)')
+    representation = [
+        'def to_representation(self, instance):',
+        '    ret = {}',
+        '    is_dict = type(instance) is dict',
+    ]
+
+    for i, entry in enumerate(cls._plan):  # noqa
+        field = entry.field
+        namespace['field_%d' % i] = field
+        namespace['attributes_%d' % i] = list(entry.attributes)
+        inlined = _is_inlined(field)
+        if type(field) is BooleanField:
+            namespace['true_values_%d' % i] = field.TRUE_VALUES
+            namespace['false_values_%d' % i] = field.FALSE_VALUES
+            namespace['null_values_%d' % i] = field.NULL_VALUES
+
+        # to_internal_value
+        lines = ['# %s: %s' % (entry.name, type(field).__name__)]
+        if entry.get_value is not None:
+            lines.append('v = field_%d.get_value(getters, self)' % i)
+        else:
+            lines += [
+                'if %r in data:' % entry.name,
+                '    v = data[%r]' % entry.name,
+                'else:',
+                '    v = Empty',
+            ]
+        body = []
+        if inlined:
+            body += [
+                'if v is Empty:',
+                '    value = field_%d.default' % i,
+                'elif v is None:',
+                '    value = None',
+                'else:',
+            ] + _indent(_internal_value_lines(i, field, entry.name), 1)
+        else:
+            body.append('value = field_%d.run_validation(v)' % i)
+        if entry.validator is not None:
+            namespace['validator_%d' % i] = entry.validator
+            body.append('value = validator_%d.__get__(self, cls)(v)' % i)
+        if entry.target is not None:
+            store = ['ret[%r] = value' % entry.target]
+        else:
+            store = ['set_value(ret, attributes_%d, value)' % i]
+        if inlined and entry.validator is None:
+            # Built-in coercion never raises `ValidationError`.
+            lines += body + store
+        else:
+            lines += ['try:'] + _indent(body, 1) + [
+                'except ValidationError as e:',
+                '    errors[%r] = e.detail' % entry.name,
+                'else:',
+            ] + _indent(store, 1)
+        internal += _indent(lines, 1)
+
+        # to_representation
+        lines = ['# %s: %s' % (entry.name, type(field).__name__)]
+        if entry.target is not None and type(field).get_attribute is BaseField.get_attribute:
+            lines += [
+                'if is_dict:',
+                '    v = instance.get(%r)' % entry.target,
+                '    if v is not None and callable(v):',
+                '        v = field_%d.get_attribute(instance)' % i,
+                'else:',
+                '    v = field_%d.get_attribute(instance)' % i,
+            ]
+        else:
+            lines.append('v = field_%d.get_attribute(instance)' % i)
+        if inlined:
+            convert = _representation_lines(i, field)
+        else:
+            convert = ['value = field_%d.to_representation(v)' % i]
+        lines += [
+            'if v is None:',
+            '    ret[%r] = None' % entry.key,
+            'else:',
+        ] + _indent(convert + ['ret[%r] = value' % entry.key], 1)
+        representation += _indent(lines, 1)
+
+    internal += [
+        '    if errors:',
+        '        raise ValidationError(errors)',
+        '    return ret',
+    ]
+    representation.append('    return ret')
+
+    source = '\n'.join(internal + [''] + representation) + '\n'
+    filename = '<protolizer.compiled %s.%s>' % (cls.__module__, cls.__qualname__)
+    # Lets tracebacks and debuggers show the generated lines.
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    exec(compile(source, filename, 'exec'), namespace)  # noqa: S102
+    return CompiledSerializer(
+        source=source,
+        to_internal_value=namespace['to_internal_value'],
+        to_representation=namespace['to_representation'],
+    )
@@ -0,0 +1,153 @@
+"""
+Descriptor-driven conversion of protobuf messages to Python dicts.
+
+Unlike `MessageToDict`, 64-bit integers stay `int`, wrapper types are read as their
+wrapped value and `Timestamp` and `Duration` as naive UTC `datetime` and `timedelta`
+(to the microsecond). `CharField` formats these as their JSON mapping, RFC 3339 and
+`"<n>s"` strings, and the writers accept them as they are.
+
+Bytes are the exception and stay base64 text: `ParseDict`, and so the writers, read a
+bytes value as base64, so raw bytes would not round-trip through fields that pass values
+through unchanged, such as a `ListField` without a child.
+"""
+import base64
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.json_format import MessageToDict
+from google.protobuf.message import Message
+
+from protolizer.descriptors import JSON_TYPES, WRAPPER_TYPES, is_map_field, is_repeated
+
+try:
+    from google.protobuf.internal.type_checkers import ToShortestFloat
+except ImportError:  # pragma: no cover
+    def ToShortestFloat(value):  # noqa
+        return value
+
+__all__ = [
+    'decode_message',
+    'get_reader_table',
+]
+
+_Reader = Optional[Callable[[Any], Any]]
+
+# Reader tables, keyed by message descriptor.
+_tables: Dict[Descriptor, Dict[int, Tuple[str, _Reader]]] = {}
+
+
+def _read_bytes(value):
+    return base64.b64encode(value).decode('utf-8')
+
+
+def _read_timestamp(value):
+    return value.ToDatetime()
+
+
+def _read_duration(value):
+    return value.ToTimedelta()
+
+
+def _read_json(value):
+    return MessageToDict(value, preserving_proto_field_name=True)
+
+
+def _get_enum_reader(enum_type):
+    names = {number: value.name for number, value in enum_type.values_by_number.items()}
+    return lambda value: names.get(value, value)
+
+
+def _get_message_reader(message_type: Descriptor) -> Callable[[Any], Any]:
+    full_name = message_type.full_name
+    if full_name == 'google.protobuf.Timestamp':
+        return _read_timestamp
+    if full_name == 'google.protobuf.Duration':
+        return _read_duration
+    if full_name in JSON_TYPES:
+        return _read_json
+    if full_name in WRAPPER_TYPES:
+        value_reader = _get_scalar_reader(message_type.fields_by_name['value'])
+        if value_reader is None:
+            return lambda value: value.value
+        return lambda value: value_reader(value.value)
+
+    def read(value):
+        table = _tables.get(message_type)
+        if table is None:
+            table = get_reader_table(message_type)
+        return _decode(value, table)
+    return read
+
+
+def _get_scalar_reader(field: FieldDescriptor) -> _Reader:
+    if field.type == FieldDescriptor.TYPE_BYTES:
+        return _read_bytes
+    if field.type == FieldDescriptor.TYPE_FLOAT:
+        return ToShortestFloat
+    if field.type == FieldDescriptor.TYPE_ENUM:
+        return _get_enum_reader(field.enum_type)
+    if field.type in (FieldDescriptor.TYPE_MESSAGE, FieldDescriptor.TYPE_GROUP):
+        return _get_message_reader(field.message_type)
+    # Remaining scalars are already native Python values.
+    return None
+
+
+def _get_field_reader(field: FieldDescriptor) -> _Reader:
+    if is_map_field(field):
+        value_reader = _get_scalar_reader(field.message_type.fields_by_name['value'])
+        if value_reader is None:
+            return dict
+        return lambda value: {key: value_reader(item) for key, item in value.items()}
+
+    reader = _get_scalar_reader(field)
+    if is_repeated(field):
+        if reader is None:
+            return list
+        return lambda value: [reader(item) for item in value]
+    return reader
+
+
+def get_reader_table(message_type: Descriptor) -> Dict[int, Tuple[str, _Reader]]:
+    """
+    Returns the cached reader table for a message descriptor.
+
+    :param message_type: Descriptor of the message to read.
+    :return: {field_number: (field_name, reader)}, where reader is `None` for
+        values that are returned as-is.
+    """
+    table = _tables.get(message_type)
+    if table is None:
+        table = {
+            field.number: (field.name, _get_field_reader(field))
+            for field in message_type.fields
+        }
+        _tables[message_type] = table
+    return table
+
+
+def _decode(message: Message, table: Dict[int, Tuple[str, _Reader]]) -> Dict[str, Any]:
+    ret = {}
+    for field, value in message.ListFields():
+        entry = table.get(field.number)
+        if entry is None or field.is_extension:
+            entry = ('[%s]' % field.full_name, _get_field_reader(field))
+        name, reader = entry
+        ret[name] = value if reader is None else reader(value)
+    return ret
+
+
+def decode_message(message: Message) -> Dict[str, Any]:
+    """
+    Convert a protobuf message to a dict of native Python values.
+
+    Only fields that are set are included, using their proto field names,
+    the same as `MessageToDict(message, preserving_proto_field_name=True)`.
+
+    :param message: Protobuf message instance.
+    :return: Dictionary of the message fields.
+    """
+    descriptor = message.DESCRIPTOR
+    table = _tables.get(descriptor)
+    if table is None:
+        table = get_reader_table(descriptor)
+    return _decode(message, table)
@@ -0,0 +1,44 @@
+"""
+Small helpers over protobuf descriptors shared by the decoder and the writers.
+"""
+from google.protobuf.descriptor import FieldDescriptor
+
+__all__ = [
+    'WRAPPER_TYPES',
+    'JSON_TYPES',
+    'is_repeated',
+    'is_map_field',
+]
+
+WRAPPER_TYPES = frozenset([
+    'google.protobuf.DoubleValue', 'google.protobuf.FloatValue',
+    'google.protobuf.Int64Value', 'google.protobuf.UInt64Value',
+    'google.protobuf.Int32Value', 'google.protobuf.UInt32Value',
+    'google.protobuf.BoolValue', 'google.protobuf.StringValue',
+    'google.protobuf.BytesValue',
+])
+
+# Well-known types whose Python form is the JSON mapping itself.
+JSON_TYPES = frozenset([
+    'google.protobuf.Any', 'google.protobuf.FieldMask',
+    'google.protobuf.Struct', 'google.protobuf.ListValue', 'google.protobuf.Value',
+])
+
+
+def is_repeated(field: FieldDescriptor) -> bool:
+    """
+    True if the field is repeated (including map fields).
+    """
+    try:
+        return field.is_repeated
+    except AttributeError:
+        # protobuf < 5.29 only exposes the label.
+        return field.label == FieldDescriptor.LABEL_REPEATED
+
+
+def is_map_field(field: FieldDescriptor) -> bool:
+    """
+    True if the field is a map field.
+    """
+    message_type = field.message_type
+    return message_type is not None and message_type.GetOptions().map_entry
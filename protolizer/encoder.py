@@ -0,0 +1,518 @@
+"""
+Direct encoding of Python dicts to the protobuf wire format.
+
+`encode_message(data, schema)` returns the bytes of
+`to_protobuf(data, schema).SerializeToString(deterministic=True)` without building the
+message. The encoder precomputes a table per message descriptor, mapping each key to the
+field number and a function that encodes a value as complete records (tag and payload).
+The records of a message are joined in field number order, and map entries are sorted the
+way the installed protobuf runtime sorts them for deterministic output.
+
+Values the tables do not handle natively make the whole message go through
+`write_message()` instead. These include unknown keys, the JSON mapping of well-known
+types, and strings for numbers. Accepted inputs, raised errors and output bytes therefore
+stay the same as with the writer.
+"""
+import struct
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Optional, Tuple, Type
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.message import Message
+
+from protolizer.arrays import is_array, pack_repeated
+from protolizer.descriptors import JSON_TYPES, WRAPPER_TYPES, is_map_field, is_repeated
+from protolizer.wire import encode_varint
+from protolizer.writer import (
+    _Unsupported, _convert_bool, _convert_bytes, _convert_double, _convert_float, _convert_int, _convert_str,
+    _get_message_filler, write_message,
+)
+
+__all__ = [
+    'encode_message',
+    'get_encoder_table',
+]
+
+_Encode = Callable[[Any], bytes]
+_Slot = Tuple[int, _Encode, Tuple[int, ...]]
+
+# Encoder tables, keyed by message descriptor.
+_tables: Dict[Descriptor, Dict[str, _Slot]] = {}
+
+# (sort key, reverse) of map keys per key kind, probed from the protobuf runtime.
+_map_orders: Dict[str, Optional[Tuple[Optional[Callable[[Any], Any]], bool]]] = {}
+
+# Errors after which the writer converts the message instead, raising its own errors if any.
+_FALLBACK_ERRORS = (TypeError, ValueError, OverflowError, struct.error)
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH = 2
+_WIRE_FIXED32 = 5
+
+_UINT64 = (1 << 64) - 1
+
+_INT_RANGES = {
+    FieldDescriptor.CPPTYPE_INT32: (-(1 << 31), (1 << 31) - 1),
+    FieldDescriptor.CPPTYPE_INT64: (-(1 << 63), (1 << 63) - 1),
+    FieldDescriptor.CPPTYPE_UINT32: (0, (1 << 32) - 1),
+    FieldDescriptor.CPPTYPE_UINT64: (0, _UINT64),
+}
+
+_FIXED_FORMATS = {
+    FieldDescriptor.TYPE_FIXED32: ('<I', _WIRE_FIXED32),
+    FieldDescriptor.TYPE_SFIXED32: ('<i', _WIRE_FIXED32),
+    FieldDescriptor.TYPE_FIXED64: ('<Q', _WIRE_FIXED64),
+    FieldDescriptor.TYPE_SFIXED64: ('<q', _WIRE_FIXED64),
+    FieldDescriptor.TYPE_FLOAT: ('<f', _WIRE_FIXED32),
+    FieldDescriptor.TYPE_DOUBLE: ('<d', _WIRE_FIXED64),
+}
+
+
+_SMALL_VARINTS = [bytes((value,)) for value in range(0x80)]
+
+
+def _tag(number: int, wire_type: int) -> bytes:
+    return encode_varint((number << 3) | wire_type)
+
+
+def _length_delimited(payload: bytes) -> bytes:
+    size = len(payload)
+    return (_SMALL_VARINTS[size] if size < 0x80 else encode_varint(size)) + payload
+
+
+def _get_int_converter(field: FieldDescriptor) -> Callable[[Any], int]:
+    if field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        low, high = _INT_RANGES[FieldDescriptor.CPPTYPE_INT32]
+        numbers = {name: value.number for name, value in field.enum_type.values_by_name.items()}
+        # Closed (proto2) enums reject unknown numbers, as `setattr` does.
+        known = frozenset(numbers.values()) if getattr(field.enum_type, 'is_closed', False) else None
+
+        def convert(value):
+            if isinstance(value, str):
+                number = numbers.get(value)
+                if number is not None:
+                    return number
+            elif isinstance(value, int) and not isinstance(value, bool):
+                if low <= value <= high and (known is None or value in known):
+                    return value
+            raise _Unsupported
+        return convert
+
+    low, high = _INT_RANGES[field.cpp_type]
+
+    def convert(value):
+        value = _convert_int(value)
+        if low <= value <= high:
+            return value
+        raise _Unsupported
+    return convert
+
+
+def _get_payload_encoder(field: FieldDescriptor) -> Tuple[_Encode, int]:
+    """
+    Returns (function encoding a value without its tag, wire type) for a scalar field.
+    """
+    fixed = _FIXED_FORMATS.get(field.type)
+    if fixed is not None:
+        pack = struct.Struct(fixed[0]).pack
+        if field.type == FieldDescriptor.TYPE_FLOAT:
+            return lambda value: pack(_convert_float(value)), fixed[1]
+        if field.type == FieldDescriptor.TYPE_DOUBLE:
+            return lambda value: pack(_convert_double(value)), fixed[1]
+        convert = _get_int_converter(field)
+        return lambda value: pack(convert(value)), fixed[1]
+
+    if field.type == FieldDescriptor.TYPE_STRING:
+        return lambda value: _length_delimited(_convert_str(value).encode('utf-8')), _WIRE_LENGTH
+    if field.type == FieldDescriptor.TYPE_BYTES:
+        return lambda value: _length_delimited(_convert_bytes(value)), _WIRE_LENGTH
+    if field.type == FieldDescriptor.TYPE_BOOL:
+        return lambda value: b'\x01' if _convert_bool(value) else b'\x00', _WIRE_VARINT
+
+    convert = _get_int_converter(field)
+    if field.type == FieldDescriptor.TYPE_SINT32:
+        return lambda value: encode_varint(_zigzag(convert(value), 31)), _WIRE_VARINT
+    if field.type == FieldDescriptor.TYPE_SINT64:
+        return lambda value: encode_varint(_zigzag(convert(value), 63)), _WIRE_VARINT
+    if field.cpp_type in (FieldDescriptor.CPPTYPE_UINT32, FieldDescriptor.CPPTYPE_UINT64):
+        return lambda value: encode_varint(convert(value)), _WIRE_VARINT
+
+    # Negative int32, int64 and enum values are sign-extended to ten bytes.
+    return lambda value: encode_varint(convert(value) & _UINT64), _WIRE_VARINT
+
+
+def _zigzag(value: int, bits: int) -> int:
+    return (value << 1) ^ (value >> bits)
+
+
+def _get_message_encoder(message_type: Descriptor) -> _Encode:
+    """
+    Returns a function encoding the payload of a sub-message (without tag and size).
+    """
+    full_name = message_type.full_name
+
+    def serialize(value):
+        if value.DESCRIPTOR is not message_type:
+            raise _Unsupported
+        return value.SerializeToString(deterministic=True)
+
+    if full_name in ('google.protobuf.Timestamp', 'google.protobuf.Duration'):
+        message_class = message_factory.GetMessageClass(message_type)
+        fill = _get_message_filler(message_type)
+
+        def encode(value):
+            if isinstance(value, Message):
+                return serialize(value)
+            # The datetime conversions of these types are left to the runtime.
+            message = message_class()
+            fill(message, value)
+            return message.SerializeToString(deterministic=True)
+
+    elif full_name in WRAPPER_TYPES:
+        encode_value = _get_field_encoder(message_type.fields_by_name['value'])
+
+        def encode(value):
+            if isinstance(value, Message):
+                return serialize(value)
+            return encode_value(value)
+
+    else:
+        table = None
+
+        def encode(value):
+            nonlocal table
+            if type(value) is not dict:
+                if isinstance(value, Message):
+                    return serialize(value)
+                if not isinstance(value, Mapping):
+                    raise _Unsupported
+            if table is None:
+                # Looked up on first use, as messages can be recursive.
+                table = get_encoder_table(message_type)
+            return _encode(value, table)
+
+    return encode
+
+
+def _get_map_encoder(field: FieldDescriptor) -> _Encode:
+    key_field = field.message_type.fields_by_name['key']
+    value_field = field.message_type.fields_by_name['value']
+    tag = _tag(field.number, _WIRE_LENGTH)
+    key_payload, key_wire_type = _get_payload_encoder(key_field)
+    key_tag = _tag(1, key_wire_type)
+    convert_key = _get_key_converter(key_field)
+    order = _get_map_order(key_field)
+
+    if value_field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+        value_tag = _tag(2, _WIRE_LENGTH)
+        encode_message_value = _get_message_encoder(value_field.message_type)
+
+        def encode_value(item):
+            return value_tag + _length_delimited(encode_message_value(item))
+    else:
+        value_payload, value_wire_type = _get_payload_encoder(value_field)
+        value_tag = _tag(2, value_wire_type)
+
+        def encode_value(item):
+            return value_tag + value_payload(item)
+
+    def encode(value):
+        if order is None:
+            raise _Unsupported
+        sort_key, reverse = order
+        entries = [(convert_key(key), key_tag + key_payload(key) + encode_value(item)) for key, item in value.items()]
+        if sort_key is None:
+            entries.sort(key=_first, reverse=reverse)
+        else:
+            entries.sort(key=lambda entry: sort_key(entry[0]), reverse=reverse)
+        # Entries always hold both the key and the value, defaults included.
+        return b''.join([tag + _length_delimited(entry) for _, entry in entries])
+    return encode
+
+
+def _first(entry: Tuple[Any, bytes]) -> Any:
+    return entry[0]
+
+
+def _get_key_converter(field: FieldDescriptor) -> Callable[[Any], Any]:
+    if field.cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        return _convert_str
+    if field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        return _convert_bool
+    return _get_int_converter(field)
+
+
+def _get_map_order(field: FieldDescriptor) -> Optional[Tuple[Optional[Callable[[Any], Any]], bool]]:
+    """
+    Returns (sort key, reverse) for the keys of a map, or `None` if the order used by the
+    protobuf runtime is not known.
+    """
+    if field.cpp_type == FieldDescriptor.CPPTYPE_STRING:
+        kind = 'string'
+    elif field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        kind = 'bool'
+    elif field.cpp_type in (FieldDescriptor.CPPTYPE_UINT32, FieldDescriptor.CPPTYPE_UINT64):
+        kind = 'unsigned'
+    else:
+        kind = 'signed'
+    if not _map_orders:
+        _map_orders.update(_probe_map_orders())
+    return _map_orders[kind]
+
+
+_PROBE_KEYS = {
+    # (map key type, keys, candidate sort keys)
+    'string': (FieldDescriptor.TYPE_STRING, ['', 'a', 'ab', 'b', 'B'], [
+        None,
+        # Longer keys before the keys they start with.
+        lambda key: key.encode('utf-8') + b'\xff',
+    ]),
+    'signed': (FieldDescriptor.TYPE_INT64, [-1, 0, 1], [None, lambda key: key & _UINT64]),
+    'unsigned': (FieldDescriptor.TYPE_UINT64, [0, 1, _UINT64], [None]),
+    'bool': (FieldDescriptor.TYPE_BOOL, [False, True], [None]),
+}
+
+
+def _probe_map_orders() -> Dict[str, Optional[Tuple[Optional[Callable[[Any], Any]], bool]]]:
+    """
+    Finds how the protobuf runtime sorts map keys for deterministic output: it differs
+    between implementations (e.g. upb writes integer keys in descending order).
+    """
+    file_proto = descriptor_pb2.FileDescriptorProto(
+        name='protolizer_map_order.proto', package='protolizer_map_order', syntax='proto3',
+    )
+    maps = file_proto.message_type.add(name='Maps')
+    entries = file_proto.message_type.add(name='Entries')
+    for number, (kind, (key_type, _, _)) in enumerate(_PROBE_KEYS.items(), 1):
+        entry_name = kind.capitalize() + 'Entry'
+        for message in (maps.nested_type.add(name=entry_name), file_proto.message_type.add(name=entry_name)):
+            message.field.add(name='key', number=1, type=key_type, label=FieldDescriptor.LABEL_OPTIONAL)
+            message.field.add(name='value', number=2, type=FieldDescriptor.TYPE_INT32, label=FieldDescriptor.LABEL_OPTIONAL)
+        maps.nested_type[-1].options.map_entry = True
+        maps.field.add(
+            name=kind, number=number, type=FieldDescriptor.TYPE_MESSAGE, label=FieldDescriptor.LABEL_REPEATED,
+            type_name='.protolizer_map_order.Maps.' + entry_name,
+        )
+        entries.field.add(
+            name=kind, number=number, type=FieldDescriptor.TYPE_MESSAGE, label=FieldDescriptor.LABEL_REPEATED,
+            type_name='.protolizer_map_order.' + entry_name,
+        )
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    maps_message = message_factory.GetMessageClass(pool.FindMessageTypeByName('protolizer_map_order.Maps'))()
+    entries_class: Type[Message] = message_factory.GetMessageClass(pool.FindMessageTypeByName('protolizer_map_order.Entries'))
+    for kind, (_, keys, _) in _PROBE_KEYS.items():
+        for key in keys:
+            getattr(maps_message, kind)[key] = 1
+    # Repeated fields keep the order of the map entries on the wire.
+    written = entries_class.FromString(maps_message.SerializeToString(deterministic=True))
+
+    orders = {}
+    for kind, (_, keys, sort_keys) in _PROBE_KEYS.items():
+        observed = [entry.key for entry in getattr(written, kind)]
+        orders[kind] = next((
+            (sort_key, reverse)
+            for sort_key in sort_keys for reverse in (False, True)
+            if sorted(keys, key=sort_key, reverse=reverse) == observed
+        ), None)
+    return orders
+
+
+def _get_field_encoder(field: FieldDescriptor) -> _Encode:
+    """
+    Returns a function encoding a value of the field as complete records.
+    """
+    if is_map_field(field):
+        return _get_map_encoder(field)
+
+    if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+        if field.type == FieldDescriptor.TYPE_GROUP:
+            raise _Unsupported
+        tag = _tag(field.number, _WIRE_LENGTH)
+        encode_payload = _get_message_encoder(field.message_type)
+        if is_repeated(field):
+            def encode_repeated_message(value):
+                if not isinstance(value, (list, tuple)):
+                    raise _Unsupported
+                return b''.join([tag + _length_delimited(encode_payload(item)) for item in value])
+            return encode_repeated_message
+
+        def encode_message_field(value):
+            return tag + _length_delimited(encode_payload(value))
+        return encode_message_field
+
+    payload, wire_type = _get_payload_encoder(field)
+    if is_repeated(field):
+        if field.is_packed:
+            tag = _tag(field.number, _WIRE_LENGTH)
+
+            def encode_packed(value):
+                if is_array(value):
+                    if not len(value):
+                        return b''
+                    packed = pack_repeated(field, value)
+                    if packed is not None:
+                        return packed
+                    value = value.tolist()
+                elif not isinstance(value, (list, tuple)):
+                    raise _Unsupported
+                if not value:
+                    return b''
+                return tag + _length_delimited(b''.join([payload(item) for item in value]))
+            return encode_packed
+
+        tag = _tag(field.number, wire_type)
+
+        def encode_repeated(value):
+            if is_array(value):
+                value = value.tolist()
+            elif not isinstance(value, (list, tuple)):
+                raise _Unsupported
+            return b''.join([tag + payload(item) for item in value])
+        return encode_repeated
+
+    tag = _tag(field.number, wire_type)
+    if field.has_presence:
+        return lambda value: tag + payload(value)
+    encode = _get_implicit_encoder(field, tag)
+    if encode is not None:
+        return encode
+
+    # Without presence, default values (all zero bits, so not -0.0) are not written.
+    default = {_WIRE_FIXED32: bytes(4), _WIRE_FIXED64: bytes(8)}.get(wire_type, b'\x00')
+
+    def encode_scalar(value):
+        encoded = payload(value)
+        return b'' if encoded == default else tag + encoded
+    return encode_scalar
+
+
+def _get_implicit_encoder(field: FieldDescriptor, tag: bytes) -> Optional[_Encode]:
+    """
+    Returns a specialized encoder for the most common fields without presence (strings,
+    booleans and varint integers), or `None`.
+    """
+    if field.type == FieldDescriptor.TYPE_STRING:
+        def encode_string(value):
+            if not isinstance(value, str):
+                raise _Unsupported
+            if not value:
+                return b''
+            return tag + _length_delimited(value.encode('utf-8'))
+        return encode_string
+
+    if field.type == FieldDescriptor.TYPE_BOOL:
+        true = tag + b'\x01'
+
+        def encode_bool(value):
+            if value is True:
+                return true
+            if value is False:
+                return b''
+            raise _Unsupported
+        return encode_bool
+
+    if field.type in (
+        FieldDescriptor.TYPE_INT32, FieldDescriptor.TYPE_INT64,
+        FieldDescriptor.TYPE_UINT32, FieldDescriptor.TYPE_UINT64,
+    ):
+        low, high = _INT_RANGES[field.cpp_type]
+        small = [tag + varint for varint in _SMALL_VARINTS]
+        small[0] = b''
+
+        def encode_int(value):
+            if type(value) is not int:
+                value = _convert_int(value)
+            if 0 <= value < 0x80:
+                return small[value]
+            if low <= value <= high:
+                return tag + encode_varint(value & _UINT64)
+            raise _Unsupported
+        return encode_int
+
+    return None
+
+
+def get_encoder_table(message_type: Descriptor) -> Dict[str, _Slot]:
+    """
+    Returns the cached encoder table for a message descriptor.
+
+    :param message_type: Descriptor of the message to encode.
+    :return: {key: (field_number, encode, other_fields_of_its_oneof)}, keyed by both the
+        proto and the JSON field names.
+    """
+    table = _tables.get(message_type)
+    if table is None:
+        table = {}
+        for field in message_type.fields:
+            if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE and field.message_type.full_name in JSON_TYPES:
+                continue
+            try:
+                encode = _get_field_encoder(field)
+            except _Unsupported:
+                continue
+            oneof = field.containing_oneof
+            # Setting a field of a oneof clears the others.
+            siblings = tuple(other.number for other in oneof.fields if other is not field) if oneof else ()
+            slot = (field.number, encode, siblings)
+            table[field.json_name] = slot
+            table[field.name] = slot
+        _tables[message_type] = table
+    return table
+
+
+def _encode(data: Any, table: Dict[str, _Slot]) -> bytes:
+    records = []
+    last = 0
+    for key, value in data.items():
+        slot = table.get(key)
+        if slot is None:
+            raise _Unsupported
+        number, encode, siblings = slot
+        if number <= last or siblings:
+            # Keys out of field number order, given twice, or in a oneof.
+            return _encode_unordered(data, table)
+        last = number
+        if value is not None:
+            records.append(encode(value))
+    return b''.join(records)
+
+
+def _encode_unordered(data: Any, table: Dict[str, _Slot]) -> bytes:
+    records: Dict[int, bytes] = {}
+    for key, value in data.items():
+        slot = table.get(key)
+        if slot is None:
+            raise _Unsupported
+        number, encode, siblings = slot
+        if value is None:
+            records.pop(number, None)
+            continue
+        for other in siblings:
+            records.pop(other, None)
+        records[number] = encode(value)
+    return b''.join([records[number] for number in sorted(records)])
+
+
+def encode_message(data: Any, schema: Type[Message]) -> bytes:
+    """
+    Encode a dict to the protobuf wire format.
+
+    Returns the same bytes as `write_message(data, schema()).SerializeToString(deterministic=True)`.
+
+    :param data: Dictionary to encode (e.g. from serializer.data).
+    :param schema: Generated protobuf message class (e.g. from Meta.schema).
+    :return: The serialized message.
+    """
+    descriptor = schema.DESCRIPTOR
+    table = _tables.get(descriptor)
+    if table is None:
+        table = get_encoder_table(descriptor)
+    if type(data) is dict or isinstance(data, Mapping):
+        try:
+            return _encode(data, table)
+        except _FALLBACK_ERRORS:
+            pass
+    return write_message(data, schema()).SerializeToString(deterministic=True)
@@ -8,6 +8,10 @@ class ValidationError(Exception):
     def __init__(self, detail=None):
         self.detail = detail
 
+    def __reduce__(self):
+        # Keeps the detail when errors are sent back from worker processes.
+        return type(self), (self.detail,)
+
 
 class InvalidDataError(Exception):
 
@@ -17,6 +21,9 @@ class InvalidDataError(Exception):
         self.expected_type = expected_type
         self.extra = extra
 
+    def __reduce__(self):
+        return type(self), (self.field, self.data, self.expected_type, self.extra)
+
     def __str__(self):
         text = f'Field {self.field} has invalid data: [{self.data}] => [{type(self.data)}]'
         if self.expected_type:
@@ -0,0 +1,81 @@
+"""
+Fail-fast validation: `is_valid(fail_fast=True)` stops at the first error, and
+`is_valid(max_errors=N)` at the N-th, instead of validating every field of every item.
+
+    class EventSerializer(Serializer):
+        ...
+
+        class Meta:
+            schema = Event
+            fail_fast = True  # or max_errors = 10
+
+Errors are counted where they are raised: a field of a (nested) serializer, or a
+`validate()` hook. The validation loops of `Serializer` and `ListSerializer` check the
+budget of the call through `call_budget`, so nested serializers stop too. `.errors` then
+has the same shape as usual, but only up to where validation stopped: the fields validated
+so far, and for `many=True` the items validated so far.
+"""
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from protolizer.exceptions import ValidationError
+
+__all__ = [
+    'ErrorBudget',
+    'get_budget',
+]
+
+# Budget of the `is_valid()` call in progress; `None` to validate everything.
+call_budget: ContextVar = ContextVar('protolizer_error_budget', default=None)
+
+
+class ErrorBudget:
+    """
+    Counts the errors of a validation call, up to `max_errors`.
+    """
+    __slots__ = ('max_errors', 'count')
+
+    def __init__(self, max_errors: int) -> None:
+        if max_errors < 1:
+            raise ValueError('`max_errors` must be a positive integer.')
+        self.max_errors = max_errors
+        self.count = 0
+
+    def spend(self, exc: ValidationError) -> bool:
+        """
+        Counts an error, unless it collects errors counted already, and returns
+        whether validation should stop.
+        """
+        if not getattr(exc, 'collected', False):
+            self.count += 1
+        return self.count >= self.max_errors
+
+
+def get_budget(
+    serializer: Any,
+    fail_fast: Optional[bool] = None,
+    max_errors: Optional[int] = None,
+) -> Optional[ErrorBudget]:
+    """
+    Returns the budget of an `is_valid()` call, from its arguments or from the
+    `Meta.fail_fast` and `Meta.max_errors` options of the serializer (or of its child),
+    or `None` when all errors are collected.
+    """
+    if max_errors is None and fail_fast is None:
+        serializer = getattr(serializer, 'child', None) or serializer
+        meta = getattr(serializer, 'Meta', None)
+        max_errors = getattr(meta, 'max_errors', None)
+        fail_fast = getattr(meta, 'fail_fast', False)
+    if max_errors is not None:
+        return ErrorBudget(max_errors)
+    return ErrorBudget(1) if fail_fast else None
+
+
+def collected_error(detail: Any) -> ValidationError:
+    """
+    Returns the error raised by a validation loop for the errors it collected, which
+    were each counted already.
+    """
+    exc = ValidationError(detail)
+    exc.collected = True
+    return exc
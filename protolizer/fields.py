@@ -1,8 +1,16 @@
 import functools
 import inspect
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple, Union
+import types
+import weakref
+from operator import attrgetter
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+from google.protobuf.duration_pb2 import Duration
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from protolizer.arrays import is_array, to_float_array, to_int_array
 from protolizer.exceptions import InvalidDataError
 
 try:
@@ -25,7 +33,8 @@ __all__ = [
     'FloatField',
     'DictField',
     'ListField',
-    'set_value'
+    'set_value',
+    'to_text',
 ]
 
 
@@ -36,6 +45,28 @@ class Empty:
     pass
 
 
+# Context of the serializer call in progress. Bound fields read it through `.context`,
+# so the fields shared by all instances of a serializer class never hold per-call state.
+call_context: ContextVar = ContextVar('protolizer_call_context', default=Empty)
+
+# Serializers with a call in progress, innermost first, as nested `(serializer, outer)` pairs.
+# Shared fields have no parent of their own and resolve `.parent` through it.
+call_parents: ContextVar = ContextVar('protolizer_call_parents', default=None)
+
+
+def enter_call(serializer: Any, context: Any) -> Tuple[Any, Any]:
+    """
+    Makes `serializer` and its `context` the ones seen by its fields, until `leave_call()`.
+    """
+    return call_context.set(context), call_parents.set((serializer, call_parents.get()))
+
+
+def leave_call(tokens: Tuple[Any, Any]) -> None:
+    context_token, parents_token = tokens
+    call_parents.reset(parents_token)
+    call_context.reset(context_token)
+
+
 def is_simple_callable(obj):
     """
     True if the object is a callable that takes no arguments.
@@ -59,6 +90,80 @@ def is_simple_callable(obj):
     )
 
 
+# What `is_simple_callable()` has to look at, per type of value.
+_PLAIN, _BUILTIN, _FUNCTION = range(3)
+_type_kinds: Dict[type, int] = {}
+# `is_simple_callable()` results of functions, and of the functions of bound methods.
+_function_results: 'weakref.WeakKeyDictionary[Any, bool]' = weakref.WeakKeyDictionary()
+_method_results: 'weakref.WeakKeyDictionary[Any, bool]' = weakref.WeakKeyDictionary()
+
+
+def _get_kind(value_type: type) -> int:
+    kind = _type_kinds.get(value_type)
+    if kind is None:
+        if issubclass(value_type, types.BuiltinFunctionType):
+            kind = _BUILTIN
+        elif issubclass(value_type, (types.FunctionType, types.MethodType, functools.partial)):
+            kind = _FUNCTION
+        else:
+            kind = _PLAIN
+        _type_kinds[value_type] = kind
+    return kind
+
+
+def _is_simple_callable(value: Any) -> bool:
+    """
+    `is_simple_callable()`, with the signature check cached per function.
+    """
+    kind = _get_kind(type(value))
+    if kind == _PLAIN:
+        return False
+    if kind == _BUILTIN or isinstance(value, functools.partial):
+        return is_simple_callable(value)
+    if isinstance(value, types.MethodType):
+        results, key = _method_results, value.__func__
+    else:
+        results, key = _function_results, value
+    try:
+        return results[key]
+    except (KeyError, TypeError):
+        pass
+    result = is_simple_callable(value)
+    try:
+        results[key] = result
+    except TypeError:
+        pass
+    return result
+
+
+def call_attribute(value: Any, attr: str) -> Any:
+    """
+    Calls `value` when it is a callable taking no arguments, as `get_attribute()` does.
+    """
+    if not _is_simple_callable(value):
+        return value
+    try:
+        return value()
+    except (AttributeError, KeyError) as exc:
+        # If we raised an Attribute or KeyError here it'd get treated
+        # as an omitted field in `Field.get_attribute()`. Instead, we
+        # raise a ValueError to ensure the exception is not masked.
+        raise ValueError(
+            'Exception raised in callable attribute "{}"; original exception was: {}'.format(attr, exc))
+
+
+def getter_input(data: Any) -> Any:
+    """
+    Returns what the custom getters of a serializer receive for one input: a `DictMapper` copy
+    of dicts, which getters may also read as attributes, and other inputs as they are.
+
+    Serializers call it once per input and pass the result to every getter, so getters share
+    it: a change one getter makes is seen by the getters of the fields after it. Getters
+    should treat it as read-only, and copy it (e.g. `dict(obj)`) to modify it.
+    """
+    return DictMapper(data) if isinstance(data, dict) and type(data) is not DictMapper else data
+
+
 def get_attribute(instance: Any, attrs: List[str]) -> Any:
     """
     Similar to Python's built in `getattr(instance, attr)`,
@@ -74,19 +179,51 @@ def get_attribute(instance: Any, attrs: List[str]) -> Any:
                 instance = getattr(instance, attr)
         except (IndexError, KeyError, AttributeError):
             return None
-        if is_simple_callable(instance):
-            try:
-                instance = instance()
-            except (AttributeError, KeyError) as exc:
-                # If we raised an Attribute or KeyError here it'd get treated
-                # as an omitted field in `Field.get_attribute()`. Instead, we
-                # raise a ValueError to ensure the exception is not masked.
-                raise ValueError(
-                    'Exception raised in callable attribute "{}"; original exception was: {}'.format(attr, exc))
+        if _type_kinds.get(type(instance)) != _PLAIN:
+            instance = call_attribute(instance, attr)
 
     return instance
 
 
+def compile_accessor(attrs: Tuple[str, ...], instance_type: type) -> Callable[[Any], Any]:
+    """
+    Returns a function equivalent to `get_attribute(instance, attrs)` for instances of
+    `instance_type`: the first lookup is specialised for dicts, other mappings or objects,
+    and the callable check is skipped for values of types that are never callable.
+    """
+    if not attrs:
+        return lambda instance: instance
+
+    attr, rest = attrs[0], list(attrs[1:])
+    kinds = _type_kinds
+    if instance_type is dict:
+        def lookup(instance: Any) -> Any:
+            return instance.get(attr)
+    elif issubclass(instance_type, Mapping):
+        def lookup(instance: Any) -> Any:
+            try:
+                return instance[attr]
+            except (IndexError, KeyError):
+                return None
+    else:
+        getter = attrgetter(attr)
+
+        def lookup(instance: Any) -> Any:
+            try:
+                return getter(instance)
+            except AttributeError:
+                return None
+
+    def access(instance: Any) -> Any:
+        value = lookup(instance)
+        if kinds.get(type(value)) != _PLAIN:
+            value = call_attribute(value, attr)
+        if rest and value is not None:
+            return get_attribute(value, rest)
+        return value
+    return access
+
+
 def set_value(dictionary: Dict[str, Any], keys: List[str], value: Any) -> None:
     """
     Similar to Python's built in `dictionary[key] = value`,
@@ -108,6 +245,27 @@ def set_value(dictionary: Dict[str, Any], keys: List[str], value: Any) -> None:
     dictionary[keys[-1]] = value
 
 
+def to_text(value: Any) -> str:
+    """
+    Converts a value to the string a `CharField` holds.
+
+    Datetimes and timedeltas, as decoded from `Timestamp` and `Duration` fields, are
+    formatted as in the protobuf JSON mapping: RFC 3339 (UTC if naive) and `"<n>s"`.
+
+    to_text(datetime(2024, 1, 15, 12, 0)) -> '2024-01-15T12:00:00Z'
+    to_text(timedelta(seconds=1.5)) -> '1.500s'
+    """
+    if isinstance(value, datetime):
+        message = Timestamp()
+        message.FromDatetime(value)
+        return message.ToJsonString()
+    if isinstance(value, timedelta):
+        message = Duration()
+        message.FromTimedelta(value)
+        return message.ToJsonString()
+    return str(value)
+
+
 class BaseField(object):
     _auto_creation_counter = 0
     ALLOWED_TYPES = None
@@ -128,7 +286,8 @@ class BaseField(object):
          it's used when the input data key is different from the output data key.
         :param default: default value for the field.
         :param custom: whether the field is custom. If True, the field will be filled by the custom method.
-            custom method name is get_custom_{field_name}.
+            custom method name is get_custom_{field_name}. The input it receives is shared by all
+            the getters of the serializer and must not be modified (see `getter_input`).
             note that if the method is not defined, the field will be filled with None.
         :param context: extra context for the field.
         """
@@ -147,10 +306,49 @@ class BaseField(object):
         self.parent = None
         self.source = None
         self.attributes = None
+        self._accessor = None
 
         self.meta = getattr(self, 'Meta', None)
         self.pb = getattr(self.meta, 'schema', None) if self.meta else None
 
+    @property
+    def context(self) -> Any:
+        """
+        The context of the field. While a serializer call is in progress, bound fields
+        return the context of that call instead of their own.
+        """
+        if self.field_name is not None:
+            context = call_context.get()
+            if context is not Empty:
+                return context
+        return self._context
+
+    @context.setter
+    def context(self, value: Any) -> None:
+        self._context = value
+
+    @property
+    def parent(self) -> Any:
+        """
+        The serializer the field belongs to. Fields shared by all instances of a serializer
+        class have none of their own and return the serializer whose call is in progress.
+        """
+        parent = self._parent
+        if parent is None and self.field_name is not None:
+            calls = head = call_parents.get()
+            while calls is not None:
+                serializer, calls = calls
+                if serializer is self:
+                    # A nested serializer in its own call: its parent is the enclosing one.
+                    return calls[0] if calls is not None else None
+            if head is not None:
+                return head[0]
+        return parent
+
+    @parent.setter
+    def parent(self, value: Any) -> None:
+        self._parent = value
+
     def bind(self, field_name: str, parent: Any) -> None:
         """
         Initializes the field name and parent for the field instance.
@@ -170,6 +368,8 @@ class BaseField(object):
             self.attributes = []
         else:
             self.attributes = self.source.split('.')
+        # (instance type, accessor), compiled by `get_attribute()` for the first instance it gets.
+        self._accessor = None
 
     def get_initial(self) -> Any:
         return self.initial() if callable(self.initial) else self.initial
@@ -180,20 +380,26 @@ class BaseField(object):
         that should be validated and transformed to a native value.
         """
 
-        # convert the dictionary to mapping to make it easier to work with
-        dictionary = DictMapper(dictionary) if isinstance(dictionary, dict) else dictionary
-
         if self.custom:
             fill_method = getattr(instance, f'get_custom_{self.field_name}', None)
-            return fill_method(dictionary) if fill_method else None
+            if fill_method is None:
+                return None
+            return fill_method(dictionary)
 
-        return dictionary[self.field_name] if self.field_name in dictionary and not self.custom else Empty
+        return dictionary[self.field_name] if self.field_name in dictionary else Empty
 
     def get_attribute(self, instance: Any) -> Any:
         """
         Given the *outgoing* instance, return the value for this field
         that should be serialized.
         """
+        accessor = self._accessor
+        if accessor is not None and type(instance) is accessor[0]:
+            return accessor[1](instance)
+        if accessor is None and self.attributes is not None:
+            # Set in one assignment, so concurrent calls never see a type with another type's accessor.
+            accessor = self._accessor = (type(instance), compile_accessor(tuple(self.attributes), type(instance)))
+            return accessor[1](instance)
         return get_attribute(instance, self.attributes)
 
     def get_default(self) -> Any:
@@ -297,17 +503,18 @@ class BooleanField(BaseField):
 class CharField(BaseField):
     """
     A field that validates input as a string.
+    Datetimes and timedeltas are formatted as RFC 3339 and `"<n>s"` strings (see `to_text`).
     """
     def __init__(self, trim_whitespace: bool = False, **kwargs):
         self.trim_whitespace = trim_whitespace
         super().__init__(**kwargs)
 
     def to_internal_value(self, data):
-        value = str(data)
+        value = to_text(data)
         return value.strip() if self.trim_whitespace else value
 
     def to_representation(self, value):
-        return str(value) if value is not None else None
+        return to_text(value) if value is not None else None
 
     def to_protobuf(self, value):
         _repr = self.to_representation(value)
@@ -400,6 +607,10 @@ class CustomField(BaseField):
 class ListField(BaseField):
     """
     A field that validates input as a list.
+
+    With an `IntField` or `FloatField` child, `numpy.ndarray` and `array.array`
+    values are converted in one step instead of item by item. `as_array=True`
+    returns such arrays (int64/float64) instead of lists.
     """
 
     ALLOWED_TYPES = [
@@ -407,7 +618,9 @@ class ListField(BaseField):
         'CustomField', 'BooleanField', 'FloatField',
     ]
 
-    def __init__(self, child=None, **kwargs):
+    ARRAY_TYPES = [IntField, FloatField]
+
+    def __init__(self, child=None, as_array=False, **kwargs):
         self.type = child
         if child and child.__class__.__name__ not in self.ALLOWED_TYPES:
             raise ValueError(
@@ -418,18 +631,32 @@ class ListField(BaseField):
                     ', '.join(self.ALLOWED_TYPES)
                 )
             )
+        if as_array and type(child) not in self.ARRAY_TYPES:
+            raise ValueError('`as_array` requires an `IntField` or `FloatField` child.')
+        self.as_array = as_array
         super().__init__(**kwargs)
 
+    def _to_array(self, data, convert):
+        to_array = to_int_array if type(self.type) is IntField else to_float_array
+        ret = to_array(data, convert)
+        if self.as_array or isinstance(ret, list):
+            return ret
+        return ret.tolist()
+
     def to_internal_value(self, data):
         if data is not Empty:
             if not self.type:
                 return data
+            if (self.as_array or is_array(data)) and type(self.type) in self.ARRAY_TYPES:
+                return self._to_array(data, self.type.to_internal_value)
             return [self.type.to_internal_value(item) for item in data]
         return data
 
     def to_representation(self, value):
         if not self.type:
             return value
+        if (self.as_array or is_array(value)) and type(self.type) in self.ARRAY_TYPES:
+            return self._to_array(value, self.type.to_representation)
         return [self.type.to_representation(item) for item in value]
 
     def to_protobuf(self, value):
@@ -133,6 +133,37 @@ class ReturnDict(OrderedDict):
         return dict, (dict(self),)
 
 
+def _sparse_errors(errors, size):
+    return SparseErrors(errors, size=size)
+
+
+class SparseErrors(dict):
+    """
+    Errors of a `many=True` serializer with `sparse_errors=True`: {item index: detail}
+    for the invalid items only, so its size does not grow with the valid ones.
+    `size` is the number of validated items, and `dense()` returns the usual list.
+    """
+
+    def __init__(self, *args, size=0, serializer=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.size = size
+        self.serializer = serializer
+
+    def dense(self):
+        """
+        Returns the errors as `many=True` serializers usually have them: a `ReturnList`
+        with the detail of each validated item, `{}` for the valid ones.
+        """
+        return ReturnList([self.get(index, {}) for index in range(self.size)], serializer=self.serializer)
+
+    def __repr__(self):
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        # Pickling these objects will drop the .serializer backlink.
+        return _sparse_errors, (dict(self), self.size)
+
+
 class DictMapper(dict):
     """
     This is a dict-like object that exposes keys as attributes.
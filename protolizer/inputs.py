@@ -0,0 +1,85 @@
+"""
+Input adapters: what `Serializer.to_internal_value()` reads its fields from.
+
+Dicts and other mappings are read as they are. Protobuf messages are decoded once (see
+`protolizer.decoder`), and plain objects, such as ORM instances, are wrapped in an
+`ObjectInput` that reads their attributes on demand. Fields look values up with `in` and
+`[]` either way, and nothing is copied per field.
+"""
+from collections.abc import Mapping
+from typing import Any, Iterator
+
+from google.protobuf.message import Message
+
+from protolizer.decoder import decode_message
+from protolizer.fields import call_attribute
+
+__all__ = [
+    'ObjectInput',
+    'as_input',
+]
+
+_MISSING = object()
+
+
+class ObjectInput(Mapping):
+    """
+    Read-only mapping over the attributes of an object. Callables taking no arguments are
+    called, as `get_attribute()` does for output. Each attribute is read at most once, so
+    properties are not evaluated again by `in` and `[]`. Custom getters receiving it can
+    also read the attributes directly, e.g. `obj.username`.
+    """
+    __slots__ = ('_object', '_values')
+
+    def __init__(self, obj: Any) -> None:
+        object.__setattr__(self, '_object', obj)
+        object.__setattr__(self, '_values', {})
+
+    def _get(self, key: str) -> Any:
+        try:
+            return self._values[key]
+        except KeyError:
+            pass
+        value = getattr(self._object, key, _MISSING)
+        if value is not _MISSING:
+            value = call_attribute(value, key)
+        self._values[key] = value
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._get(key) if isinstance(key, str) else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._get(key) is not _MISSING
+
+    def __getattr__(self, key: str) -> Any:
+        return getattr(self._object, key)
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        raise AttributeError('{!r} is read-only.'.format(type(self).__name__))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(getattr(self._object, '__dict__', ()))
+
+    def __len__(self) -> int:
+        return len(getattr(self._object, '__dict__', ()))
+
+    def __repr__(self) -> str:
+        return '{}({!r})'.format(type(self).__name__, self._object)
+
+
+def as_input(data: Any) -> Any:
+    """
+    Returns what the fields of a serializer read `data` through. Values that are neither
+    mappings, messages nor objects with attributes (e.g. strings) are returned as they are.
+    """
+    if isinstance(data, Mapping):
+        return data
+    if isinstance(data, Message):
+        return decode_message(data)
+    if not isinstance(data, type) and (hasattr(data, '__dict__') or hasattr(type(data), '__slots__')):
+        return ObjectInput(data)
+    return data
@@ -0,0 +1,457 @@
+"""
+Lazy, field-selective reading of serialized protobuf messages.
+
+`AccountSerializer(data=payload)` reads `payload` through a `WireInput`: a read-only mapping
+that scans the wire format once, keeps the position of the records of the fields the
+serializer reads, and skips the others by their length without decoding them. Values are
+decoded on first access, to what `decode_message()` returns for the parsed message.
+Sub-messages read by nested serializers stay `WireInput`s until the nested serializer
+reads them.
+
+Common scalars are decoded here. Other values (maps, well-known types, closed enums, ...)
+are decoded by parsing only the records of their field with the runtime.
+"""
+import math
+import struct
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from google.protobuf import message_factory
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.message import DecodeError
+
+from protolizer.decoder import _read_bytes, ToShortestFloat, decode_message
+from protolizer.descriptors import JSON_TYPES, WRAPPER_TYPES, is_map_field, is_repeated
+from protolizer.wire import decode_varint
+
+__all__ = [
+    'WireInput',
+    'read_wire',
+    'split_delimited',
+]
+
+WIRE_TYPES = (bytes, bytearray, memoryview)
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH = 2
+_WIRE_START_GROUP = 3
+_WIRE_END_GROUP = 4
+_WIRE_FIXED32 = 5
+
+_UINT32 = (1 << 32) - 1
+_UINT64 = (1 << 64) - 1
+
+# Returned by decoders for fields that are not set.
+_MISSING = object()
+
+# (tag offset, value offset, end offset, wire type) of a record.
+_Span = Tuple[int, int, int, int]
+_Decode = Callable[['WireInput', List[_Span], str], Any]
+
+# ({field number: name}, {name: (field number, decoder)}) of the selected fields,
+# keyed by (descriptor, names, nested names).
+_Selection = Tuple[Dict[int, str], Dict[str, Tuple[int, _Decode]]]
+_selections: Dict[Tuple[Descriptor, Optional[FrozenSet[str]], FrozenSet[str]], _Selection] = {}
+
+
+def _int32(value):
+    value &= _UINT32
+    return value - (1 << 32) if value >> 31 else value
+
+
+def _int64(value):
+    value &= _UINT64
+    return value - (1 << 64) if value >> 63 else value
+
+
+def _zigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+_VARINT_CONVERTERS = {
+    FieldDescriptor.TYPE_INT32: _int32,
+    FieldDescriptor.TYPE_INT64: _int64,
+    FieldDescriptor.TYPE_UINT32: lambda value: value & _UINT32,
+    FieldDescriptor.TYPE_UINT64: lambda value: value & _UINT64,
+    FieldDescriptor.TYPE_SINT32: lambda value: _zigzag(value & _UINT32),
+    FieldDescriptor.TYPE_SINT64: lambda value: _zigzag(value & _UINT64),
+    FieldDescriptor.TYPE_BOOL: bool,
+}
+
+_FIXED_FORMATS = {
+    FieldDescriptor.TYPE_FIXED32: (struct.Struct('<I'), _WIRE_FIXED32),
+    FieldDescriptor.TYPE_SFIXED32: (struct.Struct('<i'), _WIRE_FIXED32),
+    FieldDescriptor.TYPE_FIXED64: (struct.Struct('<Q'), _WIRE_FIXED64),
+    FieldDescriptor.TYPE_SFIXED64: (struct.Struct('<q'), _WIRE_FIXED64),
+    FieldDescriptor.TYPE_FLOAT: (struct.Struct('<f'), _WIRE_FIXED32),
+    FieldDescriptor.TYPE_DOUBLE: (struct.Struct('<d'), _WIRE_FIXED64),
+}
+
+
+class _Fallback(Exception):
+    """
+    Raised by a native decoder when the runtime must parse the field instead.
+    """
+
+
+def _skip_group(buffer: Any, pos: int, end: int, number: int) -> int:
+    while pos < end:
+        tag, pos = decode_varint(buffer, pos)
+        wire_type = tag & 7
+        if wire_type == _WIRE_END_GROUP:
+            if tag >> 3 != number:
+                raise DecodeError('Mismatched end group tag.')
+            return pos
+        pos = _skip(buffer, pos, end, wire_type, tag >> 3)
+    raise DecodeError('Truncated message.')
+
+
+def _skip(buffer: Any, pos: int, end: int, wire_type: int, number: int) -> int:
+    """
+    Returns the end offset of a record value starting at `pos`.
+    """
+    if wire_type == _WIRE_VARINT:
+        while buffer[pos] & 0x80:
+            pos += 1
+        pos += 1
+    elif wire_type == _WIRE_LENGTH:
+        size, pos = decode_varint(buffer, pos)
+        pos += size
+    elif wire_type == _WIRE_FIXED64:
+        pos += 8
+    elif wire_type == _WIRE_FIXED32:
+        pos += 4
+    elif wire_type == _WIRE_START_GROUP:
+        pos = _skip_group(buffer, pos, end, number)
+    else:
+        raise DecodeError('Unexpected wire type {}.'.format(wire_type))
+    if pos > end:
+        raise DecodeError('Truncated message.')
+    return pos
+
+
+def _iter_values(wire_input: 'WireInput', spans: List[_Span], wire_type: int, read: Callable[[Any, int, int], Any]):
+    """
+    Yields the values of the records of a scalar field, unpacking packed records.
+    """
+    buffer = wire_input._buffer
+    for _, start, end, record_type in spans:
+        if record_type == wire_type:
+            yield read(buffer, start, end)
+        elif record_type == _WIRE_LENGTH and wire_type != _WIRE_LENGTH:
+            size, start = decode_varint(buffer, start)
+            while start < end:
+                value_end = _skip(buffer, start, end, wire_type, 0)
+                yield read(buffer, start, value_end)
+                start = value_end
+        else:
+            raise _Fallback
+
+
+def _get_scalar_decoder(field: FieldDescriptor) -> Optional[_Decode]:
+    """
+    Returns a native decoder for a scalar field, or `None` if the runtime must parse it.
+    """
+    if field.type in _VARINT_CONVERTERS:
+        convert = _VARINT_CONVERTERS[field.type]
+        wire_type = _WIRE_VARINT
+
+        def read(buffer, start, end):
+            return convert(decode_varint(buffer, start)[0])
+
+    elif field.type == FieldDescriptor.TYPE_ENUM:
+        if getattr(field.enum_type, 'is_closed', False):
+            # Unknown numbers of closed enums go to the unknown fields.
+            return None
+        names = {number: value.name for number, value in field.enum_type.values_by_number.items()}
+        wire_type = _WIRE_VARINT
+
+        def read(buffer, start, end):
+            number = _int32(decode_varint(buffer, start)[0])
+            return names.get(number, number)
+
+    elif field.type in _FIXED_FORMATS:
+        unpack_from = _FIXED_FORMATS[field.type][0].unpack_from
+        wire_type = _FIXED_FORMATS[field.type][1]
+        if field.type == FieldDescriptor.TYPE_FLOAT:
+            def read(buffer, start, end):
+                return ToShortestFloat(unpack_from(buffer, start)[0])
+        else:
+            def read(buffer, start, end):
+                return unpack_from(buffer, start)[0]
+
+    elif field.type in (FieldDescriptor.TYPE_STRING, FieldDescriptor.TYPE_BYTES):
+        wire_type = _WIRE_LENGTH
+        if field.type == FieldDescriptor.TYPE_STRING:
+            def read(buffer, start, end):
+                size, start = decode_varint(buffer, start)
+                try:
+                    return str(buffer[start:end], 'utf-8')
+                except UnicodeDecodeError:
+                    raise _Fallback from None
+        else:
+            def read(buffer, start, end):
+                size, start = decode_varint(buffer, start)
+                return _read_bytes(bytes(buffer[start:end]))
+
+    else:
+        return None
+
+    if is_repeated(field):
+        def decode_repeated(wire_input, spans, name):
+            return list(_iter_values(wire_input, spans, wire_type, read)) or _MISSING
+        return decode_repeated
+
+    if field.has_presence:
+        def decode_optional(wire_input, spans, name):
+            value = _MISSING
+            for value in _iter_values(wire_input, spans, wire_type, read):
+                pass
+            return value
+        return decode_optional
+
+    def decode(wire_input, spans, name):
+        value = _MISSING
+        for value in _iter_values(wire_input, spans, wire_type, read):
+            pass
+        # Fields without presence are not set when they hold their default value (not -0.0).
+        if not value and not (type(value) is float and math.copysign(1.0, value) < 0):
+            return _MISSING
+        return value
+    return decode
+
+
+def _get_lazy_decoder(field: FieldDescriptor) -> _Decode:
+    message_type = field.message_type
+
+    def decode_lazy(wire_input, spans, name):
+        if any(span[3] != _WIRE_LENGTH for span in spans):
+            raise _Fallback
+        buffer = wire_input._buffer
+        if is_repeated(field):
+            return [WireInput(buffer, message_type, *_payload(buffer, span)) for span in spans]
+        if len(spans) == 1:
+            return WireInput(buffer, message_type, *_payload(buffer, spans[0]))
+        # Repeated records of a sub-message are merged, as parsing their concatenation does.
+        payload = b''.join([bytes(buffer[start:end]) for start, end in (_payload(buffer, span) for span in spans)])
+        return WireInput(payload, message_type)
+    return decode_lazy
+
+
+def _payload(buffer: Any, span: _Span) -> Tuple[int, int]:
+    size, start = decode_varint(buffer, span[1])
+    return start, span[2]
+
+
+def _decode_with_runtime(wire_input: 'WireInput', spans: List[_Span], name: str) -> Any:
+    """
+    Decodes a field by parsing only its records into an empty message.
+    """
+    buffer = wire_input._buffer
+    records = b''.join([bytes(buffer[start:end]) for start, _, end, _ in spans])
+    message_class = message_factory.GetMessageClass(wire_input._type)
+    return decode_message(message_class.FromString(records)).get(name, _MISSING)
+
+
+def _get_selection(
+    message_type: Descriptor,
+    names: Optional[FrozenSet[str]],
+    nested: FrozenSet[str],
+) -> _Selection:
+    key = (message_type, names, nested)
+    selection = _selections.get(key)
+    if selection is None:
+        numbers: Dict[int, str] = {}
+        decoders: Dict[str, Tuple[int, _Decode]] = {}
+        for field in message_type.fields:
+            if names is not None and field.name not in names:
+                continue
+            decode = None
+            if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+                full_name = field.message_type.full_name
+                if (
+                    field.name in nested and not is_map_field(field) and field.type == FieldDescriptor.TYPE_MESSAGE
+                    and full_name not in JSON_TYPES and full_name not in WRAPPER_TYPES
+                    and full_name not in ('google.protobuf.Timestamp', 'google.protobuf.Duration')
+                ):
+                    decode = _get_lazy_decoder(field)
+            else:
+                decode = _get_scalar_decoder(field)
+            numbers[field.number] = field.name
+            decoders[field.name] = (field.number, decode or _decode_with_runtime)
+        selection = (numbers, decoders)
+        _selections[key] = selection
+    return selection
+
+
+class WireInput(Mapping):
+    """
+    Read-only mapping over a serialized message, keyed by proto field name.
+
+    Only the selected fields are readable, and each is decoded once, on first access.
+    """
+    __slots__ = ('_buffer', '_start', '_end', '_type', '_names', '_nested', '_selection', '_spans', '_values')
+
+    def __init__(
+        self,
+        buffer: Any,
+        message_type: Descriptor,
+        start: int = 0,
+        end: Optional[int] = None,
+        names: Optional[FrozenSet[str]] = None,
+        nested: FrozenSet[str] = frozenset(),
+    ) -> None:
+        """
+        :param buffer: Bytes-like object holding the message.
+        :param message_type: Descriptor of the message.
+        :param start: Offset of the message in the buffer.
+        :param end: End offset of the message, the end of the buffer by default.
+        :param names: Names of the fields to read; all fields by default.
+        :param nested: Names of the sub-message fields to return as `WireInput`s.
+        """
+        self._buffer = buffer
+        self._start = start
+        self._end = len(buffer) if end is None else end
+        self._type = message_type
+        self._names = names
+        self._nested = nested
+        self._selection = _get_selection(message_type, names, nested)
+        self._spans: Optional[Dict[int, List[_Span]]] = None
+        self._values: Dict[str, Any] = {}
+
+    def select(self, names: Optional[FrozenSet[str]], nested: FrozenSet[str]) -> 'WireInput':
+        """
+        Returns a `WireInput` of the same message reading the given fields.
+        """
+        if names == self._names and nested == self._nested:
+            return self
+        return WireInput(self._buffer, self._type, self._start, self._end, names, nested)
+
+    def _scan(self) -> Dict[int, List[_Span]]:
+        buffer = self._buffer
+        selection = self._selection[0]
+        end = self._end
+        pos = self._start
+        spans: Dict[int, List[_Span]] = {}
+        try:
+            while pos < end:
+                start = pos
+                tag = buffer[pos]
+                if tag < 0x80:
+                    pos += 1
+                else:
+                    tag, pos = decode_varint(buffer, pos)
+                number = tag >> 3
+                wire_type = tag & 7
+                value_start = pos
+                # Inlined `_skip()` for the most common records.
+                if wire_type == _WIRE_LENGTH:
+                    size = buffer[pos]
+                    if size < 0x80:
+                        pos += 1 + size
+                    else:
+                        size, pos = decode_varint(buffer, pos)
+                        pos += size
+                elif wire_type == _WIRE_VARINT and buffer[pos] < 0x80:
+                    pos += 1
+                else:
+                    pos = _skip(buffer, pos, end, wire_type, number)
+                if pos > end:
+                    raise DecodeError('Truncated message.')
+                if number in selection:
+                    record = (start, value_start, pos, wire_type)
+                    records = spans.get(number)
+                    if records is None:
+                        spans[number] = [record]
+                    else:
+                        records.append(record)
+        except IndexError:
+            raise DecodeError('Truncated message.') from None
+        self._spans = spans
+        return spans
+
+    def _get(self, key: Any) -> Any:
+        values = self._values
+        if key in values:
+            return values[key]
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        value = _MISSING
+        decoder = self._selection[1].get(key)
+        if decoder is not None:
+            number, decode = decoder
+            records = spans.get(number)
+            if records is not None:
+                try:
+                    value = decode(self, records, key)
+                except _Fallback:
+                    value = _decode_with_runtime(self, records, key)
+            values[key] = value
+        return value
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._get(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return self._get(key) is not _MISSING
+
+    def __iter__(self) -> Iterator[str]:
+        spans = self._spans
+        if spans is None:
+            spans = self._scan()
+        # In field number order, as `decode_message()`.
+        numbers = self._selection[0]
+        for number in sorted(spans):
+            name = numbers[number]
+            if self._get(name) is not _MISSING:
+                yield name
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return '{}({})'.format(type(self).__name__, self._type.full_name)
+
+
+def read_wire(
+    data: Any,
+    message_type: Descriptor,
+    names: Optional[FrozenSet[str]] = None,
+    nested: FrozenSet[str] = frozenset(),
+) -> WireInput:
+    """
+    Returns a `WireInput` reading the given fields of a serialized message.
+
+    :param data: Bytes-like object, or a `WireInput` read by a nested serializer.
+    :param message_type: Descriptor of the message, for bytes.
+    :param names: Names of the fields to read; all fields when `None`.
+    :param nested: Names of the sub-message fields read by nested serializers.
+    """
+    if isinstance(data, WireInput):
+        return data.select(names, nested)
+    return WireInput(data, message_type, names=names, nested=nested)
+
+
+def split_delimited(data: Any) -> List[memoryview]:
+    """
+    Splits a buffer of size-prefixed records, without copying them.
+    """
+    view = memoryview(data)
+    records = []
+    pos = 0
+    end = len(view)
+    try:
+        while pos < end:
+            size, pos = decode_varint(view, pos)
+            if pos + size > end:
+                raise DecodeError('Truncated record.')
+            records.append(view[pos:pos + size])
+            pos += size
+    except IndexError:
+        raise DecodeError('Truncated record.') from None
+    return records
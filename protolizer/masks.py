@@ -0,0 +1,106 @@
+"""
+Field masks: serializing and validating only some of the fields of a serializer.
+
+A mask is a `google.protobuf.field_mask_pb2.FieldMask` or a list of dotted paths, e.g.
+`['username', 'settings.is_public']`. Paths name fields by their declared name or their
+`proto_field`. The execution plan of a serializer is pruned to the requested fields, so
+unrequested fields never have their accessors, custom getters or nested serializers run.
+
+Nested serializers receive the rest of their paths through `call_mask`, the same way
+they receive the context of the call, so shared fields never hold a mask.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple, Union
+
+from google.protobuf.field_mask_pb2 import FieldMask
+
+from protolizer.fields import Empty
+from protolizer.meta import FieldPlan
+
+__all__ = [
+    'get_paths',
+    'mask_plan',
+]
+
+# Paths requested from the nested serializer being run; `None` for all of its fields.
+call_mask: ContextVar = ContextVar('protolizer_call_mask', default=Empty)
+
+# Masked plans cached per serializer class.
+MASK_CACHE_SIZE = 128
+
+Mask = Union[FieldMask, Iterable[str], None]
+
+
+def get_paths(mask: Mask) -> Optional[FrozenSet[str]]:
+    """
+    Returns the paths of a mask as a frozenset, or `None` when there is no mask.
+    """
+    if mask is None:
+        return None
+    if isinstance(mask, FieldMask):
+        return frozenset(mask.paths)
+    if isinstance(mask, str):
+        raise TypeError('A field mask must be a `FieldMask` or a list of paths, not a string.')
+    return frozenset(mask)
+
+
+def _split(paths: FrozenSet[str]) -> Dict[str, Optional[Set[str]]]:
+    """
+    Groups paths by their first name: {name: rest of the paths, or None for the whole field}.
+    """
+    tree: Dict[str, Optional[Set[str]]] = {}
+    for path in paths:
+        name, _, rest = path.partition('.')
+        if not rest:
+            tree[name] = None
+        elif tree.get(name, ()) is not None:
+            tree.setdefault(name, set()).add(rest)
+    return tree
+
+
+def _scoped(func: Callable[[Any], Any], paths: Optional[FrozenSet[str]]) -> Callable[[Any], Any]:
+    def run(value: Any) -> Any:
+        token = call_mask.set(paths)
+        try:
+            return func(value)
+        finally:
+            call_mask.reset(token)
+    return run
+
+
+def mask_plan(
+    plan: Tuple[FieldPlan, ...],
+    paths: FrozenSet[str],
+    is_nested: Callable[[Any], bool],
+    serializer_name: str,
+) -> Tuple[FieldPlan, ...]:
+    """
+    Returns the entries of a plan requested by `paths`, in plan order.
+
+    :param is_nested: Whether a field is a nested serializer, which gets the rest of its paths.
+    :raises ValueError: If a path names an unknown field, or goes into a field that is
+        not a nested serializer.
+    """
+    tree = _split(paths)
+    entries = []
+    for entry in plan:
+        name = entry.name if entry.name in tree else entry.key
+        if name not in tree:
+            continue
+        rest = tree.pop(name)
+        if is_nested(entry.field):
+            rest = None if rest is None else frozenset(rest)
+            entry = entry._replace(
+                paths=rest,
+                run_validation=_scoped(entry.run_validation, rest),
+                to_representation=_scoped(entry.to_representation, rest),
+            )
+        elif rest is not None:
+            raise ValueError('{!r} field of {!r} serializer has no sub-fields to mask.'.format(name, serializer_name))
+        entries.append(entry)
+
+    if tree:
+        raise ValueError('Unknown fields in the field mask of {!r} serializer: {}'.format(
+            serializer_name, ', '.join(sorted(tree))
+        ))
+    return tuple(entries)
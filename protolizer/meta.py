@@ -1,6 +1,76 @@
+import copy
+import inspect
 from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional, Tuple
 
-from protolizer.fields import BaseField
+from protolizer.compiler import compile_serializer
+from protolizer.fields import BaseField, Empty
+
+
+class FieldPlan(NamedTuple):
+    """
+    Everything a serializer needs to run a single field, resolved once per class.
+    """
+    name: str
+    field: BaseField
+    # Source path of the field, and its single key when the path is flat.
+    attributes: Tuple[str, ...]
+    target: Optional[str]
+    # Output key used by `to_representation()`.
+    key: str
+    # `None` when the field uses the default key lookup of `BaseField.get_value`.
+    get_value: Optional[Callable[[Any, Any], Any]]
+    run_validation: Callable[[Any], Any]
+    get_attribute: Callable[[Any], Any]
+    to_representation: Callable[[Any], Any]
+    # Raw class attribute for `validate_<name>`, bound to the serializer
+    # instance with `__get__` when it is called.
+    validator: Any
+    # Paths requested from a nested serializer by a field mask (see `protolizer.masks`).
+    paths: Any = Empty
+
+
+def _get_hook(cls, name):
+    hook = inspect.getattr_static(cls, name, None)
+    if hook is None:
+        return None
+    if not hasattr(hook, '__get__'):
+        # Plain callables stored on the class are returned as-is by `getattr()`.
+        hook = staticmethod(hook)
+    return hook
+
+
+def passes_context(plan: Tuple[FieldPlan, ...]) -> bool:
+    """
+    Whether a field of the plan may read the context of the call: the built-in
+    fields never do, nested serializers and custom field classes may.
+    """
+    return any(type(entry.field).__module__ != BaseField.__module__ for entry in plan)
+
+
+def build_plan(cls, fields) -> Tuple[FieldPlan, ...]:
+    """
+    Builds the execution plan of a serializer class from already bound fields.
+    """
+    plan = []
+    for name, field in fields.items():
+        attributes = tuple(field.attributes)
+        get_value = None
+        if field.custom or type(field).get_value is not BaseField.get_value:
+            get_value = field.get_value
+        plan.append(FieldPlan(
+            name=name,
+            field=field,
+            attributes=attributes,
+            target=attributes[0] if len(attributes) == 1 else None,
+            key=field.proto_field if field.proto_field else name,
+            get_value=get_value,
+            run_validation=field.run_validation,
+            get_attribute=field.get_attribute,
+            to_representation=field.to_representation,
+            validator=_get_hook(cls, 'validate_' + name),
+        ))
+    return tuple(plan)
 
 
 class SerializerMetaclass(type):
@@ -9,6 +79,13 @@ class SerializerMetaclass(type):
     Any instances of `Field` included as attributes on either the class
     or on any of its superclasses will be included in the
     `_declared_fields` dictionary.
+
+    It also compiles the declared fields into `_plan`, an immutable tuple of
+    `FieldPlan` entries shared by every instance of the class, so creating a
+    serializer does not have to copy and re-bind its fields.
+
+    When `Meta.compile` is set, specialised methods are generated from the
+    plan and stored as `_compiled` (see `protolizer.compiler`).
     """
 
     @classmethod
@@ -35,6 +112,22 @@ class SerializerMetaclass(type):
 
         return OrderedDict(base_fields + fields)
 
+    @classmethod
+    def _get_plan(mcs, cls):
+        fields = OrderedDict()
+        for name, field in copy.deepcopy(cls._declared_fields).items():  # noqa
+            # Plan fields are shared by all instances: `.parent` is the serializer whose call is in progress.
+            field.bind(field_name=name, parent=None)
+            fields[name] = field
+        return build_plan(cls, fields)
+
     def __new__(mcs, name, bases, attrs):
         attrs['_declared_fields'] = mcs._get_declared_fields(bases, attrs)
-        return super().__new__(mcs, name, bases, attrs)
+        cls = super().__new__(mcs, name, bases, attrs)
+        cls._plan = mcs._get_plan(cls)
+        cls._plan_context = getattr(cls, '_dynamic_fields', False) or passes_context(cls._plan)
+        cls._compiled = None
+        # Serializers with dynamic fields build their plan per instance, so there is nothing to compile.
+        if getattr(getattr(cls, 'Meta', None), 'compile', False) and not getattr(cls, '_dynamic_fields', False):
+            cls._compiled = compile_serializer(cls)
+        return cls
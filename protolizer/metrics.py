@@ -0,0 +1,362 @@
+"""
+Runtime metrics of serializers: conversion counts, batch sizes, latencies, validation
+failures and output bytes.
+
+    from protolizer.metrics import InMemoryMetrics, add_hook, to_prometheus
+
+    metrics = InMemoryMetrics()
+    # `output_bytes=True` is needed for `.protobuf` conversions to report their size.
+    add_hook(metrics, output_bytes=True)
+    ...
+    text = to_prometheus(metrics)  # served on a /metrics endpoint
+
+A hook is any callable taking an `Observation`. Top-level `is_valid()`, `.data`, `.protobuf`
+and `to_bytes()` calls each report one observation, named after the serializer class (the child
+class for `many=True`). `.data` and `.protobuf` report when they convert, not when they
+return a result already computed. The duration of `.protobuf` includes the `.data` conversion
+it runs, which is not reported separately, and likewise for `to_bytes()`. Nested serializers
+are part of their parent's observation.
+
+`.protobuf` only measures the serialized size of its messages, which walks them again, while
+a hook registered with `output_bytes=True` is present; `to_bytes()` always reports the size
+of its payload. `to_prometheus()` leaves out the output bytes counter until a size is reported.
+
+Serializers only queue a tuple of the `Observation` values per conversion. `flush()` passes
+them to the hooks every `BATCH_SIZE` conversions, and readers such as `InMemoryMetrics.snapshot()`
+call it first. A hook with an `observe_many()` method gets each batch at once, as a list of
+these tuples.
+
+Hooks run in the thread of the conversion that fills a batch, or of the `flush()` call, and
+must be thread-safe. When no hook is registered, serializers only check that the hook list
+is empty.
+"""
+import bisect
+import threading
+from collections import deque
+from itertools import groupby, repeat
+from operator import itemgetter
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from protolizer.helpers import SparseErrors
+
+__all__ = [
+    'Observation',
+    'Histogram',
+    'InMemoryMetrics',
+    'add_hook',
+    'remove_hook',
+    'flush',
+    'to_prometheus',
+]
+
+
+class Observation(NamedTuple):
+    serializer: str
+    # 'is_valid', 'data', 'protobuf' or 'to_bytes'
+    operation: str
+    # Number of converted items: 1, or the length of a `many=True` batch.
+    items: int
+    seconds: float
+    # Serialized size of the `to_bytes()` payload, or of the `.protobuf` messages while a
+    # hook registered with `output_bytes=True` is present; 0 otherwise.
+    output_bytes: int = 0
+    # Failed validations per field name, for `is_valid()`.
+    failures: Optional[Dict[str, int]] = None
+
+
+Hook = Callable[[Observation], Any]
+# Creates an `Observation` from a tuple of its values, without the keyword handling of
+# `Observation.__new__`, as `flush()` does it once per conversion.
+new_observation = tuple.__new__
+_series = itemgetter(0, 1)
+_items = itemgetter(2)
+_seconds = itemgetter(3)
+_output_bytes = itemgetter(4)
+_failures = itemgetter(5)
+
+# Registered hooks; serializers skip metrics entirely while it is empty.
+hooks: List[Hook] = []
+# Hooks registered with `output_bytes=True`; `.protobuf` only measures its messages while
+# it is not empty.
+sized_hooks: List[Hook] = []
+_hooks_lock = threading.Lock()
+
+# Conversions not yet passed to the hooks, as tuples of `Observation` values. Serializers
+# append to it and call `flush()` once it holds `BATCH_SIZE` of them.
+pending: List[tuple] = []
+BATCH_SIZE = 1024
+_flush_lock = threading.Lock()
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ITEMS_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def add_hook(hook: Hook, output_bytes: bool = False) -> None:
+    """
+    Registers a hook called with an `Observation` after each conversion.
+
+    :param output_bytes: Measure the serialized size of the `.protobuf` messages, which
+        costs a `ByteSize()` walk of each result.
+    """
+    # The queued conversions happened before the hook was registered.
+    flush()
+    with _hooks_lock:
+        hooks.append(hook)
+        if output_bytes:
+            sized_hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """
+    :raises ValueError: If the hook is not registered.
+    """
+    # The hook still gets the conversions made while it was registered.
+    flush()
+    with _hooks_lock:
+        hooks.remove(hook)
+        if hook in sized_hooks:
+            sized_hooks.remove(hook)
+
+
+def flush() -> None:
+    """
+    Passes the queued observations to the hooks.
+    """
+    with _flush_lock:
+        # Serializers only append, so the first `size` items are these even while they do.
+        size = len(pending)
+        records = pending[:size]
+        del pending[:size]
+    if not records:
+        return
+    observations = None
+    for hook in tuple(hooks):
+        observe_many = getattr(hook, 'observe_many', None)
+        if observe_many is not None:
+            observe_many(records)
+            continue
+        if observations is None:
+            observations = list(map(new_observation, repeat(Observation), records))
+        for observation in observations:
+            hook(observation)
+
+
+def count_failures(errors: Any) -> Dict[str, int]:
+    """
+    Counts the failed fields of `.errors`: a dict of fields, or a list (or `SparseErrors`)
+    of them for `many=True`.
+    """
+    failures: Dict[str, int] = {}
+    if isinstance(errors, SparseErrors):
+        errors = list(errors.values())
+    for item in errors if isinstance(errors, list) else [errors]:
+        if isinstance(item, dict):
+            for field in item:
+                failures[field] = failures.get(field, 0) + 1
+    return failures
+
+
+class Histogram:
+    """
+    Cumulative histogram in the Prometheus style: counts of observations less than or
+    equal to each bucket bound, plus their sum and count.
+    """
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.bounds = tuple(sorted(buckets))
+        # One count per bound, plus the observations above the last bound.
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """
+        Returns (bound, observations <= bound) pairs, ending with (inf, count).
+        """
+        pairs = []
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+def _add_sorted(histogram: Histogram, values: List[float]) -> None:
+    """
+    Adds sorted values to a histogram.
+    """
+    below = 0
+    counts = histogram.counts
+    for index, bound in enumerate(histogram.bounds):
+        # Values <= bound, as `Histogram.observe()` counts a value in the first bound >= it.
+        upto = bisect.bisect_right(values, bound, below)
+        counts[index] += upto - below
+        below = upto
+    counts[-1] += len(values) - below
+    histogram.sum += sum(values)
+    histogram.count += len(values)
+
+
+class InMemoryMetrics:
+    """
+    Hook aggregating observations in memory, for `to_prometheus()` or `snapshot()`.
+
+    Calls only queue the observation; they are aggregated into `series`, `failures` and
+    `output_bytes` by `flush()`, which readers call, and every `buffer_size` observations.
+    Batches from `protolizer.metrics.flush()` are aggregated at once.
+    """
+
+    def __init__(
+        self,
+        latency_buckets: Iterable[float] = LATENCY_BUCKETS,
+        items_buckets: Iterable[float] = ITEMS_BUCKETS,
+        buffer_size: int = 1024,
+    ) -> None:
+        self.latency_buckets = tuple(sorted(latency_buckets))
+        self.items_buckets = tuple(sorted(items_buckets))
+        self.buffer_size = buffer_size
+        # {(serializer, operation): (latency, items)}
+        self.series: Dict[Tuple[str, str], Tuple[Histogram, Histogram]] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+        self.output_bytes: Dict[str, int] = {}
+        # Appending to and popping from a deque are thread-safe, so calls take no lock.
+        self._pending: Deque[Observation] = deque()
+        self._lock = threading.Lock()
+
+    def __call__(self, observation: Observation) -> None:
+        pending = self._pending
+        pending.append(observation)
+        if len(pending) >= self.buffer_size:
+            self.flush()
+
+    def observe_many(self, observations: List[tuple]) -> None:
+        with self._lock:
+            self._aggregate(observations)
+
+    def flush(self) -> None:
+        """
+        Aggregates the queued observations, including those not yet passed to the hooks.
+        """
+        flush()
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        pending = self._pending
+        popleft = pending.popleft
+        # Only the flushing thread pops, so these many items are there even while hooks append.
+        self._aggregate([popleft() for _ in range(len(pending))])
+
+    def _aggregate(self, observations: List[tuple]) -> None:
+        keys = set(map(_series, observations))
+        if len(keys) == 1:
+            groups = [(keys.pop(), observations)]
+        else:
+            groups = [(key, list(group)) for key, group in groupby(sorted(observations, key=_series), _series)]
+        # Each series is updated with C-level iteration over its observations (sorting and
+        # summing), then one bisection per bucket bound.
+        for key, group in groups:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = (Histogram(self.latency_buckets), Histogram(self.items_buckets))
+            latency, batch = series
+            _add_sorted(latency, sorted(map(_seconds, group)))
+            _add_sorted(batch, sorted(map(_items, group)))
+            serializer = key[0]
+            output_bytes = sum(map(_output_bytes, group))
+            if output_bytes:
+                self.output_bytes[serializer] = self.output_bytes.get(serializer, 0) + output_bytes
+            for failures in filter(None, map(_failures, group)):
+                for field, count in failures.items():
+                    self.failures[(serializer, field)] = self.failures.get((serializer, field), 0) + count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Returns the aggregated metrics as plain dicts, keyed by serializer name.
+        """
+        flush()
+        with self._lock:
+            self._flush()
+            result: Dict[str, Any] = {}
+            for (serializer, operation), (latency, batch) in self.series.items():
+                result.setdefault(serializer, {}).setdefault('operations', {})[operation] = {
+                    'conversions': latency.count,
+                    'items': batch.sum,
+                    'seconds': latency.sum,
+                }
+            for (serializer, field), count in self.failures.items():
+                result.setdefault(serializer, {}).setdefault('failures', {})[field] = count
+            for serializer, size in self.output_bytes.items():
+                result.setdefault(serializer, {})['output_bytes'] = size
+            return result
+
+    def clear(self) -> None:
+        flush()
+        with self._lock:
+            self._pending.clear()
+            self.series.clear()
+            self.failures.clear()
+            self.output_bytes.clear()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    return '{' + ','.join('{}="{}"'.format(name, _escape(str(value))) for name, value in labels.items()) + '}'
+
+
+def _bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(float(bound))
+
+
+def to_prometheus(metrics: InMemoryMetrics, prefix: str = 'protolizer') -> str:
+    """
+    Returns the metrics in the Prometheus text exposition format.
+    """
+    lines: List[str] = []
+
+    def header(name: str, kind: str, text: str) -> None:
+        lines.append('# HELP {}_{} {}'.format(prefix, name, text))
+        lines.append('# TYPE {}_{} {}'.format(prefix, name, kind))
+
+    def histograms(name: str, values: List[Tuple[Tuple[str, str], Histogram]]) -> None:
+        for (serializer, operation), histogram in values:
+            for bound, count in histogram.cumulative():
+                lines.append('{}_{}_bucket{} {}'.format(
+                    prefix, name, _labels(serializer=serializer, operation=operation, le=_bound(bound)), count
+                ))
+            labels = _labels(serializer=serializer, operation=operation)
+            lines.append('{}_{}_sum{} {!r}'.format(prefix, name, labels, float(histogram.sum)))
+            lines.append('{}_{}_count{} {}'.format(prefix, name, labels, histogram.count))
+
+    flush()
+    with metrics._lock:
+        metrics._flush()
+        series = sorted(metrics.series.items())
+        header('conversions_total', 'counter', 'Conversions per serializer and operation.')
+        for (serializer, operation), (latency, _) in series:
+            lines.append('{}_conversions_total{} {}'.format(
+                prefix, _labels(serializer=serializer, operation=operation), latency.count
+            ))
+        header('conversion_seconds', 'histogram', 'Duration of conversions.')
+        histograms('conversion_seconds', [(key, latency) for key, (latency, _) in series])
+        header('conversion_items', 'histogram', 'Items per conversion (batch size of many=True serializers).')
+        histograms('conversion_items', [(key, batch) for key, (_, batch) in series])
+        header('validation_failures_total', 'counter', 'Failed validations per serializer and field.')
+        for (serializer, field), count in sorted(metrics.failures.items()):
+            lines.append('{}_validation_failures_total{} {}'.format(
+                prefix, _labels(serializer=serializer, field=field), count
+            ))
+        if metrics.output_bytes:
+            header('output_bytes_total', 'counter', 'Serialized size of the protobuf messages produced.')
+        for serializer, size in sorted(metrics.output_bytes.items()):
+            lines.append('{}_output_bytes_total{} {}'.format(prefix, _labels(serializer=serializer), size))
+    return '\n'.join(lines) + '\n'
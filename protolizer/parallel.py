@@ -0,0 +1,227 @@
+"""
+Conversion of large `many=True` workloads in worker processes.
+
+The input is split into chunks, and each chunk is converted by a worker with its own
+instance of the serializer class, which is shipped as an importable reference. Workers
+send their messages back as one blob of size-prefixed records, so no dicts are pickled
+on the way back, and the results are returned in input order.
+
+Only conversions to protobuf messages are offloaded: `.data`, `.validated_data` and
+`is_valid()` of a `ListSerializer` with `workers=` run in-process, as returning their
+dicts from the workers would cost about as much as building them.
+"""
+import asyncio
+import contextvars
+import functools
+import importlib
+import io
+import math
+import os
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+
+from google.protobuf.message import Message
+
+from protolizer.aio import gather
+from protolizer.decoder import decode_message
+from protolizer.exceptions import ValidationError
+from protolizer.helpers import SparseErrors
+from protolizer.stream import DelimitedReader, DelimitedWriter, get_schema
+
+__all__ = [
+    'SerializerSpec',
+    'convert',
+    'convert_async',
+]
+
+# What the items passed to `convert()` are.
+MODE_INSTANCE = 'instance'
+MODE_DATA = 'data'
+MODE_VALIDATED = 'validated'
+MODES = (MODE_INSTANCE, MODE_DATA, MODE_VALIDATED)
+
+# Chunks per worker, when `chunk_size` is not given.
+CHUNKS_PER_WORKER = 4
+
+
+class SerializerSpec(NamedTuple):
+    """
+    Picklable description of a serializer class: where to import it from,
+    and the keyword arguments to instantiate it with.
+    """
+    module: str
+    qualname: str
+    kwargs: Dict[str, Any]
+
+    @classmethod
+    def from_class(cls, serializer_class: Type[Any], **kwargs: Any) -> 'SerializerSpec':
+        spec = cls(serializer_class.__module__, serializer_class.__qualname__, kwargs)
+        try:
+            resolved = spec.resolve()
+        except (ImportError, AttributeError):
+            resolved = None
+        if resolved is not serializer_class:
+            raise ValueError(
+                '{!r} serializer cannot be used in worker processes. '
+                'It must be importable, i.e. defined at the top level of a module.'.format(serializer_class.__name__)
+            )
+        return spec
+
+    def resolve(self) -> Type[Any]:
+        """
+        Imports the serializer class.
+        """
+        obj = importlib.import_module(self.module)
+        for name in self.qualname.split('.'):
+            obj = getattr(obj, name)
+        return obj
+
+
+def _convert_chunk(spec: SerializerSpec, mode: str, chunk: List[Any]) -> Tuple[bytes, Optional[List[Any]]]:
+    """
+    Converts a chunk in a worker.
+
+    :return: (size-prefixed messages, None) or (b'', per-item errors of the chunk, as a list
+        or as `SparseErrors` when the serializer has `sparse_errors`).
+    """
+    serializer_class = spec.resolve()
+    if mode == MODE_DATA:
+        serializer = serializer_class(data=chunk, many=True, **spec.kwargs)
+        if not serializer.is_valid():
+            return b'', _chunk_errors(serializer.errors)
+        items = serializer.validated_data
+    else:
+        serializer = serializer_class(many=True, **spec.kwargs)
+        items = chunk
+        if mode == MODE_INSTANCE:
+            items = [decode_message(item) if isinstance(item, Message) else item for item in chunk]
+            try:
+                items = serializer.to_internal_value(items)
+            except ValidationError as exc:
+                return b'', _chunk_errors(exc.detail)
+
+    data = serializer.child.pre_serialize(serializer.to_representation(items))
+    stream = io.BytesIO()
+    with DelimitedWriter(stream, serializer_class) as writer:
+        for item in data:
+            writer.write_message(serializer.to_protobuf(item))
+    return stream.getvalue(), None
+
+
+def _chunk_errors(errors: Any) -> Any:
+    return errors if isinstance(errors, SparseErrors) else list(errors)
+
+
+def _split(
+    serializer_class: Type[Any],
+    items: Iterable[Any],
+    workers: int,
+    chunk_size: Optional[int],
+    mode: str,
+    kwargs: Dict[str, Any],
+) -> Tuple[SerializerSpec, List[List[Any]]]:
+    if mode not in MODES:
+        raise ValueError('`mode` must be one of: {}'.format(', '.join(MODES)))
+    spec = SerializerSpec.from_class(serializer_class, **kwargs)
+    get_schema(serializer_class)
+    if not isinstance(items, Sequence):
+        items = list(items)
+    if chunk_size is None:
+        chunk_size = max(1, math.ceil(len(items) / (workers * CHUNKS_PER_WORKER)))
+    if chunk_size < 1:
+        raise ValueError('`chunk_size` must be a positive integer.')
+    return spec, [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+
+def _merge(
+    serializer_class: Type[Any],
+    chunks: List[List[Any]],
+    results: List[Tuple[bytes, Optional[Any]]],
+) -> List[Message]:
+    failed = [errors for _, errors in results if errors is not None]
+    if failed:
+        sparse = isinstance(failed[0], SparseErrors)
+        merged: Any = SparseErrors(size=sum(len(chunk) for chunk in chunks)) if sparse else []
+        offset = 0
+        for chunk, (_, errors) in zip(chunks, results):
+            if sparse:
+                merged.update((offset + index, detail) for index, detail in (errors or {}).items())
+            else:
+                merged.extend(errors if errors is not None else [{}] * len(chunk))
+            offset += len(chunk)
+        raise ValidationError(merged)
+
+    messages: List[Message] = []
+    for blob, _ in results:
+        messages.extend(DelimitedReader(io.BytesIO(blob), serializer_class))
+    return messages
+
+
+def convert(
+    serializer_class: Type[Any],
+    items: Iterable[Any],
+    workers: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    mode: str = MODE_INSTANCE,
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> List[Message]:
+    """
+    Converts items to protobuf messages in worker processes,
+    like `serializer_class(items, many=True).protobuf`.
+
+    The child's `pre_serialize` hook receives each chunk (a list) separately.
+
+    :param serializer_class: Serializer class, defined at the top level of a module.
+    :param items: Items to convert; generators are consumed first.
+    :param workers: Number of worker processes (default: CPU count).
+    :param chunk_size: Number of items sent to a worker at once
+        (default: the items spread over 4 chunks per worker).
+    :param mode: What the items are: 'instance' (default) for instances, like
+        `serializer_class(items, many=True)`, 'data' for input data to validate first,
+        like `serializer_class(data=items, many=True)`, or 'validated' for the
+        `validated_data` of such a serializer.
+    :param executor: Executor to use instead of a new `ProcessPoolExecutor`.
+    :param kwargs: Extra keyword arguments for the serializer (e.g. context); must be picklable.
+    :return: The messages, in input order.
+    :raises ValidationError: With the per-item errors of the whole input,
+        at their original indexes, like `ListSerializer` (as `SparseErrors` when the
+        serializer has `sparse_errors`).
+    """
+    workers = workers or os.cpu_count() or 1
+    spec, chunks = _split(serializer_class, items, workers, chunk_size, mode, kwargs)
+    if not chunks:
+        return []
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+    try:
+        results = list(executor.map(functools.partial(_convert_chunk, spec, mode), chunks))
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return _merge(serializer_class, chunks, results)
+
+
+async def convert_async(
+    serializer_class: Type[Any],
+    items: Iterable[Any],
+    executor: Executor,
+    chunk_size: Optional[int] = None,
+    mode: str = MODE_INSTANCE,
+    **kwargs: Any,
+) -> List[Message]:
+    """
+    Awaitable version of `convert()`, for event loops. The chunks are submitted to
+    `executor` and the returned messages are parsed in the loop's default executor,
+    so the loop itself is only busy splitting the items.
+    """
+    spec, chunks = _split(serializer_class, items, os.cpu_count() or 1, chunk_size, mode, kwargs)
+    loop = asyncio.get_running_loop()
+    convert_chunk = functools.partial(_convert_chunk, spec, mode)
+    # A failed chunk cancels the chunks that have not started yet.
+    results = await gather(loop.run_in_executor(executor, convert_chunk, chunk) for chunk in chunks)
+    # Worker processes start from a fresh context, but the merge runs in the caller's.
+    return await loop.run_in_executor(None, contextvars.copy_context().run, _merge, serializer_class, chunks, results)
@@ -0,0 +1,122 @@
+"""
+Pools of ready-to-use serializer instances, for hot request paths.
+
+Creating a serializer binds its fields (for serializers that override `get_fields()`)
+and sets up its state on every request. A `SerializerPool` keeps idle instances and
+hands them out again after a `reset()`, which only clears the state of the previous use.
+"""
+import contextlib
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, Optional, Type
+
+from protolizer.fields import Empty
+
+__all__ = [
+    'SerializerPool',
+]
+
+
+class SerializerPool:
+    """
+    Thread-safe pool of instances of one serializer class.
+
+        pool = SerializerPool(AccountSerializer, max_size=64)
+
+        with pool.borrow(account, context={'is_public': True}) as serializer:
+            message = serializer.protobuf
+
+    Fields are bound once per instance, so serializers whose `get_fields()` depends on
+    the instance or the context should not be pooled.
+
+    :param serializer_class: Serializer class of the pooled instances.
+    :param max_size: Maximum number of idle instances kept; extra released instances are dropped.
+    :param prefill: Number of instances created up front.
+    :param kwargs: Keyword arguments for new instances (e.g. `many=True`), except
+        `instance`, `data` and `context`, which are given to `acquire()`.
+    """
+
+    def __init__(
+        self,
+        serializer_class: Type[Any],
+        max_size: int = 32,
+        prefill: int = 0,
+        **kwargs: Any,
+    ) -> None:
+        if max_size < 0 or prefill < 0:
+            raise ValueError('`max_size` and `prefill` must not be negative.')
+        self.serializer_class = serializer_class
+        self.max_size = max_size
+        self.kwargs = kwargs
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        for _ in range(min(prefill, max_size)):
+            self._idle.append(self._create())
+
+    def _create(self) -> Any:
+        serializer = self.serializer_class(**self.kwargs)
+        target = getattr(serializer, 'child', serializer)
+        if getattr(target, '_dynamic_fields', False):
+            # Bound once here instead of on the first use.
+            target.fields  # noqa
+        return serializer
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """
+        Counters of the pool: hits, misses, discarded instances and idle instances.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'discarded': self.discarded, 'idle': len(self._idle)}
+
+    def acquire(self, instance: Any = None, data: Any = Empty, context: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Returns an idle instance, or a new one when the pool is empty, reset with these arguments.
+        """
+        with self._lock:
+            if self._idle:
+                serializer = self._idle.pop()
+                self.hits += 1
+            else:
+                serializer = None
+                self.misses += 1
+        if serializer is None:
+            serializer = self._create()
+        serializer.reset(instance=instance, data=data, context=context)
+        return serializer
+
+    def release(self, serializer: Any) -> None:
+        """
+        Returns an instance to the pool. It must not be used afterwards.
+        """
+        if not isinstance(getattr(serializer, 'child', serializer), self.serializer_class):
+            raise ValueError('{!r} does not belong to this pool.'.format(serializer))
+        # Drop references to the payload and results of the last use.
+        serializer.reset()
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(serializer)
+            else:
+                self.discarded += 1
+
+    @contextlib.contextmanager
+    def borrow(
+        self,
+        instance: Any = None,
+        data: Any = Empty,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Any]:
+        """
+        Context manager version of `acquire()`, releasing the instance on exit.
+        """
+        serializer = self.acquire(instance=instance, data=data, context=context)
+        try:
+            yield serializer
+        finally:
+            self.release(serializer)
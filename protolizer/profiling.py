@@ -0,0 +1,172 @@
+"""
+Per-field profiling of serializers.
+
+    with protolizer.profile() as p:
+        AccountSerializer(accounts, many=True).protobuf
+    p.print_report()
+
+While a profile is active (in the current thread or task), serializers run timed copies
+of their execution plans, recording call counts and cumulative time per serializer class,
+field and phase: `get_value` (or the `get_custom_<name>` getter), `run_validation`,
+`validate_<name>`, `get_attribute`, `to_representation`, plus `pre_serialize` and
+`to_protobuf` per serializer. Times are cumulative: a nested serializer's fields are
+included in the parent's `run_validation`/`to_representation` of that field.
+
+Compiled serializers (`Meta.compile = True`) run their generic plan while profiled.
+When no profile is active, the only cost is one context variable lookup per call.
+"""
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+__all__ = [
+    'Profile',
+    'profile',
+]
+
+active_profile: ContextVar = ContextVar('protolizer_profile', default=None)
+
+# (serializer, field, phase); serializer-level phases have an empty field name.
+Key = Tuple[str, str, str]
+
+# Timed copies of class-level plans kept per profile, e.g. one per serializer class and field mask.
+PLAN_CACHE_SIZE = 1024
+
+
+class _TimedHook:
+    """
+    Stands in for a `validate_<name>` hook of a plan, which is bound with `__get__`.
+    """
+
+    def __init__(self, hook: Any, record: Callable[[float], None]) -> None:
+        self.hook = hook
+        self.record = record
+
+    def __get__(self, instance: Any, owner: Any) -> Callable[[Any], Any]:
+        bound = self.hook.__get__(instance, owner)
+
+        def run(value: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return bound(value)
+            finally:
+                self.record(time.perf_counter() - start)
+        return run
+
+
+class Profile:
+    """
+    Call counts and cumulative times of serializer phases. Use it as a context manager,
+    usually through `protolizer.profile()`.
+    """
+
+    def __init__(self) -> None:
+        self.stats: Dict[Key, List[float]] = {}
+        self._plans: Dict[Any, Tuple[Any, Any]] = {}
+        self._token = None
+
+    def __enter__(self) -> 'Profile':
+        self._token = active_profile.set(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        active_profile.reset(self._token)
+        self._token = None
+
+    def recorder(self, key: Key) -> Callable[[float], None]:
+        """
+        Returns a function adding one call of `elapsed` seconds to `key`.
+        """
+        stat = self.stats.setdefault(key, [0, 0.0])
+
+        def record(elapsed: float) -> None:
+            stat[0] += 1
+            stat[1] += elapsed
+        return record
+
+    def timed(self, func: Callable[..., Any], key: Key) -> Callable[..., Any]:
+        record = self.recorder(key)
+
+        def run(*args: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                record(time.perf_counter() - start)
+        return run
+
+    def call(self, key: Key, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Calls `func(*args)` and records its time under `key`.
+        """
+        return self.timed(func, key)(*args)
+
+    def wrap_plan(self, serializer_class: type, plan: Tuple[Any, ...], key: Any = None) -> Tuple[Any, ...]:
+        """
+        Returns a copy of an execution plan whose callables record their time.
+
+        :param key: Identifies a plan shared by the instances of a class, e.g. the class and
+            its field mask; up to `PLAN_CACHE_SIZE` of their copies are kept. Plans built for
+            one instance are copied on every call, and never kept.
+        """
+        if key is not None:
+            cached = self._plans.get(key)
+            if cached is not None and cached[0] is plan:
+                return cached[1]
+
+        name = serializer_class.__qualname__
+        wrapped = []
+        for entry in plan:
+            changes: Dict[str, Any] = {}
+            for phase in ('run_validation', 'get_attribute', 'to_representation'):
+                changes[phase] = self.timed(getattr(entry, phase), (name, entry.name, phase))
+            if entry.get_value is not None:
+                phase = 'get_custom_' + entry.name if entry.field.custom else 'get_value'
+                changes['get_value'] = self.timed(entry.get_value, (name, entry.name, phase))
+            if entry.validator is not None:
+                changes['validator'] = _TimedHook(entry.validator, self.recorder((name, entry.name, 'validate_' + entry.name)))
+            wrapped.append(entry._replace(**changes))
+
+        result = tuple(wrapped)
+        if key is not None and (key in self._plans or len(self._plans) < PLAN_CACHE_SIZE):
+            self._plans[key] = (plan, result)
+        return result
+
+    def as_dict(self) -> Dict[str, Dict[str, Dict[str, Dict[str, float]]]]:
+        """
+        Returns {serializer: {field: {phase: {'calls': n, 'time': seconds}}}};
+        serializer-level phases are under the '' field.
+        """
+        result: Dict[str, Dict[str, Dict[str, Dict[str, float]]]] = {}
+        for (serializer, field, phase), (calls, total) in self.stats.items():
+            if calls:
+                result.setdefault(serializer, {}).setdefault(field, {})[phase] = {'calls': calls, 'time': total}
+        return result
+
+    def report(self, sort: str = 'time', limit: Optional[int] = None) -> List[Tuple[str, str, str, int, float]]:
+        """
+        Returns (serializer, field, phase, calls, seconds) rows, sorted by 'time' or 'calls'.
+        """
+        if sort not in ('time', 'calls'):
+            raise ValueError("`sort` must be 'time' or 'calls'.")
+        rows = [key + (int(calls), total) for key, (calls, total) in self.stats.items() if calls]
+        rows.sort(key=lambda row: row[4] if sort == 'time' else row[3], reverse=True)
+        return rows[:limit] if limit is not None else rows
+
+    def print_report(self, sort: str = 'time', limit: Optional[int] = None, file: Optional[TextIO] = None) -> None:
+        file = file or sys.stdout
+        print('{:<30} {:<20} {:<24} {:>10} {:>12} {:>12}'.format(
+            'serializer', 'field', 'phase', 'calls', 'total ms', 'per call us'
+        ), file=file)
+        for serializer, field, phase, calls, total in self.report(sort, limit):
+            print('{:<30} {:<20} {:<24} {:>10} {:>12.3f} {:>12.3f}'.format(
+                serializer, field, phase, calls, total * 1e3, total / calls * 1e6
+            ), file=file)
+
+
+def profile() -> Profile:
+    """
+    Returns a new `Profile`, to use as a context manager: `with protolizer.profile() as p:`.
+    """
+    return Profile()
@@ -1,17 +1,46 @@
+import asyncio
+import contextvars
 import copy
+import inspect
+import itertools
+import time
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
 from functools import cached_property
-from typing import Any, Dict, List, Optional, Type, TypeVar, Union
+from typing import Any, Awaitable, Dict, Iterable, Iterator, List, Optional, Tuple, Type, TypeVar, Union
 
 from google.protobuf.json_format import ParseDict, MessageToDict  # noqa
 from google.protobuf.message import Message  # noqa
 
+from protolizer.aio import Limiter, LoopMonitor, capture, discard, gather, get_concurrency
+from protolizer.cache import message_key, thaw
+from protolizer.columnar import column_owner, columns_to_rows, validate_columns
+from protolizer.decoder import decode_message
+from protolizer.encoder import encode_message
 from protolizer.exceptions import ValidationError
-from protolizer.fields import BaseField, Empty, set_value
-from protolizer.helpers import BindingDict, ReturnList, ReturnDict, NestedBoundField, BoundField
-from protolizer.meta import SerializerMetaclass
+from protolizer.failfast import call_budget, collected_error, get_budget
+from protolizer.fields import BaseField, Empty, call_context, enter_call, getter_input, leave_call, set_value
+from protolizer.helpers import BindingDict, ReturnList, ReturnDict, NestedBoundField, BoundField, SparseErrors
+from protolizer.inputs import as_input
+from protolizer.lazy import WIRE_TYPES, WireInput, read_wire, split_delimited
+from protolizer.masks import MASK_CACHE_SIZE, call_mask, get_paths, mask_plan
+from protolizer.meta import FieldPlan, SerializerMetaclass, build_plan
+from protolizer.metrics import BATCH_SIZE, count_failures, flush, hooks, pending, sized_hooks
+from protolizer.parallel import MODE_INSTANCE, MODE_VALIDATED, convert, convert_async
+from protolizer.profiling import active_profile
+from protolizer.stream import get_schema
+from protolizer.wire import encode_varint
+from protolizer.writer import write_message
 
 _M = TypeVar("_M", bound=Message)
 
+# Keyword arguments only understood by `ListSerializer`, not passed to the child.
+LIST_SERIALIZER_KWARGS = (
+    'columnar',
+    'sparse_errors',
+    'workers',
+)
+
 
 def to_protobuf(data: Dict[str, Any], schema: Type[_M]) -> _M:
     """
@@ -21,7 +50,7 @@ def to_protobuf(data: Dict[str, Any], schema: Type[_M]) -> _M:
     :return: Protobuf message instance.
     """
     protobuf = schema() if callable(schema) else schema
-    return ParseDict(data, protobuf)
+    return write_message(data, protobuf)
 
 
 def proto_to_dict(data: Message) -> Dict[str, Any]:
@@ -29,10 +58,33 @@ def proto_to_dict(data: Message) -> Dict[str, Any]:
     return MessageToDict(data, preserving_proto_field_name=True)
 
 
+def decode_messages(value: Any) -> Any:
+    """
+    Converts a protobuf message, or the messages of a list, to dicts.
+    """
+    if isinstance(value, Message):
+        return decode_message(value)
+    if isinstance(value, list) and any(isinstance(item, Message) for item in value):
+        return [decode_message(item) if isinstance(item, Message) else item for item in value]
+    return value
+
+
+def iter_chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """
+    Yield lists of up to `size` items, consuming the iterable lazily.
+    """
+    if size < 1:
+        raise ValueError('`chunk_size` must be a positive integer.')
+    iterator = iter(items)
+    chunks = (list(itertools.islice(iterator, size)) for _ in itertools.repeat(None))
+    return itertools.takewhile(bool, chunks)
+
+
 class BaseSerializer(BaseField):
     """
     Base class for all serializers.
     """
+    _converting_protobuf = False
 
     def __init__(
         self,
@@ -40,27 +92,20 @@ class BaseSerializer(BaseField):
         data: Any = Empty,
         **kwargs: Any,
     ) -> None:
-        self.instance = instance
-
-        if isinstance(self.instance, Message):
-            self.instance = proto_to_dict(self.instance)
-        elif isinstance(self.instance, list) and any(isinstance(item, Message) for item in self.instance):
-            self.instance = [proto_to_dict(item) for item in self.instance]
-
-        if data is not Empty:
-            if isinstance(data, list) and any(isinstance(item, Message) for item in data):
-                self.initial_data = [proto_to_dict(item) for item in data]
-            elif isinstance(data, list) and not any(isinstance(item, Message) for item in data):
-                self.initial_data = data
-            elif isinstance(data, Message):
-                self.initial_data = proto_to_dict(data)
-            else:
-                self.initial_data = data
-
         self.partial = kwargs.pop("partial", False)
+        # Field mask: a `FieldMask` or a list of dotted paths (see `protolizer.masks`).
+        self._field_mask = get_paths(kwargs.pop('fields', None))
+        if self._field_mask is not None:
+            # Masked serializers run the generic plan, which the mask modifies.
+            self._compiled = None
         kwargs.pop("many", None)
         super().__init__(**kwargs)
 
+        self.instance = self._load_instance(instance)
+
+        if data is not Empty:
+            self.initial_data = decode_messages(data)
+
     def __new__(cls, *args, **kwargs):
         if kwargs.pop("many", False):
             return cls.many_init(*args, **kwargs)
@@ -74,7 +119,12 @@ class BaseSerializer(BaseField):
 
     @classmethod
     def many_init(cls, *args: Any, **kwargs: Any) -> "ListSerializer":
-        child_serializer = cls(*args, **kwargs)
+        # The child never reads its own instance or data,
+        # so it is created without them to avoid converting the payload twice.
+        child_serializer = cls(**{
+            key: value for key, value in kwargs.items()
+            if key != 'data' and key not in LIST_SERIALIZER_KWARGS
+        })
         list_kwargs = {
             'child': child_serializer
         }
@@ -85,6 +135,68 @@ class BaseSerializer(BaseField):
         list_serializer_class = getattr(meta, 'list_serializer_class', ListSerializer)
         return list_serializer_class(*args, **list_kwargs)
 
+    def reset(
+        self,
+        instance: Optional[Union[Message, Dict[str, Any], List[Any]]] = None,
+        data: Any = Empty,
+        context: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Prepares the serializer for another conversion, as if it was created with these
+        arguments. Cached results are cleared; bound fields are kept.
+        """
+        for name in ('_data', '_validated_data', '_errors', '_protobuf', '_validated_columns', 'initial_data'):
+            self.__dict__.pop(name, None)
+        self.context = {} if context is None else context
+        self.instance = self._load_instance(instance)
+        if data is not Empty:
+            self.initial_data = decode_messages(data)
+
+    def _load_instance(self, instance: Any) -> Any:
+        """
+        Decodes protobuf messages given as instance. With `Meta.cache` (see `protolizer.cache`),
+        a message converted before is not decoded: its cached `.data` is used instead.
+        """
+        self._cache_key = self._cache_entry = None
+        cache = getattr(self.meta, 'cache', None)
+        if cache is not None and isinstance(instance, Message):
+            key, size = message_key(instance, self.context, self._field_mask)
+            if key is not None:
+                self._cache_key = (type(self), key, size)
+                self._cache_entry = cache.get(self._cache_key)
+                if self._cache_entry is not None:
+                    self._data = self._cache_entry.data
+                    return instance
+        return decode_messages(instance)
+
+    def _remember(self, data: Any) -> Any:
+        """
+        Caches the data converted from a message instance, and returns the frozen copy.
+        """
+        if self._cache_key is None:
+            return data
+        self._cache_entry = self.meta.cache.put(self._cache_key, data, self._cache_key[2])
+        return self._cache_entry.data
+
+    def get_field_mask(self) -> Optional[frozenset]:
+        """
+        Returns the paths requested from this serializer, or `None` for all fields.
+        Nested serializers get theirs from the field mask of the call in progress.
+        """
+        if self.field_name is not None:
+            paths = call_mask.get()
+            if paths is not Empty:
+                return paths
+        return self._field_mask
+
+    def get_context(self) -> Any:
+        """
+        Returns the context passed down to the fields of this serializer.
+        """
+        if self.context == 'self' and isinstance(getattr(self.parent, 'context', None), dict):
+            return self.parent.context
+        return self.context
+
     def to_internal_value(self, data: Any) -> Any:
         raise NotImplementedError('.to_internal_value() must be implemented.')
 
@@ -94,6 +206,9 @@ class BaseSerializer(BaseField):
     def to_protobuf(self, data: Any) -> Any:
         raise NotImplementedError('.to_protobuf() must be implemented.')
 
+    def encode(self, data: Any) -> bytes:
+        raise NotImplementedError('.encode() must be implemented.')
+
     def pre_serialize(self, data: Any) -> Any:
         """
         Hook for pre serialization.
@@ -101,11 +216,22 @@ class BaseSerializer(BaseField):
         """
         return data
 
-    def is_valid(self, raise_exception: bool = False) -> bool:
+    def is_valid(
+        self,
+        raise_exception: bool = False,
+        fail_fast: Optional[bool] = None,
+        max_errors: Optional[int] = None,
+    ) -> bool:
         """
         Validates the data.
+
+        :param fail_fast: Stop at the first error (default: `Meta.fail_fast`).
+        :param max_errors: Stop at this number of errors (default: `Meta.max_errors`).
+            See `protolizer.failfast`.
         """
         if not hasattr(self, '_validated_data'):
+            start = time.perf_counter() if hooks else None
+            token = call_budget.set(get_budget(self, fail_fast, max_errors))
             try:
                 self._validated_data = self.to_internal_value(self.initial_data)
             except ValidationError as exc:
@@ -113,12 +239,108 @@ class BaseSerializer(BaseField):
                 self._errors = exc.detail
             else:
                 self._errors = {}
+            finally:
+                call_budget.reset(token)
+            if start is not None:
+                self._observe('is_valid', start, self.initial_data)
+
+        if self._errors and raise_exception:
+            raise ValidationError(self._errors)
+
+        return not bool(self._errors)
+
+    async def ato_internal_value(self, data: Any, limiter: Limiter) -> Any:
+        """
+        Async version of `to_internal_value()`, awaiting coroutine hooks through `limiter`.
+        """
+        return self.to_internal_value(data)
+
+    async def arun_validation(self, data: Any = Empty, limiter: Optional[Limiter] = None) -> Any:
+        """
+        Async version of `run_validation()`.
+        """
+        (is_empty_value, data) = self.validate_empty_values(data)
+        if is_empty_value:
+            return data
+        return await self.ato_internal_value(data, limiter or Limiter())
+
+    async def ais_valid(self, raise_exception: bool = False, concurrency: Optional[int] = None) -> bool:
+        """
+        Async version of `is_valid()`. Coroutine `validate_<name>` hooks and
+        `get_custom_<name>` getters are awaited concurrently.
+
+        :param concurrency: Maximum number of hooks awaited at once
+            (default: `Meta.async_concurrency`, or no limit).
+        """
+        if not hasattr(self, '_validated_data'):
+            limiter = Limiter(concurrency or get_concurrency(self))
+            try:
+                self._validated_data = await self.ato_internal_value(self.initial_data, limiter)
+            except ValidationError as exc:
+                self._validated_data = {}
+                self._errors = exc.detail
+            else:
+                self._errors = {}
 
         if self._errors and raise_exception:
             raise ValidationError(self._errors)
 
         return not bool(self._errors)
 
+    @property
+    def adata(self) -> Awaitable[Any]:
+        """
+        Async version of `.data`: `data = await serializer.adata`.
+        """
+        return self._adata()
+
+    async def _adata(self) -> Any:
+        if hasattr(self, 'initial_data') and not hasattr(self, '_validated_data'):
+            return self.data  # raises the usual error
+        if not hasattr(self, '_data') and self.instance is not None and not getattr(self, '_errors', None):
+            limiter = Limiter(get_concurrency(self))
+            self._data = self._remember(self.to_representation(await self.ato_internal_value(self.instance, limiter)))
+        return self.data
+
+    @property
+    def aprotobuf(self) -> Awaitable[Any]:
+        """
+        Async version of `.protobuf`: `message = await serializer.aprotobuf`.
+        """
+        return self._aprotobuf()
+
+    async def _aprotobuf(self) -> Any:
+        await self.adata
+        return self.protobuf
+
+    async def to_protobuf_async(self, executor: Optional[Executor] = None, yield_every: Optional[int] = None) -> Any:
+        """
+        Awaitable `.protobuf` that keeps the event loop responsive.
+
+        The conversion runs in `executor`, the loop's default thread pool when `None`.
+        With a `ProcessPoolExecutor`, `many=True` serializers are converted in worker
+        processes (see `protolizer.parallel`). With `yield_every=N`, `many=True` serializers
+        are instead converted in the loop, N items at a time, letting other tasks run between
+        chunks; `pre_serialize` then receives each chunk.
+
+        The longest time the loop was blocked during the call is stored in
+        `.max_blocking_time`, in seconds.
+        """
+        monitor = LoopMonitor()
+        try:
+            with monitor:
+                return await self._to_protobuf_async(executor, yield_every)
+        finally:
+            self.max_blocking_time = monitor.max_blocking_time
+
+    async def _to_protobuf_async(self, executor: Optional[Executor], yield_every: Optional[int]) -> Any:
+        if isinstance(executor, ProcessPoolExecutor):
+            raise ValueError('Process executors can only convert `many=True` serializers.')
+        loop = asyncio.get_running_loop()
+        # In a copy of the caller's context, like `asyncio.to_thread()`, so that hooks and
+        # fields see its context variables.
+        return await loop.run_in_executor(executor, contextvars.copy_context().run, getattr, self, 'protobuf')
+
     @property
     def data(self):
         """
@@ -137,14 +359,18 @@ class BaseSerializer(BaseField):
             raise AssertionError(msg)
 
         if not hasattr(self, '_data'):
+            # `.protobuf` reports its `.data` conversion itself.
+            start = time.perf_counter() if hooks and not self._converting_protobuf else None
             if self.instance is not None and not getattr(self, '_errors', None):
-                self._data = self.to_representation(
+                self._data = self._remember(self.to_representation(
                     self.to_internal_value(self.instance)
-                )
+                ))
             elif hasattr(self, '_validated_data') and not getattr(self, '_errors', None):
                 self._data = self.to_representation(self.validated_data)
             else:
                 self._data = self.get_initial()
+            if start is not None:
+                self._observe('data', start, self._data)
 
         return self._data
 
@@ -156,18 +382,59 @@ class BaseSerializer(BaseField):
         :return: Return list of protobuf messages
         :rtype: list
         """
-
+        if not hooks:
+            return self._get_protobuf()
+        start = time.perf_counter()
+        self._converting_protobuf = True
+        try:
+            messages = self._get_protobuf()
+        finally:
+            del self._converting_protobuf
+        size = 0
+        if sized_hooks:
+            if isinstance(messages, list):
+                size = sum(message.ByteSize() for message in messages)
+            elif isinstance(messages, Message):
+                size = messages.ByteSize()
+        self._observe('protobuf', start, messages, size)
+        return messages
+
+    def _observe(self, operation: str, start: float, result: Any, output_bytes: int = 0) -> None:
+        """
+        Queues a conversion for the metrics hooks (see `protolizer.metrics`).
+        """
+        seconds = time.perf_counter() - start
+        serializer = self.child if hasattr(self, 'child') else self
+        pending.append((
+            type(serializer).__qualname__,
+            operation,
+            len(result) if isinstance(result, list) else 1,
+            seconds,
+            output_bytes,
+            count_failures(self._errors) if operation == 'is_valid' and self._errors else None,
+        ))
+        if len(pending) >= BATCH_SIZE:
+            flush()
+
+    def _get_protobuf(self) -> Union[List[Any], Any]:
         if hasattr(self, 'child') and not self.child.pb:
             raise AttributeError(
                 'Protobuf is not defined in {!r} serializer. '
                 'You can define it in MetaClass with `schema` key.'.format(self.child.__class__.__name__)
             )
 
+        if self._cache_key is not None and self.pb:
+            return self._cached_protobuf()
+
         protobuf_list = []
         # run pre serialization hook
-        self._protobuf = getattr(
-            self.child, 'pre_serialize'
-        )(self.data) if hasattr(self, 'child') else getattr(self, 'pre_serialize')(self.data)
+        serializer = self.child if hasattr(self, 'child') else self
+        data = self.data
+        profile = active_profile.get()
+        if profile is not None:
+            self._protobuf = profile.call((type(serializer).__qualname__, '', 'pre_serialize'), serializer.pre_serialize, data)
+        else:
+            self._protobuf = serializer.pre_serialize(data)
 
         if isinstance(self._protobuf, list):
             for item in self._protobuf:
@@ -176,6 +443,57 @@ class BaseSerializer(BaseField):
             return self.to_protobuf(self._protobuf)
         return protobuf_list
 
+    def _cached_protobuf(self) -> Any:
+        data = self.data
+        entry = self._cache_entry
+        if entry.protobuf is None:
+            # `pre_serialize` may modify the data, so it gets a mutable copy.
+            entry.protobuf = self.to_protobuf(self.pre_serialize(thaw(data)))
+        message = type(entry.protobuf)()
+        message.CopyFrom(entry.protobuf)
+        return message
+
+    def to_bytes(self) -> Any:
+        """
+        Returns the serialized data encoded in the protobuf wire format: the bytes of
+        `.protobuf.SerializeToString(deterministic=True)`, without building the message.
+
+        :see: protolizer.encoder
+        """
+        if not hooks:
+            return self._get_bytes()
+        start = time.perf_counter()
+        self._converting_protobuf = True
+        try:
+            payload = self._get_bytes()
+        finally:
+            del self._converting_protobuf
+        size = sum(map(len, payload)) if isinstance(payload, list) else len(payload)
+        self._observe('to_bytes', start, payload, size)
+        return payload
+
+    def _get_bytes(self) -> Union[List[bytes], bytes]:
+        serializer = self.child if hasattr(self, 'child') else self
+        if not serializer.pb:
+            raise AttributeError(
+                'Protobuf is not defined in {!r} serializer. '
+                'You can define it in MetaClass with `schema` key.'.format(serializer.__class__.__name__)
+            )
+
+        data = self.data
+        if self._cache_key is not None:
+            # `pre_serialize` may modify the data, so it gets a mutable copy.
+            data = thaw(data)
+        profile = active_profile.get()
+        if profile is not None:
+            data = profile.call((type(serializer).__qualname__, '', 'pre_serialize'), serializer.pre_serialize, data)
+        else:
+            data = serializer.pre_serialize(data)
+
+        if isinstance(data, list):
+            return [self.encode(item) for item in data]
+        return self.encode(data)
+
     @property
     def errors(self):
         if not hasattr(self, '_errors'):
@@ -201,6 +519,12 @@ class ListSerializer(BaseSerializer):
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.child = kwargs.pop('child', copy.deepcopy(self.child))
+        meta = getattr(self.child, 'Meta', None)
+        self.columnar = kwargs.pop('columnar', getattr(meta, 'columnar', False))
+        # Errors as {item index: detail} instead of a list with `{}` for every valid item.
+        self.sparse_errors = kwargs.pop('sparse_errors', getattr(meta, 'sparse_errors', False))
+        # Worker processes for `.protobuf`; validation and `.data` stay in-process (see `protolizer.parallel`).
+        self.workers = kwargs.pop('workers', None)
         super().__init__(*args, **kwargs)
         # Bind child to self.
         self.child.bind(field_name='', parent=self)
@@ -210,18 +534,98 @@ class ListSerializer(BaseSerializer):
             return self.to_representation(self.initial_data)
         return []
 
+    def reset(self, instance: Any = None, data: Any = Empty, context: Optional[Dict[str, Any]] = None) -> None:
+        super().reset(instance, data, context)
+        self.child.context = self.context
+
+    def _supports_columns(self, data: Any) -> bool:
+        child_class = type(self.child)
+        return (
+            isinstance(self.child, Serializer)
+            and child_class.to_internal_value is Serializer.to_internal_value
+            and child_class.run_validation is BaseField.run_validation
+            and isinstance(data, list)
+            and all(isinstance(item, Mapping) for item in data)
+        )
+
     def to_internal_value(self, data: List[Any]) -> List[Any]:
+        token = enter_call(self, self.get_context())
+        try:
+            return self._to_internal_value(data)
+        finally:
+            leave_call(token)
+
+    def _to_internal_value(self, data: List[Any]) -> List[Any]:
+        budget = call_budget.get()
+        # Columns are validated whole, so fail-fast validation goes item by item.
+        if self.columnar and budget is None and self._supports_columns(data):
+            columns = validate_columns(self.child, data, sparse=self.sparse_errors)
+            if column_owner.get() is self:
+                self._validated_columns = columns
+            return columns_to_rows(self.child, columns, len(data))
+        if self.sparse_errors:
+            return self._to_internal_value_sparse(data, budget)
+
         ret: List[Any] = []
         errors = []
         for item in data:
-            if self.child.context == 'self' and isinstance(self.parent.context, dict):
-                self.child.context = self.parent.context
-            else:
-                self.child.context = self.context
             try:
                 validated = self.child.run_validation(item)
             except ValidationError as exc:
                 errors.append(exc.detail)
+                if budget is not None and budget.spend(exc):
+                    break
+            else:
+                ret.append(validated)
+                errors.append({})
+
+        if any(errors):
+            raise collected_error(errors)
+
+        return ret
+
+    def _to_internal_value_sparse(self, data: List[Any], budget: Any) -> List[Any]:
+        ret: List[Any] = []
+        errors = SparseErrors()
+        size = 0
+        for index, item in enumerate(data):
+            size = index + 1
+            try:
+                ret.append(self.child.run_validation(item))
+            except ValidationError as exc:
+                errors[index] = exc.detail
+                if budget is not None and budget.spend(exc):
+                    break
+
+        if errors:
+            errors.size = size
+            raise collected_error(errors)
+
+        return ret
+
+    async def ato_internal_value(self, data: List[Any], limiter: Limiter) -> List[Any]:
+        # Tasks created by `gather()` copy the call context as it is here. `capture()` turns
+        # validation errors into results, so any error that propagates cancels the other items.
+        token = enter_call(self, self.get_context())
+        try:
+            results = await gather(capture(self.child.arun_validation(item, limiter)) for item in data)
+        finally:
+            leave_call(token)
+
+        if self.sparse_errors:
+            errors = SparseErrors(
+                ((index, error.detail) for index, (error, _) in enumerate(results) if error is not None),
+                size=len(results),
+            )
+            if errors:
+                raise ValidationError(errors)
+            return [validated for _, validated in results]
+
+        ret: List[Any] = []
+        errors = []
+        for error, validated in results:
+            if error is not None:
+                errors.append(error.detail)
             else:
                 ret.append(validated)
                 errors.append({})
@@ -232,11 +636,30 @@ class ListSerializer(BaseSerializer):
         return ret
 
     def to_representation(self, data: List[Any]) -> List[Any]:
-        return [self.child.to_representation(item) for item in data]
+        token = enter_call(self, self.get_context())
+        try:
+            return [self.child.to_representation(item) for item in data]
+        finally:
+            leave_call(token)
 
     def to_protobuf(self, data: Any) -> Any:
         return self.child.to_protobuf(data)
 
+    def encode(self, data: Any) -> bytes:
+        return self.child.encode(data)
+
+    def to_bytes(self, delimited: bool = True) -> Union[List[bytes], bytes]:
+        """
+        Returns the serialized items encoded in the protobuf wire format, in-process.
+
+        :param delimited: Return one buffer of size-prefixed records, the framing read by
+            `DelimitedReader`. With `False`, return the list of encoded items instead.
+        """
+        payloads = super().to_bytes()
+        if not delimited:
+            return payloads
+        return b''.join([encode_varint(len(payload)) + payload for payload in payloads])
+
     def pre_serialize(self, data):
         return data
 
@@ -253,6 +676,9 @@ class ListSerializer(BaseSerializer):
             return data
 
         value = self.to_internal_value(data)
+        return self._validate_list(value)
+
+    def _validate_list(self, value: List[Any]) -> List[Any]:
         try:
             value = self.validate(value)
             assert value is not None, '.validate() should return the validated data'
@@ -261,11 +687,27 @@ class ListSerializer(BaseSerializer):
 
         return value
 
-    def is_valid(self, raise_exception: bool = False) -> bool:
+    async def arun_validation(self, data: Any = Empty, limiter: Optional[Limiter] = None) -> Any:
+        (is_empty_value, data) = self.validate_empty_values(data)
+        if is_empty_value:
+            return data
+
+        value = await self.ato_internal_value(data, limiter or Limiter())
+        return self._validate_list(value)
+
+    def is_valid(
+        self,
+        raise_exception: bool = False,
+        fail_fast: Optional[bool] = None,
+        max_errors: Optional[int] = None,
+    ) -> bool:
         """
         This implementation is the same as the default, but we use lists as default data instead of dicts.
         """
         if not hasattr(self, '_validated_data'):
+            start = time.perf_counter() if hooks else None
+            token = call_budget.set(get_budget(self, fail_fast, max_errors))
+            owner = column_owner.set(self)
             try:
                 self._validated_data = self.run_validation(self.initial_data)
             except ValidationError as exc:
@@ -273,12 +715,119 @@ class ListSerializer(BaseSerializer):
                 self._errors = exc.detail
             else:
                 self._errors = []
+            finally:
+                column_owner.reset(owner)
+                call_budget.reset(token)
+            if start is not None:
+                self._observe('is_valid', start, self.initial_data)
+
+        if self._errors and raise_exception:
+            raise ValidationError(self._errors)
+
+        return not bool(self._errors)
+
+    async def ais_valid(self, raise_exception: bool = False, concurrency: Optional[int] = None) -> bool:
+        if not hasattr(self, '_validated_data'):
+            limiter = Limiter(concurrency or get_concurrency(self))
+            try:
+                self._validated_data = await self.arun_validation(self.initial_data, limiter)
+            except ValidationError as exc:
+                self._validated_data = []
+                self._errors = exc.detail
+            else:
+                self._errors = []
 
         if self._errors and raise_exception:
             raise ValidationError(self._errors)
 
         return not bool(self._errors)
 
+    @property
+    def validated_columns(self) -> Dict[str, Any]:
+        """
+        The validated data as {field_name: column}, when validated with `columnar=True`.
+        Numeric columns are NumPy arrays when NumPy is installed.
+        """
+        if not hasattr(self, '_validated_data'):
+            raise AssertionError('You must call `.is_valid()` before accessing `.validated_columns`.')
+        if self._errors:
+            return {}
+        if not hasattr(self, '_validated_columns'):
+            raise AssertionError(
+                '`.validated_columns` is only available when the data was validated with `columnar=True`.'
+            )
+        return self._validated_columns
+
+    def _iter_representation(self) -> Iterator[Any]:
+        """
+        Lazy equivalent of `.data`: converts one item of the instance at a time.
+        """
+        if hasattr(self, 'initial_data') and not hasattr(self, '_validated_data'):
+            raise AssertionError(
+                'When a serializer is passed a `data` keyword argument you '
+                'must call `.is_valid()` before iterating over its items.'
+            )
+        if self.instance is not None and not getattr(self, '_errors', None):
+            return self._iter_instance()
+        if hasattr(self, '_validated_data') and not getattr(self, '_errors', None):
+            return map(self.child.to_representation, self._validated_data)
+        return iter(self.get_initial())
+
+    def _iter_instance(self) -> Iterator[Any]:
+        context = self.get_context()
+        for index, item in enumerate(self.instance):
+            if isinstance(item, Message):
+                item = decode_message(item)
+            # Reset before yielding: a generator runs in the context of its consumer.
+            token = enter_call(self, context)
+            try:
+                representation = self.child.to_representation(self.child.run_validation(item))
+            except ValidationError as exc:
+                # Same shape as the errors of a fully validated list, up to this item.
+                if self.sparse_errors:
+                    raise ValidationError(SparseErrors({index: exc.detail}, size=index + 1))
+                raise ValidationError([{}] * index + [exc.detail])
+            finally:
+                leave_call(token)
+            yield representation
+
+    def iter_data(self, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Yields the serialized items one at a time, without building the whole `.data` list.
+
+        `instance` may be any iterable, including a generator; it is consumed lazily.
+        Unlike `.data`, the result is not cached and the list-level `validate()` is not run.
+
+        :param chunk_size: Yield lists of up to `chunk_size` items instead of single items.
+        """
+        items = self._iter_representation()
+        if chunk_size is None:
+            return items
+        return iter_chunks(items, chunk_size)
+
+    def iter_protobuf(self, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Yields protobuf messages one at a time, without building the whole `.protobuf` list.
+
+        The child's `pre_serialize` hook receives each item, or each chunk (a list)
+        when `chunk_size` is set.
+
+        :param chunk_size: Yield lists of up to `chunk_size` messages instead of single messages.
+        """
+        if not self.child.pb:
+            raise AttributeError(
+                'Protobuf is not defined in {!r} serializer. '
+                'You can define it in MetaClass with `schema` key.'.format(self.child.__class__.__name__)
+            )
+        pre_serialize = self.child.pre_serialize
+        items = self._iter_representation()
+        if chunk_size is None:
+            return (self.to_protobuf(pre_serialize(item)) for item in items)
+        return (
+            [self.to_protobuf(item) for item in pre_serialize(chunk)]
+            for chunk in iter_chunks(items, chunk_size)
+        )
+
     @property
     def data(self):
         ret = super().data
@@ -287,20 +836,78 @@ class ListSerializer(BaseSerializer):
     @property
     def errors(self):
         ret = super().errors
+        if isinstance(ret, SparseErrors):
+            ret.serializer = self
+            return ret
+        if self.sparse_errors and not ret:
+            return SparseErrors(serializer=self)
         if isinstance(ret, dict):
             return ReturnDict(ret, serializer=self)
         return ReturnList(ret, serializer=self)
 
-    @property
-    def protobuf(self):
-        ret = super().protobuf
+    async def _aprotobuf(self) -> Any:
+        await self.adata
+        # Always in-process: workers would run the coroutine hooks synchronously.
+        return ReturnList(BaseSerializer._get_protobuf(self), serializer=self)
+
+    async def _to_protobuf_async(self, executor: Optional[Executor], yield_every: Optional[int]) -> Any:
+        if yield_every is not None:
+            messages: List[Any] = []
+            for chunk in self.iter_protobuf(chunk_size=yield_every):
+                messages.extend(chunk)
+                await asyncio.sleep(0)
+            return ReturnList(messages, serializer=self)
+
+        if isinstance(executor, ProcessPoolExecutor):
+            items, mode = self._get_worker_input()
+            if items is None:
+                return self.protobuf
+            messages = await convert_async(type(self.child), items, executor, mode=mode, **self._get_worker_kwargs())
+            return ReturnList(messages, serializer=self)
+
+        return await super()._to_protobuf_async(executor, yield_every)
+
+    def _get_worker_input(self) -> Tuple[Optional[List[Any]], Optional[str]]:
+        """
+        Returns what worker processes should convert: (items, mode), or (None, None)
+        when `.protobuf` has to run in-process.
+        """
+        if self.child.pb and not getattr(self, '_errors', None):
+            if self.instance is not None:
+                return self.instance, MODE_INSTANCE
+            if hasattr(self, '_validated_data'):
+                return self._validated_data, MODE_VALIDATED
+        return None, None
+
+    def _get_worker_kwargs(self) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {'context': self.context} if self.context else {}
+        if self.sparse_errors:
+            kwargs['sparse_errors'] = True
+        if self.child.get_field_mask() is not None:
+            kwargs['fields'] = sorted(self.child.get_field_mask())
+        return kwargs
+
+    def _get_protobuf(self):
+        if self.workers and self.workers > 1:
+            items, mode = self._get_worker_input()
+            if items is not None:
+                messages = convert(type(self.child), items, workers=self.workers, mode=mode, **self._get_worker_kwargs())
+                return ReturnList(messages, serializer=self)
+        ret = super()._get_protobuf()
         return ReturnList(ret, serializer=self)
 
 
 class Serializer(BaseSerializer, metaclass=SerializerMetaclass):
+    _dynamic_fields = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dynamic_fields = cls.get_fields is not Serializer.get_fields
 
     @cached_property
     def fields(self):
+        # Fields of the instance may differ from the plan the compiled methods were generated from.
+        self._compiled = None
         fields = BindingDict(self)
         for key, value in self.get_fields().items():
             fields[key] = value
@@ -317,62 +924,375 @@ class Serializer(BaseSerializer, metaclass=SerializerMetaclass):
         """
         return copy.deepcopy(self._declared_fields)  # noqa
 
+    def get_plan(self) -> Tuple[FieldPlan, ...]:
+        """
+        Returns the execution plan used to validate and represent data.
+
+        The class-level plan is shared by every instance. Instances that
+        override `get_fields()` or have touched `.fields` get a plan built
+        from their own bound fields instead. With a field mask, only the
+        requested fields are in the plan.
+        """
+        paths = self.get_field_mask()
+        if self._uses_class_plan():
+            plan = self._plan if paths is None else self._get_masked_plan(paths)  # noqa
+        else:
+            plan = build_plan(type(self), self.fields)
+            if paths is not None:
+                plan = mask_plan(plan, paths, self._is_nested, type(self).__name__)
+        profile = active_profile.get()
+        if profile is not None:
+            key = (type(self), paths) if self._uses_class_plan() else None
+            return profile.wrap_plan(type(self), plan, key)
+        return plan
+
+    @classmethod
+    def _get_masked_plan(cls, paths: frozenset) -> Tuple[FieldPlan, ...]:
+        cache = cls.__dict__.get('_masked_plans')
+        if cache is None:
+            cache = {}
+            cls._masked_plans = cache
+        plan = cache.get(paths)
+        if plan is None:
+            plan = mask_plan(cls._plan, paths, cls._is_nested, cls.__name__)  # noqa
+            if len(cache) < MASK_CACHE_SIZE:
+                cache[paths] = plan
+        return plan
+
+    @staticmethod
+    def _is_nested(field: BaseField) -> bool:
+        return isinstance(field, BaseSerializer)
+
+    def _uses_class_plan(self) -> bool:
+        return 'fields' not in self.__dict__ and not self._dynamic_fields
+
+    def _runs_compiled(self) -> bool:
+        # Masked, profiled and fail-fast calls run the generic plan, which they modify or stop.
+        # Instances with a mask of their own or with `.fields` built have no `_compiled`.
+        if self.field_name is not None and call_mask.get() not in (Empty, None):
+            return False
+        return active_profile.get() is None and call_budget.get() is None
+
     def get_initial(self) -> Dict[str, Any]:
         if hasattr(self, 'initial_data'):
-            return dict([
-                (field_name, field.get_value(self.initial_data, self))
-                for field_name, field in self.fields.items()
-                if (field.get_value(self.initial_data, self) is not Empty)
-            ])
+            ret = {}
+            data = self.initial_data
+            if isinstance(data, WIRE_TYPES):
+                data = self._read_input(data)
+            plan = self.get_plan()
+            getters = self._get_getter_input(plan, data)
+            for entry in plan:
+                value = self._get_primitive_value(entry, data, getters)
+                if value is not Empty:
+                    ret[entry.name] = value
+            return ret
 
         return dict([
-            (field.field_name, field.get_initial())
-            for field in self.fields.values()
+            (entry.name, entry.field.get_initial())
+            for entry in self.get_plan()
         ])
 
+    def _get_primitive_value(self, entry: FieldPlan, data: Any, getters: Any) -> Any:
+        if entry.get_value is not None:
+            return entry.get_value(getters, self)
+        return data[entry.name] if entry.name in data else Empty
+
+    @staticmethod
+    def _get_getter_input(plan: Any, data: Any) -> Any:
+        """
+        Returns what the custom getters of the plan receive for `data` (see `getter_input`).
+        """
+        if any(entry.get_value is not None for entry in plan):
+            return getter_input(data)
+        return data
+
+    def _read_input(self, data: Any) -> Any:
+        if isinstance(data, WIRE_TYPES) or type(data) is WireInput:
+            # Serialized messages are decoded lazily, and only the fields of the plan.
+            message_type = data._type if type(data) is WireInput else get_schema(type(self)).DESCRIPTOR
+            return read_wire(data, message_type, *self._get_wire_fields())
+        return as_input(data)
+
+    def _get_wire_fields(self) -> Tuple[Optional[frozenset], frozenset]:
+        """
+        Returns the fields a `WireInput` decodes for this serializer: (names of the fields read,
+        `None` for all when custom getters read the input, names read by nested serializers).
+        """
+        cacheable = self._uses_class_plan() and self.get_field_mask() is None
+        if cacheable and '_wire_fields' in type(self).__dict__:
+            return type(self)._wire_fields  # noqa
+        plan = self.get_plan()
+        names = None
+        if all(entry.get_value is None for entry in plan):
+            names = frozenset(entry.name for entry in plan)
+        nested = frozenset(entry.name for entry in plan if entry.get_value is None and self._is_nested(entry.field))
+        if cacheable:
+            type(self)._wire_fields = (names, nested)
+        return names, nested
+
     def to_internal_value(self, data: Any) -> Dict[str, Any]:
+        if type(data) is not dict:
+            data = self._read_input(data)
+        compiled = self._compiled  # noqa
+        if compiled is not None and not self._plan_context and self._runs_compiled():  # noqa
+            return compiled.to_internal_value(self, data)
+        # Only fields that may read the context need it passed down.
+        if self._plan_context or 'fields' in self.__dict__:  # noqa
+            token = enter_call(self, self.get_context())
+            try:
+                return self._to_internal_value(data)
+            finally:
+                leave_call(token)
+        return self._to_internal_value(data)
+
+    def _to_internal_value(self, data: Any) -> Dict[str, Any]:
+        compiled = self._compiled  # noqa
+        if compiled is not None and self._runs_compiled():
+            return compiled.to_internal_value(self, data)
+
         ret: Dict[str, Any] = {}
         errors: Dict[str, Any] = {}
-        fields = self._readable_fields
-
-        for field in fields:
-            if self.context == 'self' and isinstance(self.parent.context, dict):
-                field.context = self.parent.context
+        cls = type(self)
+        # Custom getters share one copy of the input (see `getter_input`), made on first use.
+        getters = None
+
+        for entry in self.get_plan():
+            if entry.get_value is not None:
+                if getters is None:
+                    getters = getter_input(data)
+                primitive_value = entry.get_value(getters, self)
             else:
-                field.context = self.context
-            validate_method = getattr(self, 'validate_' + field.field_name, None)
-            primitive_value = field.get_value(data, self)
+                primitive_value = data[entry.name] if entry.name in data else Empty
             try:
-                validated_value = field.run_validation(primitive_value)
-                if validate_method:
-                    validated_value = validate_method(primitive_value)
+                validated_value = entry.run_validation(primitive_value)
+                if entry.validator is not None:
+                    validated_value = entry.validator.__get__(self, cls)(primitive_value)
             except ValidationError as e:
-                errors[field.field_name] = e.detail
+                errors[entry.name] = e.detail
+                budget = call_budget.get()
+                if budget is not None and budget.spend(e):
+                    break
+            else:
+                if entry.target is not None:
+                    ret[entry.target] = validated_value
+                else:
+                    set_value(ret, list(entry.attributes), validated_value)
+
+        if errors:
+            raise collected_error(errors)
+
+        return ret
+
+    async def ato_internal_value(self, data: Any, limiter: Limiter) -> Dict[str, Any]:
+        if type(data) is not dict:
+            data = self._read_input(data)
+        token = enter_call(self, self.get_context())
+        try:
+            return await self._ato_internal_value(data, limiter)
+        finally:
+            leave_call(token)
+
+    async def _ato_internal_value(self, data: Any, limiter: Limiter) -> Dict[str, Any]:
+        plan = self.get_plan()
+        outcomes: List[Tuple[Optional[ValidationError], Any]] = []
+        pending = []
+        # Awaitables returned by hooks, which the pending coroutines await.
+        hooks = []
+        cls = type(self)
+        getters = self._get_getter_input(plan, data)
+
+        # Fields without coroutine hooks run right away; the others are awaited together.
+        try:
+            for index, entry in enumerate(plan):
+                try:
+                    primitive_value = self._get_primitive_value(entry, data, getters)
+                    if inspect.isawaitable(primitive_value) or isinstance(entry.field, BaseSerializer):
+                        pending.append((index, self._arun_field(entry, primitive_value, limiter)))
+                        hooks.append(primitive_value)
+                        outcomes.append((None, Empty))
+                        continue
+                    validated_value = entry.run_validation(primitive_value)
+                    if entry.validator is not None:
+                        validated_value = entry.validator.__get__(self, cls)(primitive_value)
+                        if inspect.isawaitable(validated_value):
+                            pending.append((index, limiter.resolve(validated_value)))
+                            hooks.append(validated_value)
+                except ValidationError as e:
+                    outcomes.append((e, None))
+                else:
+                    outcomes.append((None, validated_value))
+        except BaseException:
+            # Other errors (e.g. `InvalidDataError`) end the validation before anything is awaited.
+            discard([awaitable for _, awaitable in pending] + hooks)
+            raise
+
+        if pending:
+            # Other errors than `ValidationError` cancel the remaining hooks.
+            results = await gather(capture(awaitable) for _, awaitable in pending)
+            for (index, _), outcome in zip(pending, results):
+                outcomes[index] = outcome
+
+        ret: Dict[str, Any] = {}
+        errors: Dict[str, Any] = {}
+        for entry, (error, validated_value) in zip(plan, outcomes):
+            if error is not None:
+                errors[entry.name] = error.detail
+            elif entry.target is not None:
+                ret[entry.target] = validated_value
             else:
-                set_value(ret, field.attributes, validated_value)
+                set_value(ret, list(entry.attributes), validated_value)
 
         if errors:
             raise ValidationError(errors)
 
         return ret
 
+    async def _arun_field(self, entry: FieldPlan, primitive_value: Any, limiter: Limiter) -> Any:
+        primitive_value = await limiter.resolve(primitive_value)
+        if isinstance(entry.field, BaseSerializer):
+            # The sync path passes the paths of a field mask through `entry.run_validation`.
+            token = call_mask.set(entry.paths) if entry.paths is not Empty else None
+            try:
+                validated_value = await entry.field.arun_validation(primitive_value, limiter)
+            finally:
+                if token is not None:
+                    call_mask.reset(token)
+        else:
+            validated_value = entry.run_validation(primitive_value)
+        if entry.validator is not None:
+            validated_value = await limiter.resolve(entry.validator.__get__(self, type(self))(primitive_value))
+        return validated_value
+
     def to_representation(self, instance: Dict[str, Any]) -> Dict[str, Any]:
+        compiled = self._compiled  # noqa
+        if compiled is not None and not self._plan_context and self._runs_compiled():  # noqa
+            return compiled.to_representation(self, instance)
+        # Only fields that may read the context need it passed down.
+        if self._plan_context or 'fields' in self.__dict__:  # noqa
+            token = enter_call(self, self.get_context())
+            try:
+                return self._to_representation(instance)
+            finally:
+                leave_call(token)
+        return self._to_representation(instance)
+
+    def _to_representation(self, instance: Dict[str, Any]) -> Dict[str, Any]:
+        compiled = self._compiled  # noqa
+        if compiled is not None and self._runs_compiled():
+            return compiled.to_representation(self, instance)
+
         ret: Dict[str, Any] = {}
-        fields = self._readable_fields
-        for field in fields:
-            attribute = field.get_attribute(instance)
-            key = field.proto_field if field.proto_field else field.field_name
+        for entry in self.get_plan():
+            attribute = entry.get_attribute(instance)
             if attribute is None:
-                ret[key] = None
+                ret[entry.key] = None
             else:
-                ret[key] = field.to_representation(attribute)
+                ret[entry.key] = entry.to_representation(attribute)
         return ret
 
     def to_protobuf(self, data: Dict[str, Any]) -> Any:
         if self.pb:
+            profile = active_profile.get()
+            if profile is not None:
+                return profile.call((type(self).__qualname__, '', 'to_protobuf'), to_protobuf, data, self.pb)
             return to_protobuf(data, self.pb)
         return self.pb
 
+    def encode(self, data: Dict[str, Any]) -> bytes:
+        """
+        Encodes one item of serialized data, after `pre_serialize`, to the protobuf wire format.
+        """
+        schema = self.pb if callable(self.pb) else type(self.pb)
+        profile = active_profile.get()
+        if profile is not None:
+            return profile.call((type(self).__qualname__, '', 'encode'), encode_message, data, schema)
+        return encode_message(data, schema)
+
+    @classmethod
+    def _shared_instance(cls, many: bool = False) -> BaseSerializer:
+        """
+        Returns the instance used by `dump()`, `load()` and `to_message()`. It never holds
+        an instance, data or results, so any number of threads can use it at once.
+        """
+        key = '_shared_many' if many else '_shared'
+        serializer = cls.__dict__.get(key)
+        if serializer is None:
+            serializer = cls(many=many)
+            # Bound like the child of a `ListSerializer`, so `.context` is the context of each call.
+            serializer.bind(field_name='', parent=None)
+            setattr(cls, key, serializer)
+        return serializer
+
+    @classmethod
+    def dump(cls, obj: Any, context: Optional[Dict[str, Any]] = None, many: bool = False) -> Any:
+        """
+        Stateless `.data`: `AccountSerializer.dump(obj)` returns what
+        `AccountSerializer(obj).data` does, as a plain dict (or list with `many=True`).
+
+        Nothing is stored on the serializer or its fields, so it is safe to call from
+        several threads at once.
+
+        :param context: Context of this call, seen by the serializer and its fields as `.context`.
+        """
+        serializer = cls._shared_instance(many)
+        token = call_context.set({} if context is None else context)
+        try:
+            return serializer.to_representation(serializer.to_internal_value(decode_messages(obj)))
+        finally:
+            call_context.reset(token)
+
+    @classmethod
+    def load(cls, data: Any, context: Optional[Dict[str, Any]] = None, many: bool = False) -> Any:
+        """
+        Stateless validation: returns what `.validated_data` would be after `.is_valid()`.
+
+        :param context: Context of this call, seen by the serializer and its fields as `.context`.
+        :raises ValidationError: If the data is not valid, with the same detail as `.errors`.
+        """
+        serializer = cls._shared_instance(many)
+        token = call_context.set({} if context is None else context)
+        try:
+            data = decode_messages(data)
+            return serializer.run_validation(data) if many else serializer.to_internal_value(data)
+        finally:
+            call_context.reset(token)
+
+    @classmethod
+    def to_message(cls, obj: Any, context: Optional[Dict[str, Any]] = None, many: bool = False) -> Any:
+        """
+        Stateless `.protobuf`: returns the message (or list of messages with `many=True`)
+        that `AccountSerializer(obj).protobuf` does, running the `pre_serialize` hook.
+
+        :param context: Context of this call, seen by the serializer and its fields as `.context`.
+        """
+        get_schema(cls)
+        serializer = cls._shared_instance(many)
+        child = serializer.child if many else serializer
+        token = call_context.set({} if context is None else context)
+        try:
+            data = serializer.to_representation(serializer.to_internal_value(decode_messages(obj)))
+            data = child.pre_serialize(data)
+            if many:
+                return [child.to_protobuf(item) for item in data]
+            return child.to_protobuf(data)
+        finally:
+            call_context.reset(token)
+
+    @classmethod
+    def from_bytes(cls, data: Any, context: Optional[Dict[str, Any]] = None, many: bool = False) -> Any:
+        """
+        Stateless validation of serialized messages: returns what `load()` does for the
+        parsed message, decoding only the fields the serializer reads (see `protolizer.lazy`).
+
+        :param data: Serialized message (bytes, bytearray or memoryview). With `many=True`,
+            size-prefixed records, as returned by `.to_bytes()` of a `many=True` serializer.
+        :param context: Context of this call, seen by the serializer and its fields as `.context`.
+        :raises ValidationError: If the data is not valid, with the same detail as `.errors`.
+        :raises DecodeError: If the data is not a valid serialized message.
+        """
+        get_schema(cls)
+        return cls.load(split_delimited(data) if many else data, context=context, many=many)
+
     def __iter__(self):
         for field in self.fields.values():
             yield field
@@ -0,0 +1,373 @@
+"""
+Length-delimited streams of protobuf messages.
+
+Each record is the size of the message as a varint followed by the serialized message,
+the framing of `writeDelimitedTo`/`parseDelimitedFrom` in the Java and C++ libraries.
+Streams can be binary files or sockets; files can also be memory-mapped for random access.
+"""
+import array
+import mmap
+import operator
+import os
+from typing import Any, Callable, Iterable, Iterator, Type, Union
+
+from google.protobuf.message import DecodeError, Message
+
+from protolizer.wire import decode_varint, encode_varint
+
+__all__ = [
+    'DelimitedWriter',
+    'DelimitedReader',
+    'MappedReader',
+]
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def get_schema(serializer_class: Type[Any]) -> Type[Message]:
+    """
+    Returns the protobuf message class of a serializer class (its `Meta.schema`).
+    """
+    schema = getattr(getattr(serializer_class, 'Meta', None), 'schema', None)
+    if schema is None:
+        raise AttributeError(
+            'Protobuf is not defined in {!r} serializer. '
+            'You can define it in MetaClass with `schema` key.'.format(serializer_class.__name__)
+        )
+    return schema
+
+
+class DelimitedWriter:
+    """
+    Writes size-prefixed messages, produced by a serializer, to a binary file or socket.
+
+    Records are collected in a buffer and written with one call per `buffer_size` bytes.
+    Call `flush()` or `close()` (or use the writer as a context manager) to write the rest.
+
+    e.g:
+        with open('accounts.bin', 'wb') as f, DelimitedWriter(f, AccountSerializer) as writer:
+            writer.write_many(accounts)
+    """
+
+    def __init__(
+        self,
+        stream: Any,
+        serializer_class: Type[Any],
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        **kwargs: Any,
+    ) -> None:
+        """
+        :param stream: Binary file-like object or socket.
+        :param serializer_class: Serializer used to convert the written instances.
+        :param buffer_size: Number of bytes buffered before writing to the stream.
+        :param kwargs: Extra keyword arguments for the serializer (e.g. context).
+        """
+        self.stream = stream
+        self.serializer_class = serializer_class
+        self.schema = get_schema(serializer_class)
+        self.buffer_size = buffer_size
+        self.serializer_kwargs = kwargs
+        self._write: Callable[[bytes], Any] = getattr(stream, 'write', None) or stream.sendall
+        self._buffer = bytearray()
+
+    def write(self, instance: Any) -> None:
+        """
+        Serializes an instance (dict, object or message) and writes it as one record.
+        """
+        self.write_message(self.serializer_class(instance, **self.serializer_kwargs).protobuf)
+
+    def write_many(self, instances: Iterable[Any]) -> None:
+        """
+        Serializes and writes every instance of an iterable, consuming it lazily.
+        """
+        serializer = self.serializer_class(instances, many=True, **self.serializer_kwargs)
+        for message in serializer.iter_protobuf():
+            self.write_message(message)
+
+    def write_message(self, message: Message) -> None:
+        """
+        Writes an already built message as one record, without going through the serializer.
+        """
+        payload = message.SerializeToString()
+        buffer = self._buffer
+        buffer += encode_varint(len(payload))
+        buffer += payload
+        if len(buffer) >= self.buffer_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        if self._buffer:
+            self._write(self._buffer)
+            self._buffer.clear()
+
+    def flush(self) -> None:
+        """
+        Writes the buffered records to the stream, and flushes the stream.
+        """
+        self._drain()
+        flush = getattr(self.stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def close(self) -> None:
+        """
+        Flushes the buffered records. The stream itself is left open.
+        """
+        self.flush()
+
+    def __enter__(self) -> 'DelimitedWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+class DelimitedReader:
+    """
+    Reads size-prefixed messages from a binary file or socket.
+
+    Iterating over the reader yields protobuf messages; `data()`, `validated_data()` and
+    `serializers()` pass each message to the serializer class instead. The stream is read
+    in blocks of `buffer_size` bytes and consumed lazily.
+
+    e.g:
+        with open('accounts.bin', 'rb') as f:
+            for account in DelimitedReader(f, AccountSerializer).data():
+                ...
+    """
+
+    def __init__(
+        self,
+        stream: Any,
+        serializer_class: Type[Any],
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        **kwargs: Any,
+    ) -> None:
+        """
+        :param stream: Binary file-like object or socket.
+        :param serializer_class: Serializer that the records are passed to.
+        :param buffer_size: Number of bytes read from the stream at once.
+        :param kwargs: Extra keyword arguments for the serializer (e.g. context).
+        """
+        self.stream = stream
+        self.serializer_class = serializer_class
+        self.schema = get_schema(serializer_class)
+        self.buffer_size = buffer_size
+        self.serializer_kwargs = kwargs
+        self._read: Callable[[int], bytes] = getattr(stream, 'read', None) or stream.recv
+
+    def records(self) -> Iterator[bytes]:
+        """
+        Yields the serialized messages, without parsing them.
+
+        :raises DecodeError: If the stream ends in the middle of a record.
+        """
+        buffer = bytearray()
+        pos = 0
+        while True:
+            while True:
+                try:
+                    size, start = decode_varint(buffer, pos)
+                except IndexError:
+                    break
+                end = start + size
+                if end > len(buffer):
+                    break
+                yield bytes(buffer[start:end])
+                pos = end
+
+            chunk = self._read(self.buffer_size)
+            if not chunk:
+                if pos < len(buffer):
+                    raise DecodeError('Truncated message stream.')
+                return
+            del buffer[:pos]
+            pos = 0
+            buffer += chunk
+
+    def __iter__(self) -> Iterator[Message]:
+        """
+        Yields the protobuf messages.
+        """
+        from_string = self.schema.FromString
+        for record in self.records():
+            yield from_string(record)
+
+    def serializers(self) -> Iterator[Any]:
+        """
+        Yields a serializer instance for each message, e.g. `AccountSerializer(message)`.
+        """
+        for message in self:
+            yield self.serializer_class(message, **self.serializer_kwargs)
+
+    def data(self) -> Iterator[Any]:
+        """
+        Yields the serialized data of each message, like `AccountSerializer(message).data`.
+        """
+        for serializer in self.serializers():
+            yield serializer.data
+
+    def validated_data(self, raise_exception: bool = True) -> Iterator[Any]:
+        """
+        Validates each message as input data and yields its validated data,
+        like `AccountSerializer(data=message).validated_data`.
+
+        :param raise_exception: Raise the `ValidationError` of an invalid message.
+            Otherwise invalid messages are skipped.
+        """
+        for message in self:
+            serializer = self.serializer_class(data=message, **self.serializer_kwargs)
+            if serializer.is_valid(raise_exception=raise_exception):
+                yield serializer.validated_data
+
+
+def _as_index(key: Any) -> int:
+    try:
+        return operator.index(key)
+    except TypeError:
+        raise TypeError(
+            'MappedReader indices must be integers, slices or iterables of integers, '
+            'not {!r}.'.format(type(key).__name__)
+        ) from None
+
+
+class MappedReader:
+    """
+    Random access to a file of size-prefixed messages, e.g. written by `DelimitedWriter`.
+
+    The file is memory-mapped and the offset of every record is indexed once, when the
+    reader is opened. Records are only parsed when accessed, straight from the mapped
+    pages, and passed to the serializer class:
+
+        with MappedReader('accounts.bin', AccountSerializer) as reader:
+            reader[10].data          # AccountSerializer(message_10)
+            reader[-100:]            # a reader over the last 100 records
+            reader[[1, 5, 8]]        # a reader over the given records
+            for serializer in reader.filter(lambda message: message.balance > 100):
+                ...
+
+    Slices and index lists share the mapping of the reader they come from.
+    """
+
+    def __init__(self, file: Union[str, os.PathLike, Any], serializer_class: Type[Any], **kwargs: Any) -> None:
+        """
+        :param file: Path, or binary file object opened for reading.
+        :param serializer_class: Serializer that the records are passed to.
+        :param kwargs: Extra keyword arguments for the serializer (e.g. context).
+        :raises DecodeError: If the file ends in the middle of a record.
+        """
+        self.serializer_class = serializer_class
+        self.schema = get_schema(serializer_class)
+        self.serializer_kwargs = kwargs
+
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'rb') as f:
+                self._mmap = self._map(f)
+        else:
+            self._mmap = self._map(file)
+        self._view = memoryview(self._mmap if self._mmap is not None else b'')
+        try:
+            self._starts, self._ends = self._build_index(self._view)
+        except DecodeError:
+            self.close()
+            raise
+
+    @staticmethod
+    def _map(file: Any) -> Any:
+        if os.fstat(file.fileno()).st_size == 0:
+            # Empty files cannot be mapped.
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _build_index(view: memoryview):
+        starts = array.array('q')
+        ends = array.array('q')
+        pos = 0
+        length = len(view)
+        while pos < length:
+            try:
+                size, start = decode_varint(view, pos)
+            except IndexError:
+                raise DecodeError('Truncated message file.')
+            pos = start + size
+            if pos > length:
+                raise DecodeError('Truncated message file.')
+            starts.append(start)
+            ends.append(pos)
+        return starts, ends
+
+    def _subset(self, starts: array.array, ends: array.array) -> 'MappedReader':
+        reader = object.__new__(type(self))
+        reader.__dict__.update(self.__dict__)
+        reader._starts = starts
+        reader._ends = ends
+        return reader
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def record(self, index: int) -> memoryview:
+        """
+        Returns the serialized message of a record, as a slice of the mapping.
+        """
+        return self._view[self._starts[index]:self._ends[index]]
+
+    def message(self, index: int) -> Message:
+        """
+        Parses a record into a protobuf message.
+        """
+        return self.schema.FromString(self._view[self._starts[index]:self._ends[index]])
+
+    def __getitem__(self, key: Any) -> Any:
+        """
+        `reader[i]` returns a serializer instance for the record, `reader[a:b]` and
+        `reader[[i, j, ...]]` return readers over the selected records.
+
+        :raises TypeError: If the key is not an integer, a slice or an iterable of integers.
+        """
+        if isinstance(key, slice):
+            return self._subset(self._starts[key], self._ends[key])
+        if isinstance(key, Iterable) and not isinstance(key, (str, bytes)):
+            indices = [_as_index(index) for index in key]
+            return self._subset(
+                array.array('q', [self._starts[index] for index in indices]),
+                array.array('q', [self._ends[index] for index in indices]),
+            )
+        return self.serializer_class(self.message(_as_index(key)), **self.serializer_kwargs)
+
+    def __iter__(self) -> Iterator[Any]:
+        for index in range(len(self)):
+            yield self.serializer_class(self.message(index), **self.serializer_kwargs)
+
+    def messages(self) -> Iterator[Message]:
+        """
+        Yields the protobuf messages of the records.
+        """
+        from_string = self.schema.FromString
+        view = self._view
+        for start, end in zip(self._starts, self._ends):
+            yield from_string(view[start:end])
+
+    def filter(self, predicate: Callable[[Message], bool]) -> Iterator[Any]:
+        """
+        Yields serializer instances for the records whose message matches `predicate`.
+        Only matching messages are passed to the serializer.
+        """
+        for message in self.messages():
+            if predicate(message):
+                yield self.serializer_class(message, **self.serializer_kwargs)
+
+    def close(self) -> None:
+        """
+        Unmaps the file. Readers created from this one by slicing stop working too.
+        """
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self) -> 'MappedReader':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
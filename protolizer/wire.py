@@ -0,0 +1,48 @@
+"""
+Helpers for the protobuf wire format.
+"""
+from typing import Tuple
+
+from google.protobuf.message import DecodeError
+
+__all__ = [
+    'encode_varint',
+    'decode_varint',
+]
+
+
+def encode_varint(value: int) -> bytes:
+    """
+    Encodes a non-negative integer as a base 128 varint.
+    """
+    if value < 0x80:
+        return bytes((value,))
+    ret = bytearray()
+    while value > 0x7f:
+        ret.append((value & 0x7f) | 0x80)
+        value >>= 7
+    ret.append(value)
+    return bytes(ret)
+
+
+def decode_varint(buffer: bytes, pos: int = 0) -> Tuple[int, int]:
+    """
+    Decodes a base 128 varint from a bytes-like object.
+
+    :param buffer: Bytes-like object.
+    :param pos: Offset of the varint in the buffer.
+    :return: (value, offset of the first byte after the varint).
+    :raises IndexError: If the buffer ends in the middle of the varint.
+    :raises DecodeError: If the varint is longer than 10 bytes.
+    """
+    result = 0
+    shift = 0
+    while True:
+        byte = buffer[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+        if shift >= 70:
+            raise DecodeError('Too many bytes when decoding varint.')
@@ -0,0 +1,295 @@
+"""
+Direct conversion of Python dicts to protobuf messages.
+
+The writer precomputes a slot table per message descriptor and assigns the values
+our fields have already coerced straight into the message: scalars with `setattr`,
+repeated scalars with `extend` (arrays as one packed record) and sub-messages in place or with `add()`/`CopyFrom`.
+Any value it does not handle natively is handed to `ParseDict`, one field at a time,
+so accepted inputs and raised errors stay the same as with `ParseDict` alone.
+"""
+import base64
+import math
+from typing import Any, Callable, Dict, Mapping, Tuple, TypeVar
+
+from google.protobuf.descriptor import Descriptor, FieldDescriptor
+from google.protobuf.json_format import ParseDict
+from google.protobuf.message import Message
+
+from protolizer.arrays import is_array, pack_repeated
+from protolizer.descriptors import JSON_TYPES, WRAPPER_TYPES, is_map_field, is_repeated
+
+__all__ = [
+    'write_message',
+    'get_writer_table',
+]
+
+_M = TypeVar("_M", bound=Message)
+
+_Setter = Callable[[Message, Any], None]
+
+# Writer tables, keyed by message descriptor.
+_tables: Dict[Descriptor, Dict[str, Tuple[str, _Setter]]] = {}
+
+_FLOAT_MAX = 3.4028234663852886e38
+
+_INT_TYPES = frozenset([
+    FieldDescriptor.CPPTYPE_INT32, FieldDescriptor.CPPTYPE_INT64,
+    FieldDescriptor.CPPTYPE_UINT32, FieldDescriptor.CPPTYPE_UINT64,
+])
+
+
+class _Unsupported(TypeError):
+    """
+    Raised by a slot when the value must be converted by `ParseDict` instead.
+    """
+
+
+def _convert_int(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise _Unsupported
+
+
+def _convert_double(value):
+    if isinstance(value, float):
+        if math.isfinite(value):
+            return value
+    elif isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise _Unsupported
+
+
+def _convert_float(value):
+    value = _convert_double(value)
+    if -_FLOAT_MAX <= value <= _FLOAT_MAX:
+        return value
+    raise _Unsupported
+
+
+def _convert_bool(value):
+    if isinstance(value, bool):
+        return value
+    raise _Unsupported
+
+
+def _convert_str(value):
+    if isinstance(value, str):
+        return value
+    raise _Unsupported
+
+
+def _convert_bytes(value):
+    # Bytes are base64 text in our dicts, decoded the same way `ParseDict` does.
+    encoded = value.encode('utf-8') if isinstance(value, str) else value
+    if not isinstance(encoded, bytes):
+        raise _Unsupported
+    return base64.urlsafe_b64decode(encoded + b'=' * (4 - len(encoded) % 4))
+
+
+def _get_enum_converter(enum_type):
+    numbers = {name: value.number for name, value in enum_type.values_by_name.items()}
+
+    def convert(value):
+        if isinstance(value, str):
+            number = numbers.get(value)
+            if number is not None:
+                return number
+        elif isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise _Unsupported
+    return convert
+
+
+def _get_scalar_converter(field: FieldDescriptor) -> Callable[[Any], Any]:
+    if field.type == FieldDescriptor.TYPE_BYTES:
+        return _convert_bytes
+    if field.type == FieldDescriptor.TYPE_FLOAT:
+        return _convert_float
+    if field.cpp_type == FieldDescriptor.CPPTYPE_DOUBLE:
+        return _convert_double
+    if field.cpp_type in _INT_TYPES:
+        return _convert_int
+    if field.cpp_type == FieldDescriptor.CPPTYPE_BOOL:
+        return _convert_bool
+    if field.cpp_type == FieldDescriptor.CPPTYPE_ENUM:
+        return _get_enum_converter(field.enum_type)
+    return _convert_str
+
+
+def _get_message_filler(message_type: Descriptor) -> Callable[[Message, Any], None]:
+    """
+    Returns a function that fills an (already present) sub-message from a value.
+    """
+    full_name = message_type.full_name
+
+    if full_name in JSON_TYPES:
+        def fill(message, value):
+            raise _Unsupported
+
+    elif full_name == 'google.protobuf.Timestamp':
+        def fill(message, value):
+            if isinstance(value, Message):
+                message.CopyFrom(value)
+            elif hasattr(value, 'timestamp'):
+                message.FromDatetime(value)
+            else:
+                raise _Unsupported
+
+    elif full_name == 'google.protobuf.Duration':
+        def fill(message, value):
+            if isinstance(value, Message):
+                message.CopyFrom(value)
+            elif hasattr(value, 'total_seconds'):
+                message.FromTimedelta(value)
+            else:
+                raise _Unsupported
+
+    elif full_name in WRAPPER_TYPES:
+        convert = _get_scalar_converter(message_type.fields_by_name['value'])
+
+        def fill(message, value):
+            if isinstance(value, Message):
+                message.CopyFrom(value)
+            else:
+                message.value = convert(value)
+
+    else:
+        def fill(message, value):
+            if isinstance(value, Mapping):
+                table = _tables.get(message_type)
+                if table is None:
+                    table = get_writer_table(message_type)
+                _write(value, message, table)
+            elif isinstance(value, Message):
+                message.CopyFrom(value)
+            else:
+                raise _Unsupported
+
+    return fill
+
+
+def _get_setter(field: FieldDescriptor) -> _Setter:
+    name = field.name
+
+    if is_map_field(field):
+        value_field = field.message_type.fields_by_name['value']
+        if value_field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+            fill = _get_message_filler(value_field.message_type)
+
+            def set_map(message, value):
+                message.ClearField(name)
+                container = getattr(message, name)
+                for key, item in value.items():
+                    fill(container[key], item)
+        else:
+            convert = _get_scalar_converter(value_field)
+
+            def set_map(message, value):
+                message.ClearField(name)
+                getattr(message, name).update({key: convert(item) for key, item in value.items()})
+        return set_map
+
+    if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE:
+        fill = _get_message_filler(field.message_type)
+        if is_repeated(field):
+            def set_repeated_message(message, value):
+                if not isinstance(value, (list, tuple)):
+                    raise _Unsupported
+                message.ClearField(name)
+                container = getattr(message, name)
+                for item in value:
+                    fill(container.add(), item)
+            return set_repeated_message
+
+        def set_message(message, value):
+            sub_message = getattr(message, name)
+            sub_message.SetInParent()
+            fill(sub_message, value)
+        return set_message
+
+    convert = _get_scalar_converter(field)
+    if is_repeated(field):
+        if convert in (_convert_int, _convert_str, _convert_bool):
+            # The container type-checks these itself, so the values are extended as-is.
+            def extend(container, value):
+                container.extend(value)
+        else:
+            def extend(container, value):
+                container.extend([convert(item) for item in value])
+
+        def set_repeated(message, value):
+            if is_array(value):
+                packed = pack_repeated(field, value)
+                if packed is not None:
+                    # Range-checked as a whole and parsed by the backend, without per-item objects.
+                    message.ClearField(name)
+                    message.MergeFromString(packed)
+                    return
+                value = value.tolist()
+            elif not isinstance(value, (list, tuple)):
+                raise _Unsupported
+            message.ClearField(name)
+            extend(getattr(message, name), value)
+        return set_repeated
+
+    def set_scalar(message, value):
+        setattr(message, name, convert(value))
+    return set_scalar
+
+
+def get_writer_table(message_type: Descriptor) -> Dict[str, Tuple[str, _Setter]]:
+    """
+    Returns the cached writer table for a message descriptor.
+
+    :param message_type: Descriptor of the message to write.
+    :return: {key: (field_name, setter)}, keyed by both the proto and the JSON field names.
+    """
+    table = _tables.get(message_type)
+    if table is None:
+        table = {}
+        for field in message_type.fields:
+            if field.cpp_type == FieldDescriptor.CPPTYPE_MESSAGE and field.message_type.full_name in JSON_TYPES:
+                # `null` and the JSON mapping of these types are left to `ParseDict` entirely.
+                continue
+            slot = (field.name, _get_setter(field))
+            table[field.json_name] = slot
+            table[field.name] = slot
+        _tables[message_type] = table
+    return table
+
+
+def _write(data: Mapping[str, Any], message: Message, table: Dict[str, Tuple[str, _Setter]]) -> None:
+    for key, value in data.items():
+        slot = table.get(key)
+        if slot is None:
+            ParseDict({key: value}, message)
+            continue
+        name, setter = slot
+        if value is None:
+            message.ClearField(name)
+            continue
+        try:
+            setter(message, value)
+        except (TypeError, ValueError):
+            message.ClearField(name)
+            ParseDict({key: value.tolist() if is_array(value) else value}, message)
+
+
+def write_message(data: Mapping[str, Any], message: _M) -> _M:
+    """
+    Fill a protobuf message from a dict.
+
+    Any input accepted by `ParseDict(data, message)` produces the same message.
+
+    :param data: Dictionary to convert (e.g. from serializer.data).
+    :param message: Protobuf message instance to fill.
+    :return: The filled message.
+    """
+    if not isinstance(data, Mapping):
+        return ParseDict(data, message)
+    descriptor = message.DESCRIPTOR
+    table = _tables.get(descriptor)
+    if table is None:
+        table = get_writer_table(descriptor)
+    _write(data, message, table)
+    return message
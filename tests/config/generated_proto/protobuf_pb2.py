@@ -2,7 +2,7 @@
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
 # NO CHECKED-IN PROTOBUF GENCODE
 # source: protobuf.proto
-# Protobuf Python Version: 6.33.1
+# Protobuf Python Version: 6.31.1
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import descriptor_pool as _descriptor_pool
@@ -12,7 +12,7 @@ from google.protobuf.internal import builder as _builder
 _runtime_version.ValidateProtobufRuntimeVersion(
     _runtime_version.Domain.PUBLIC,
     6,
-    33,
+    31,
     1,
     '',
     'protobuf.proto'
@@ -22,23 +22,38 @@ _runtime_version.ValidateProtobufRuntimeVersion(
 _sym_db = _symbol_database.Default()
 
 
+from google.protobuf import duration_pb2 as google_dot_protobuf_dot_duration__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from google.protobuf import wrappers_pb2 as google_dot_protobuf_dot_wrappers__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eprotobuf.proto\"\xf6\x01\n\rFieldsMessage\x12\x13\n\x0bint32_field\x18\x01 \x01(\x05\x12\x13\n\x0b\x66loat_field\x18\x02 \x01(\x02\x12\x14\n\x0c\x64ouble_field\x18\x03 \x01(\x01\x12\x12\n\nbool_field\x18\x04 \x01(\x08\x12\x14\n\x0cstring_field\x18\x05 \x01(\t\x12\x13\n\x0b\x62ytes_field\x18\x06 \x01(\x0c\x12\x1d\n\x15repeated_string_field\x18\x07 \x03(\t\x12\x1e\n\x0cnested_field\x18\x08 \x01(\x0b\x32\x08.Account\x12\'\n\x15repeated_nested_field\x18\t \x03(\x0b\x32\x08.Account\"\'\n\x11GetAccountRequest\x12\x12\n\naccount_id\x18\x01 \x01(\t\"P\n\x07\x41\x63\x63ount\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07\x62\x61lance\x18\x02 \x01(\x05\x12\"\n\x08settings\x18\x03 \x01(\x0b\x32\x10.AccountSettings\"$\n\x0f\x41\x63\x63ountSettings\x12\x11\n\tis_public\x18\x01 \x01(\x08\x32o\n\x0fTestCaseService\x12.\n\nTestFields\x12\x0e.FieldsMessage\x1a\x0e.FieldsMessage\"\x00\x12,\n\nGetAccount\x12\x12.GetAccountRequest\x1a\x08.Account\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eprotobuf.proto\x1a\x1egoogle/protobuf/duration.proto\x1a\x1fgoogle/protobuf/timestamp.proto\x1a\x1egoogle/protobuf/wrappers.proto\"\xf6\x01\n\rFieldsMessage\x12\x13\n\x0bint32_field\x18\x01 \x01(\x05\x12\x13\n\x0b\x66loat_field\x18\x02 \x01(\x02\x12\x14\n\x0c\x64ouble_field\x18\x03 \x01(\x01\x12\x12\n\nbool_field\x18\x04 \x01(\x08\x12\x14\n\x0cstring_field\x18\x05 \x01(\t\x12\x13\n\x0b\x62ytes_field\x18\x06 \x01(\x0c\x12\x1d\n\x15repeated_string_field\x18\x07 \x03(\t\x12\x1e\n\x0cnested_field\x18\x08 \x01(\x0b\x32\x08.Account\x12\'\n\x15repeated_nested_field\x18\t \x03(\x0b\x32\x08.Account\"\'\n\x11GetAccountRequest\x12\x12\n\naccount_id\x18\x01 \x01(\t\"P\n\x07\x41\x63\x63ount\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x0f\n\x07\x62\x61lance\x18\x02 \x01(\x05\x12\"\n\x08settings\x18\x03 \x01(\x0b\x32\x10.AccountSettings\"$\n\x0f\x41\x63\x63ountSettings\x12\x11\n\tis_public\x18\x01 \x01(\x08\"\xbc\x05\n\x0cTypesMessage\x12\x13\n\x0bint64_field\x18\x01 \x01(\x03\x12\x14\n\x0cuint64_field\x18\x02 \x01(\x04\x12\x14\n\x0csint32_field\x18\x03 \x01(\x11\x12\x15\n\rfixed32_field\x18\x04 \x01(\x07\x12\x16\n\x0esfixed64_field\x18\x05 \x01(\x10\x12\x17\n\x06status\x18\x06 \x01(\x0e\x32\x07.Status\x12.\n\ncreated_at\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12&\n\x03ttl\x18\x08 \x01(\x0b\x32\x19.google.protobuf.Duration\x12\x33\n\x0eoptional_count\x18\t \x01(\x0b\x32\x1b.google.protobuf.Int64Value\x12-\n\x08\x63ounters\x18\n \x03(\x0b\x32\x1b.TypesMessage.CountersEntry\x12-\n\x08\x61\x63\x63ounts\x18\x0b \x03(\x0b\x32\x1b.TypesMessage.AccountsEntry\x12\x0f\n\x07samples\x18\x0c \x03(\x05\x12\x10\n\x08readings\x18\r \x03(\x01\x12\x15\n\x08nickname\x18\x0e \x01(\tH\x00\x88\x01\x01\x12\x0f\n\x07payload\x18\x0f \x01(\x0c\x12\x0e\n\x06ratios\x18\x10 \x03(\x02\x12\r\n\x05ticks\x18\x11 \x03(\x03\x12\x0e\n\x06\x64\x65ltas\x18\x12 \x03(\x12\x12\x0b\n\x03ids\x18\x13 \x03(\x04\x12\r\n\x05\x66lags\x18\x14 \x03(\x07\x12\x0f\n\x07offsets\x18\x15 \x03(\x10\x12\x18\n\x07history\x18\x16 \x03(\x0e\x32\x07.Status\x1a/\n\rCountersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x1a\x39\n\rAccountsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\x17\n\x05value\x18\x02 \x01(\x0b\x32\x08.Account:\x02\x38\x01\x42\x0b\n\t_nickname*C\n\x06Status\x12\x12\n\x0eSTATUS_UNKNOWN\x10\x00\x12\x11\n\rSTATUS_ACTIVE\x10\x01\x12\x12\n\x0eSTATUS_BLOCKED\x10\x02\x32o\n\x0fTestCaseService\x12.\n\nTestFields\x12\x0e.FieldsMessage\x1a\x0e.FieldsMessage\"\x00\x12,\n\nGetAccount\x12\x12.GetAccountRequest\x1a\x08.Account\"\x00\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
 _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'protobuf_pb2', _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
-  _globals['_FIELDSMESSAGE']._serialized_start=19
-  _globals['_FIELDSMESSAGE']._serialized_end=265
-  _globals['_GETACCOUNTREQUEST']._serialized_start=267
-  _globals['_GETACCOUNTREQUEST']._serialized_end=306
-  _globals['_ACCOUNT']._serialized_start=308
-  _globals['_ACCOUNT']._serialized_end=388
-  _globals['_ACCOUNTSETTINGS']._serialized_start=390
-  _globals['_ACCOUNTSETTINGS']._serialized_end=426
-  _globals['_TESTCASESERVICE']._serialized_start=428
-  _globals['_TESTCASESERVICE']._serialized_end=539
+  _globals['_TYPESMESSAGE_COUNTERSENTRY']._loaded_options = None
+  _globals['_TYPESMESSAGE_COUNTERSENTRY']._serialized_options = b'8\001'
+  _globals['_TYPESMESSAGE_ACCOUNTSENTRY']._loaded_options = None
+  _globals['_TYPESMESSAGE_ACCOUNTSENTRY']._serialized_options = b'8\001'
+  _globals['_STATUS']._serialized_start=1228
+  _globals['_STATUS']._serialized_end=1295
+  _globals['_FIELDSMESSAGE']._serialized_start=116
+  _globals['_FIELDSMESSAGE']._serialized_end=362
+  _globals['_GETACCOUNTREQUEST']._serialized_start=364
+  _globals['_GETACCOUNTREQUEST']._serialized_end=403
+  _globals['_ACCOUNT']._serialized_start=405
+  _globals['_ACCOUNT']._serialized_end=485
+  _globals['_ACCOUNTSETTINGS']._serialized_start=487
+  _globals['_ACCOUNTSETTINGS']._serialized_end=523
+  _globals['_TYPESMESSAGE']._serialized_start=526
+  _globals['_TYPESMESSAGE']._serialized_end=1226
+  _globals['_TYPESMESSAGE_COUNTERSENTRY']._serialized_start=1107
+  _globals['_TYPESMESSAGE_COUNTERSENTRY']._serialized_end=1154
+  _globals['_TYPESMESSAGE_ACCOUNTSENTRY']._serialized_start=1156
+  _globals['_TYPESMESSAGE_ACCOUNTSENTRY']._serialized_end=1213
+  _globals['_TESTCASESERVICE']._serialized_start=1297
+  _globals['_TESTCASESERVICE']._serialized_end=1408
 # @@protoc_insertion_point(module_scope)
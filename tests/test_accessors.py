@@ -0,0 +1,107 @@
+import functools
+import unittest
+from collections import OrderedDict
+from types import MappingProxyType
+
+from protolizer import fields
+from protolizer.fields import compile_accessor, get_attribute
+
+
+class Owner:
+    name = 'john'
+
+    def get_name(self):
+        return self.name
+
+    def greet(self, other):
+        return 'hi ' + other
+
+
+class Row:
+
+    def __init__(self):
+        self.title = 'row'
+        self.owner = Owner()
+        self.missing_key = {}
+
+    def label(self):
+        return 'label'
+
+    def broken(self):
+        raise KeyError('nope')
+
+    def partial(self, suffix='!'):
+        return 'partial' + suffix
+
+
+def bound_field(source):
+    field = fields.CharField()
+    field.source = source
+    field.bind(field_name=source.split('.')[0], parent=None)
+    return field
+
+
+class AccessorTestCase(unittest.TestCase):
+
+    def test_matches_get_attribute(self):
+        row = Row()
+        row.partial_value = functools.partial(row.partial, suffix='?')
+        row.builtin = len
+        cases = [
+            (row, ('title',)),
+            (row, ('label',)),
+            (row, ('greet_missing',)),
+            (row, ('owner', 'name')),
+            (row, ('owner', 'get_name')),
+            (row, ('owner', 'missing')),
+            (row, ('partial_value',)),
+            ({'title': 'dict'}, ('title',)),
+            ({'title': None}, ('title',)),
+            ({}, ('title',)),
+            ({'owner': Owner()}, ('owner', 'get_name')),
+            (OrderedDict(title='ordered'), ('title',)),
+            (MappingProxyType({'title': 'proxy'}), ('title',)),
+            (MappingProxyType({}), ('title',)),
+            (row, ()),
+        ]
+        for instance, attrs in cases:
+            with self.subTest(instance=instance, attrs=attrs):
+                accessor = compile_accessor(attrs, type(instance))
+                self.assertEqual(accessor(instance), get_attribute(instance, list(attrs)))
+
+    def test_callables(self):
+        row = Row()
+        accessor = compile_accessor(('owner',), Row)
+        self.assertIs(accessor(row), row.owner)
+        # Methods with required arguments are returned, not called.
+        self.assertEqual(get_attribute(row, ['owner', 'greet']).__name__, 'greet')
+        self.assertEqual(compile_accessor(('label',), Row)(row), 'label')
+        self.assertEqual(compile_accessor(('partial',), Row)(row), 'partial!')
+
+        with self.assertRaises(ValueError):
+            compile_accessor(('broken',), Row)(row)
+        row.builtin = len
+        with self.assertRaises(ValueError):
+            compile_accessor(('builtin',), Row)(row)
+
+    def test_field_specialises_on_first_type(self):
+        field = bound_field('owner.name')
+        self.assertIsNone(field._accessor)
+        self.assertEqual(field.get_attribute(Row()), 'john')
+        self.assertIs(field._accessor[0], Row)
+        # Other types use the generic lookup.
+        self.assertEqual(field.get_attribute({'owner': {'name': 'jane'}}), 'jane')
+        self.assertIs(field._accessor[0], Row)
+        self.assertEqual(field.get_attribute(Row()), 'john')
+
+        field.bind(field_name='owner', parent=None)
+        self.assertIsNone(field._accessor)
+        self.assertEqual(field.get_attribute({'owner': {'name': 'jane'}}), 'jane')
+        self.assertIs(field._accessor[0], dict)
+
+    def test_source_star(self):
+        field = fields.DictField()
+        field.source = '*'
+        field.bind(field_name='everything', parent=None)
+        row = Row()
+        self.assertIs(field.get_attribute(row), row)
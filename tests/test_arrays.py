@@ -0,0 +1,126 @@
+import array
+import unittest
+
+from google.protobuf.json_format import ParseDict, ParseError
+
+from protolizer import Serializer, fields
+from protolizer.arrays import numpy, pack_repeated
+from protolizer.exceptions import InvalidDataError
+from protolizer.writer import write_message
+from tests.config.generated_proto.protobuf_pb2 import TypesMessage
+
+
+class TelemetrySerializer(Serializer):
+    samples = fields.ListField(fields.IntField(), as_array=True)
+    readings = fields.ListField(fields.FloatField(), as_array=True)
+    ticks = fields.ListField(fields.IntField())
+
+    class Meta:
+        schema = TypesMessage
+
+
+class ListFieldArrayTestCase(unittest.TestCase):
+
+    def test_as_array_requires_numeric_child(self):
+        with self.assertRaises(ValueError):
+            fields.ListField(fields.CharField(), as_array=True)
+        with self.assertRaises(ValueError):
+            fields.ListField(as_array=True)
+
+    def test_array_module_input(self):
+        field = fields.ListField(fields.IntField())
+        self.assertEqual(field.run_validation(array.array('i', [1, 2, 3])), [1, 2, 3])
+        field = fields.ListField(fields.FloatField())
+        self.assertEqual(field.run_validation(array.array('d', [0.5])), [0.5])
+
+    def test_invalid_values_raise_field_errors(self):
+        field = fields.ListField(fields.IntField(), as_array=True)
+        with self.assertRaises(InvalidDataError):
+            field.run_validation([1, 'x'])
+
+
+@unittest.skipIf(numpy is None, 'NumPy is not installed')
+class NumpyArrayTestCase(unittest.TestCase):
+
+    def test_vectorized_coercion(self):
+        field = fields.ListField(fields.IntField(), as_array=True)
+        result = field.run_validation(numpy.array([1.9, -2.0, 3.0]))
+        self.assertEqual(result.dtype, numpy.int64)
+        self.assertEqual(result.tolist(), [1, -2, 3])
+        self.assertEqual(field.run_validation(['1', 2]).tolist(), [1, 2])
+
+        field = fields.ListField(fields.IntField())
+        self.assertEqual(field.run_validation(numpy.arange(3, dtype=numpy.uint8)), [0, 1, 2])
+        with self.assertRaises(InvalidDataError):
+            field.run_validation(numpy.array([1.0, numpy.nan]))
+
+    def test_serializer_round_trip(self):
+        serializer = TelemetrySerializer(data={
+            'samples': numpy.arange(-5, 300, dtype=numpy.int32),
+            'readings': numpy.linspace(0, 1, 5),
+            'ticks': numpy.array([2 ** 40, 1]),
+        })
+        self.assertTrue(serializer.is_valid())
+        self.assertIsInstance(serializer.validated_data['samples'], numpy.ndarray)
+        self.assertEqual(serializer.validated_data['ticks'], [2 ** 40, 1])
+
+        message = TypesMessage(
+            samples=list(range(-5, 300)),
+            readings=numpy.linspace(0, 1, 5).tolist(),
+            ticks=[2 ** 40, 1],
+        )
+        self.assertEqual(serializer.protobuf, message)
+
+        data = TelemetrySerializer(message).data
+        self.assertEqual(data['samples'].tolist(), list(range(-5, 300)))
+        self.assertEqual(data['ticks'], [2 ** 40, 1])
+
+    def test_packed_encoding_matches_protobuf(self):
+        values = [0, 1, -1, 127, 128, 2 ** 31 - 1, -2 ** 31]
+        for name, data, dtype in [
+            ('samples', values, numpy.int32),
+            ('ticks', values + [2 ** 62, -2 ** 63], numpy.int64),
+            ('deltas', values + [2 ** 62, -2 ** 63], numpy.int64),
+            ('ids', [0, 1, 300, 2 ** 64 - 1], numpy.uint64),
+            ('flags', [0, 7, 2 ** 32 - 1], numpy.uint32),
+            ('offsets', values, numpy.int32),
+            ('history', [0, 2, 1], numpy.int8),
+            ('readings', [0.5, -1e300], numpy.float64),
+            ('ratios', [0.1, 3.0], numpy.float32),
+            ('samples', [], numpy.int32),
+        ]:
+            with self.subTest(field=name):
+                field = TypesMessage.DESCRIPTOR.fields_by_name[name]
+                self.assertIsNotNone(pack_repeated(field, numpy.array(data, dtype=dtype)))
+                message = write_message({name: numpy.array(data, dtype=dtype)}, TypesMessage())
+                self.assertEqual(message, TypesMessage(**{name: data}))
+                self.assertEqual(
+                    message.SerializeToString(deterministic=True),
+                    TypesMessage(**{name: data}).SerializeToString(deterministic=True),
+                )
+
+    def test_writer_replaces_existing_values(self):
+        message = TypesMessage(samples=[9, 9])
+        write_message({'samples': numpy.array([1, 2], dtype=numpy.int16)}, message)
+        self.assertEqual(list(message.samples), [1, 2])
+
+    def test_out_of_range_values_match_parse_dict(self):
+        for data in [
+            {'samples': numpy.array([2 ** 31])},
+            {'samples': numpy.array([1.5])},
+            {'samples': numpy.array([True])},
+            {'ratios': numpy.array([numpy.inf])},
+            {'ratios': numpy.array([1e39])},
+        ]:
+            with self.subTest(data=data):
+                with self.assertRaises(ParseError):
+                    ParseDict({key: value.tolist() for key, value in data.items()}, TypesMessage())
+                with self.assertRaises(ParseError):
+                    write_message(data, TypesMessage())
+
+        message = write_message({'samples': numpy.array([1.0, 2.0])}, TypesMessage())
+        self.assertEqual(list(message.samples), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+import asyncio
+import gc
+import unittest
+import warnings
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.exceptions import InvalidDataError
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+    async def validate_is_public(self, value):
+        await asyncio.sleep(0)
+        return bool(value)
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    async def validate_username(value):
+        await asyncio.sleep(0.01)
+        if value == 'blocked':
+            raise ValidationError('User is blocked')
+        return value.upper()
+
+
+class CustomSerializer(Serializer):
+    username = fields.CharField(custom=True)
+    balance = fields.IntField()
+
+    running = 0
+    peak = 0
+
+    class Meta:
+        schema = Account
+        async_concurrency = 2
+
+    @classmethod
+    async def get_custom_username(cls, obj):
+        cls.running += 1
+        cls.peak = max(cls.peak, cls.running)
+        await asyncio.sleep(0.01)
+        cls.running -= 1
+        return 'user-%s' % obj['balance']
+
+
+class FailingSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    finished = []
+    cancelled = []
+
+    class Meta:
+        schema = Account
+
+    @classmethod
+    async def validate_username(cls, value):
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            cls.cancelled.append(value)
+            raise
+        cls.finished.append(value)
+        return value
+
+    @staticmethod
+    async def validate_balance(value):
+        await asyncio.sleep(0)
+        if value < 0:
+            raise RuntimeError('backend unavailable')
+        return value
+
+
+class AsyncSerializerTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_coroutine_hooks(self):
+        serializer = AccountSerializer(data={'username': 'john', 'balance': 1, 'settings': {'is_public': 1}})
+        self.assertTrue(await serializer.ais_valid())
+        self.assertEqual(serializer.validated_data, {'username': 'JOHN', 'balance': 1, 'settings': {'is_public': True}})
+        self.assertEqual(await serializer.aprotobuf, Account(
+            username='JOHN', balance=1, settings=AccountSettings(is_public=True)
+        ))
+
+    async def test_pending_hooks_are_dropped_on_invalid_data(self):
+        CustomSerializer.running = 0
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            with self.assertRaises(InvalidDataError):
+                await AccountSerializer(data={'username': 'john', 'balance': 'abc'}).ais_valid()
+            with self.assertRaises(InvalidDataError):
+                await CustomSerializer(data={'balance': 'abc'}).ais_valid()
+            gc.collect()
+        self.assertEqual([str(warning.message) for warning in caught], [])
+        # The getter never started.
+        self.assertEqual(CustomSerializer.running, 0)
+
+    async def test_errors(self):
+        serializer = AccountSerializer(data={'username': 'blocked', 'balance': 1})
+        self.assertFalse(await serializer.ais_valid())
+        self.assertEqual(serializer.errors, {'username': 'User is blocked'})
+        with self.assertRaises(ValidationError):
+            await AccountSerializer(data={'username': 'blocked'}).ais_valid(raise_exception=True)
+
+        serializer = AccountSerializer(data=[{'username': 'john'}, {'username': 'blocked'}], many=True)
+        self.assertFalse(await serializer.ais_valid())
+        self.assertEqual(serializer.errors, [{}, {'username': 'User is blocked'}])
+
+    async def test_many_items_run_concurrently(self):
+        items = [{'username': 'user-%d' % index, 'balance': index} for index in range(20)]
+        serializer = AccountSerializer(items, many=True)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        data = await serializer.adata
+        self.assertLess(loop.time() - start, 0.15)
+        self.assertEqual(data[3], {'username': 'USER-3', 'balance': 3, 'settings': None})
+        self.assertEqual(len(await serializer.aprotobuf), 20)
+
+    async def test_concurrency_limit(self):
+        CustomSerializer.peak = 0
+        data = await CustomSerializer([{'balance': index} for index in range(6)], many=True).adata
+        self.assertEqual(data[5], {'username': 'user-5', 'balance': 5})
+        self.assertEqual(CustomSerializer.peak, 2)
+
+        CustomSerializer.peak = 0
+        serializer = CustomSerializer(data=[{'balance': index} for index in range(6)], many=True)
+        self.assertTrue(await serializer.ais_valid(concurrency=1))
+        self.assertEqual(CustomSerializer.peak, 1)
+
+    async def test_failing_hook_cancels_the_others(self):
+        FailingSerializer.finished, FailingSerializer.cancelled = [], []
+        with self.assertRaises(RuntimeError):
+            await FailingSerializer(data={'username': 'john', 'balance': -1}).ais_valid()
+        with self.assertRaises(RuntimeError):
+            await FailingSerializer(data=[
+                {'username': 'jane', 'balance': 1}, {'username': 'joe', 'balance': -1},
+            ], many=True).ais_valid()
+        # The siblings were cancelled and awaited before the error propagated.
+        self.assertEqual(sorted(FailingSerializer.cancelled), ['jane', 'joe', 'john'])
+        await asyncio.sleep(0.1)
+        self.assertEqual(FailingSerializer.finished, [])
+
+    async def test_requires_validation(self):
+        with self.assertRaises(AssertionError):
+            await AccountSerializer(data={'username': 'john'}).adata
+
+
+if __name__ == '__main__':
+    unittest.main()
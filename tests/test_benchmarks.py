@@ -0,0 +1,71 @@
+import copy
+import io
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from benchmarks import runner
+from benchmarks.suite import get_cases
+
+
+class BenchmarkRunnerTestCase(unittest.TestCase):
+
+    def test_cases(self):
+        names = [case.name for case in get_cases((1, 1000))]
+        self.assertIn('account.to_data[1000]', names)
+        self.assertIn('account.single_to_protobuf[1]', names)
+        self.assertNotIn('account.single_to_protobuf[1000]', names)
+        for case in get_cases((2,)):
+            with case.context():
+                case.setup(case.size)()
+
+    def test_baselines(self):
+        cases = {case.name: case for case in get_cases((1, 1000))}
+        self.assertEqual(cases['metrics.to_protobuf[1000]'].baseline, 'account.to_protobuf[1000]')
+        self.assertEqual(cases['metrics.to_protobuf[1]'].max_overhead, 0.05)
+        self.assertEqual(cases['metrics.to_protobuf[1000]'].max_overhead, 0.03)
+        self.assertEqual(cases['compiled.to_representation[1]'].baseline, 'flat.to_representation[1]')
+        self.assertAlmostEqual(cases['compiled.to_representation[1]'].max_overhead, -2 / 3)
+        for case in cases.values():
+            if case.baseline is not None:
+                self.assertIn(case.baseline, cases)
+
+        overhead = runner.measure_overhead(cases['metrics.to_protobuf[1]'], cases['account.to_protobuf[1]'], rounds=2)
+        self.assertIsInstance(overhead, float)
+        with unittest.mock.patch.object(runner, 'measure_overhead', return_value=0.01):
+            self.assertTrue(runner.check((1, 1000), pattern='metrics', out=None))
+        with unittest.mock.patch.object(runner, 'measure_overhead', return_value=0.04):
+            self.assertFalse(runner.check((1, 1000), pattern='metrics', out=None))
+            with unittest.mock.patch('sys.stdout', io.StringIO()):
+                self.assertEqual(runner.main(['check', '--sizes', '1', '--filter', 'metrics']), 0)
+                self.assertEqual(runner.main(['check', '--sizes', '1000', '--filter', 'metrics']), 1)
+
+    def test_run_and_compare(self):
+        recording = runner.run((1,), pattern='account.single', repeat=1, min_time=0.001, out=None)
+        self.assertEqual(sorted(recording['results']), ['account.single_to_data[1]', 'account.single_to_protobuf[1]'])
+        self.assertIn('protobuf', recording['meta'])
+
+        slower = copy.deepcopy(recording)
+        slower['results']['account.single_to_data[1]']['min'] *= 1.5
+        del slower['results']['account.single_to_protobuf[1]']
+        rows = runner.compare(recording, slower)
+        self.assertEqual([row[:2] for row in rows], [
+            ('account.single_to_data[1]', 'regression'), ('account.single_to_protobuf[1]', 'missing'),
+        ])
+        self.assertEqual(runner.compare(slower, recording)[0][1], 'improvement')
+        self.assertFalse(runner.report(rows, out=io.StringIO()))
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline, current = os.path.join(directory, 'baseline.json'), os.path.join(directory, 'current.json')
+            runner.save(recording, baseline)
+            runner.save(slower, current)
+            self.assertEqual(runner.load(baseline), recording)
+            with unittest.mock.patch('sys.stdout', io.StringIO()):
+                self.assertEqual(runner.main(['compare', baseline, baseline]), 0)
+                self.assertEqual(runner.main(['compare', baseline, current]), 1)
+                self.assertEqual(runner.main(['compare', baseline, current, '--threshold', '1']), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
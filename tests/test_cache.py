@@ -0,0 +1,101 @@
+import json
+import unittest
+
+from protolizer import Serializer, fields
+from protolizer.cache import LRU, thaw
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    pre_serialized = 0
+
+    class Meta:
+        schema = Account
+        cache = LRU(maxsize=2)
+
+    def pre_serialize(self, data):
+        AccountSerializer.pre_serialized += 1
+        data['settings']['is_public'] = True
+        return data
+
+
+def account(index):
+    return Account(username='user-%d' % index, balance=index, settings=AccountSettings(is_public=False))
+
+
+class MessageCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = AccountSerializer.Meta.cache
+        self.cache.clear()
+        self.cache.hits = self.cache.misses = self.cache.evictions = 0
+        AccountSerializer.pre_serialized = 0
+
+    def test_hits(self):
+        expected = {'username': 'user-1', 'balance': 1, 'settings': {'is_public': None}}
+        self.assertEqual(AccountSerializer(account(1)).data, expected)
+        serializer = AccountSerializer(account(1))
+        self.assertIsInstance(serializer.instance, Account)
+        self.assertEqual(serializer.data, expected)
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'bytes': 12})
+        self.assertEqual(json.loads(json.dumps(serializer.data)), expected)
+
+    def test_data_is_frozen(self):
+        data = AccountSerializer(account(1)).data
+        with self.assertRaises(TypeError):
+            data['settings']['is_public'] = True
+        with self.assertRaises(TypeError):
+            data['settings'].update(is_public=True)
+        data['username'] = 'changed'
+        copy = thaw(data)
+        copy['settings']['is_public'] = True
+        self.assertEqual(AccountSerializer(account(1)).data['username'], 'user-1')
+
+    def test_protobuf(self):
+        message = AccountSerializer(account(1)).protobuf
+        self.assertEqual(message, Account(username='user-1', balance=1, settings=AccountSettings(is_public=True)))
+        message.username = 'changed'
+        self.assertEqual(AccountSerializer(account(1)).protobuf.username, 'user-1')
+        self.assertEqual(AccountSerializer.pre_serialized, 1)
+
+    def test_key(self):
+        AccountSerializer(account(1)).data
+        AccountSerializer(account(1), context={'a': 1}).data
+        AccountSerializer(account(1), fields=['username']).data
+        self.assertEqual(self.cache.stats['misses'], 3)
+        self.assertEqual(AccountSerializer(account(1), fields=['username']).data, {'username': 'user-1'})
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+        AccountSerializer(account(1), context={'request': {}}).data
+        AccountSerializer({'username': 'john'}).data
+        self.assertEqual(self.cache.stats['misses'], 3)
+
+    def test_eviction(self):
+        for index in (1, 2, 1, 3):
+            AccountSerializer(account(index)).data
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 3, 'evictions': 1, 'size': 2, 'bytes': 24})
+        AccountSerializer(account(1)).data
+        self.assertEqual(self.cache.stats['hits'], 2)
+
+        cache = LRU(maxsize=10, max_bytes=30)
+        for index in range(5):
+            cache.put(index, {}, 12)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats['evictions'], 3)
+        with self.assertRaises(ValueError):
+            LRU(maxsize=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
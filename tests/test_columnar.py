@@ -0,0 +1,100 @@
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.columnar import numpy
+from protolizer.exceptions import InvalidDataError
+from tests.config.generated_proto.protobuf_pb2 import Account, FieldsMessage
+
+
+class RowSerializer(Serializer):
+    int32_field = fields.IntField()
+    float_field = fields.FloatField()
+    bool_field = fields.BooleanField()
+    string_field = fields.CharField(trim_whitespace=True)
+    nested_field = Serializer()
+
+    class Meta:
+        schema = FieldsMessage
+
+    @staticmethod
+    def validate_int32_field(value):
+        if value is not None and int(value) < 0:
+            raise ValidationError('Must be positive')
+        return int(value) if value is not None else value
+
+
+class ColumnarAccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+        columnar = True
+
+
+ROWS = [
+    {'int32_field': 1, 'float_field': 1.5, 'bool_field': True, 'string_field': ' a ', 'nested_field': {}},
+    {'int32_field': '2', 'float_field': 2, 'bool_field': 'false', 'string_field': 'b'},
+    {'int32_field': None, 'bool_field': None, 'string_field': 3},
+]
+
+
+class ColumnarTestCase(unittest.TestCase):
+
+    def assertSameAsRows(self, rows):
+        expected = RowSerializer(data=rows, many=True)
+        serializer = RowSerializer(data=rows, many=True, columnar=True)
+        self.assertEqual(serializer.is_valid(), expected.is_valid())
+        self.assertEqual(serializer.validated_data, expected.validated_data)
+        self.assertEqual(serializer.errors, expected.errors)
+        return serializer
+
+    def test_matches_row_validation(self):
+        self.assertSameAsRows(ROWS)
+        self.assertSameAsRows([{'int32_field': value, 'float_field': value, 'bool_field': 1} for value in range(10)])
+        self.assertSameAsRows([])
+
+    def test_hook_errors_are_reported_per_row(self):
+        serializer = self.assertSameAsRows(ROWS + [{'int32_field': -1}])
+        self.assertEqual(serializer.errors[3], {'int32_field': 'Must be positive'})
+        self.assertEqual(serializer.errors[0], {})
+
+    def test_first_invalid_value_is_raised(self):
+        rows = [{'int32_field': 1, 'bool_field': 'x'}, {'int32_field': 'y'}]
+        with self.assertRaises(InvalidDataError) as ctx:
+            RowSerializer(data=rows, many=True, columnar=True).is_valid()
+        self.assertEqual(ctx.exception.field, 'bool_field')
+
+    def test_columns_are_returned_directly(self):
+        serializer = ColumnarAccountSerializer(
+            data=[{'username': 'a', 'balance': 1}, {'username': 'b', 'balance': 2}],
+            many=True,
+        )
+        self.assertTrue(serializer.is_valid())
+        columns = serializer.validated_columns
+        self.assertEqual(list(columns['username']), ['a', 'b'])
+        self.assertEqual(list(columns['balance']), [1, 2])
+        self.assertEqual(serializer.validated_data, [{'username': 'a', 'balance': 1}, {'username': 'b', 'balance': 2}])
+        self.assertEqual([message.balance for message in serializer.protobuf], [1, 2])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_numeric_columns_use_numpy(self):
+        serializer = ColumnarAccountSerializer(data=[{'username': 'a', 'balance': 1.0}], many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertIsInstance(serializer.validated_columns['balance'], numpy.ndarray)
+        self.assertIs(type(serializer.validated_data[0]['balance']), int)
+
+    def test_stateless_calls_keep_no_columns(self):
+        rows = [{'username': 'a', 'balance': 1}]
+        self.assertEqual(ColumnarAccountSerializer.load(rows, many=True), [{'username': 'a', 'balance': 1}])
+        shared = ColumnarAccountSerializer._shared_instance(many=True)  # noqa
+        self.assertNotIn('_validated_columns', shared.__dict__)
+
+    def test_unsupported_data_falls_back_to_rows(self):
+        serializer = ColumnarAccountSerializer(data=[{'username': 'a'}, None], many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, [{'username': 'a', 'balance': None}, None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.exceptions import InvalidDataError
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings, FieldsMessage
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField(trim_whitespace=True)
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+class CompiledFieldsSerializer(Serializer):
+    int32_field = fields.IntField()
+    float_field = fields.FloatField(default=0.0)
+    bool_field = fields.BooleanField()
+    string_field = fields.CharField(custom=True)
+    repeated_string_field = fields.ListField(fields.CharField())
+
+    class Meta:
+        schema = FieldsMessage
+        compile = True
+
+    @staticmethod
+    def get_custom_string_field(obj):
+        return obj.int32_field * 2
+
+
+class FlatSerializer(Serializer):
+    int32_field = fields.IntField()
+    float_field = fields.FloatField()
+    bool_field = fields.BooleanField()
+    string_field = fields.CharField()
+
+
+class CompiledFlatSerializer(FlatSerializer):
+
+    class Meta:
+        compile = True
+
+
+class DynamicSerializer(CompiledAccountSerializer):
+
+    def get_fields(self):
+        return {'username': fields.CharField()}
+
+
+class CompilerTestCase(unittest.TestCase):
+
+    def test_only_opted_in_classes_are_compiled(self):
+        self.assertIsNone(AccountSerializer._compiled)  # noqa
+        self.assertIsNotNone(CompiledAccountSerializer._compiled)  # noqa
+        self.assertIsNone(DynamicSerializer._compiled)  # noqa
+
+    def test_source_is_inspectable(self):
+        source = CompiledAccountSerializer._compiled.source  # noqa
+        self.assertIn('def to_internal_value(self, data):', source)
+        self.assertIn('def to_representation(self, instance):', source)
+        self.assertIn('int(v)', source)
+        self.assertIn('field_2.run_validation(v)', source)
+
+    def test_matches_generic_serializer(self):
+        for payload in [
+            {'username': ' John ', 'balance': 12, 'settings': {'is_public': 'true'}},
+            {'username': None, 'balance': 1},
+            {'balance': 0},
+            Account(username='John', balance=10, settings=AccountSettings(is_public=True)),
+        ]:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    CompiledAccountSerializer(payload).data,
+                    AccountSerializer(payload).data
+                )
+                expected = AccountSerializer(data=payload)
+                serializer = CompiledAccountSerializer(data=payload)
+                self.assertEqual(serializer.is_valid(), expected.is_valid())
+                self.assertEqual(serializer.validated_data, expected.validated_data)
+                self.assertEqual(serializer.protobuf, expected.protobuf)
+
+    def test_inlined_coercion_matches_generic_fields(self):
+        for payload in [
+            {'int32_field': 1, 'float_field': 1.5, 'bool_field': True, 'string_field': 'a'},
+            {'int32_field': True, 'float_field': 2, 'bool_field': 'false', 'string_field': 3},
+            {'int32_field': '7', 'float_field': '0.5', 'bool_field': 1, 'string_field': b'b'},
+            {'bool_field': None},
+        ]:
+            with self.subTest(payload=payload):
+                expected = FlatSerializer().to_internal_value(payload)
+                result = CompiledFlatSerializer().to_internal_value(payload)
+                self.assertEqual(result, expected)
+                self.assertEqual([type(value) for value in result.values()], [type(value) for value in expected.values()])
+                expected = FlatSerializer().to_representation(payload)
+                result = CompiledFlatSerializer().to_representation(payload)
+                self.assertEqual(result, expected)
+                self.assertEqual([type(value) for value in result.values()], [type(value) for value in expected.values()])
+
+    def test_validation_errors(self):
+        serializer = CompiledAccountSerializer(data={'username': 'John', 'balance': -1})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'balance': 'Balance must be positive'})
+
+        serializer = CompiledAccountSerializer(data={'balance': 'abc'})
+        with self.assertRaises(InvalidDataError) as ctx:
+            serializer.is_valid()
+        self.assertEqual(ctx.exception.field, 'balance')
+
+    def test_custom_fields_and_defaults(self):
+        serializer = CompiledFieldsSerializer({'int32_field': 2, 'bool_field': 0, 'repeated_string_field': [1, 2]})
+        self.assertEqual(serializer.data, {
+            'int32_field': 2,
+            'float_field': 0.0,
+            'bool_field': False,
+            'string_field': '4',
+            'repeated_string_field': ['1', '2'],
+        })
+
+    def test_instance_fields_disable_compiled_methods(self):
+        serializer = CompiledAccountSerializer({'username': 'John', 'balance': 1})
+        del serializer.fields['balance']
+        self.assertEqual(serializer.data, {'username': 'John', 'settings': None})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from datetime import datetime, timedelta
+
+from google.protobuf.json_format import MessageToDict
+
+from protolizer import Serializer, fields
+from protolizer.decoder import decode_message, get_reader_table
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings, FieldsMessage, TypesMessage
+
+
+class TypesSerializer(Serializer):
+    int64_field = fields.IntField()
+    created_at = fields.DateTimeField(fmt='%Y-%m-%dT%H:%M:%SZ')
+    status = fields.CharField()
+
+    class Meta:
+        schema = TypesMessage
+
+
+class WellKnownSerializer(Serializer):
+    created_at = fields.CharField()
+    ttl = fields.CharField()
+
+    class Meta:
+        schema = TypesMessage
+
+
+class CompiledWellKnownSerializer(Serializer):
+    created_at = fields.CharField()
+    ttl = fields.CharField()
+
+    class Meta:
+        schema = TypesMessage
+        compile = True
+
+
+class DecoderTestCase(unittest.TestCase):
+
+    def test_matches_message_to_dict_for_json_native_values(self):
+        message = FieldsMessage(
+            int32_field=1,
+            float_field=1.1,
+            bool_field=True,
+            string_field='foo',
+            bytes_field=b'foo',
+            repeated_string_field=['a', 'b'],
+            nested_field=Account(username='foo', settings=AccountSettings()),
+            repeated_nested_field=[Account(username='bar', balance=2)],
+        )
+        self.assertEqual(
+            decode_message(message),
+            MessageToDict(message, preserving_proto_field_name=True)
+        )
+
+    def test_reads_native_values(self):
+        message = TypesMessage(
+            int64_field=2 ** 40,
+            status=1,
+            ttl=timedelta(seconds=5),
+            optional_count={'value': 7},
+            counters={'a': 1},
+            accounts={'x': Account(username='foo')},
+            samples=[1, 2, 3],
+        )
+        message.created_at.FromDatetime(datetime(2024, 1, 15, 12, 0))
+        self.assertEqual(decode_message(message), {
+            'int64_field': 2 ** 40,
+            'status': 'STATUS_ACTIVE',
+            'created_at': datetime(2024, 1, 15, 12, 0),
+            'ttl': timedelta(seconds=5),
+            'optional_count': 7,
+            'counters': {'a': 1},
+            'accounts': {'x': {'username': 'foo'}},
+            'samples': [1, 2, 3],
+        })
+
+    def test_reader_tables_are_cached(self):
+        self.assertIs(
+            get_reader_table(TypesMessage.DESCRIPTOR),
+            get_reader_table(TypesMessage.DESCRIPTOR)
+        )
+
+    def test_serializer_uses_native_values(self):
+        message = TypesMessage(int64_field=2 ** 40, status=2)
+        message.created_at.FromDatetime(datetime(2024, 1, 15, 12, 0))
+        serializer = TypesSerializer(message)
+        self.assertEqual(serializer.data, {
+            'int64_field': 2 ** 40,
+            'created_at': '2024-01-15T12:00:00Z',
+            'status': 'STATUS_BLOCKED',
+        })
+
+    def test_well_known_types_round_trip_through_char_fields(self):
+        message = TypesMessage(ttl=timedelta(seconds=5))
+        message.created_at.FromDatetime(datetime(2024, 1, 2, 3, 4, 5))
+        serializer = WellKnownSerializer(message)
+        self.assertEqual(serializer.data, {'created_at': '2024-01-02T03:04:05Z', 'ttl': '5s'})
+        self.assertEqual(serializer.protobuf, message)
+
+    def test_char_fields_format_well_known_types_as_before(self):
+        message = TypesMessage(ttl=timedelta(seconds=1, microseconds=500000))
+        message.created_at.FromDatetime(datetime(2024, 1, 2, 3, 4, 5, 250000))
+        serializer = WellKnownSerializer(message)
+        self.assertEqual(serializer.data, {
+            'created_at': message.created_at.ToJsonString(),
+            'ttl': message.ttl.ToJsonString(),
+        })
+        loaded = WellKnownSerializer(data=decode_message(message))
+        self.assertTrue(loaded.is_valid())
+        self.assertEqual(loaded.validated_data, serializer.data)
+        self.assertEqual(CompiledWellKnownSerializer(message).data, serializer.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import io
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from google.protobuf.json_format import ParseError
+
+from protolizer import Serializer, fields
+from protolizer.encoder import encode_message, get_encoder_table
+from protolizer.stream import DelimitedReader
+from protolizer.writer import write_message
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings, FieldsMessage, TypesMessage
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+
+class UpperAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+
+    def pre_serialize(self, data):
+        if isinstance(data, list):
+            return [self.pre_serialize(item) for item in data]
+        data['username'] = data['username'].upper()
+        return data
+
+
+class EncoderTestCase(unittest.TestCase):
+
+    def assertSameAsWriter(self, data, schema):
+        expected = write_message(data, schema()).SerializeToString(deterministic=True)
+        self.assertEqual(encode_message(data, schema), expected)
+
+    def test_matches_deterministic_serialization(self):
+        self.assertSameAsWriter({
+            'int32_field': -1,
+            'float_field': 1.1,
+            'double_field': -0.0,
+            'bool_field': True,
+            'string_field': 'héllo',
+            'bytes_field': 'Zm9v',
+            'repeated_string_field': ['a', ''],
+            'nested_field': {'username': 'foo', 'settings': {}},
+            'repeated_nested_field': [{'username': 'bar', 'balance': 2}, {}, Account(username='baz')],
+        }, FieldsMessage)
+        self.assertSameAsWriter({
+            'int64_field': -(2 ** 63),
+            'uint64_field': 2 ** 64 - 1,
+            'sint32_field': -5,
+            'fixed32_field': 7,
+            'sfixed64_field': -2,
+            'status': 'STATUS_ACTIVE',
+            'created_at': datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc),
+            'ttl': timedelta(seconds=1.5),
+            'optionalCount': 0,
+            'nickname': '',
+            'payload': b'Zm9v',
+            'samples': [1, -1, 0],
+            'readings': [0.5, -0.0],
+            'ratios': [0.25, 3],
+            'ticks': [],
+            'deltas': [-1, 1],
+            'ids': [0, 2 ** 64 - 1],
+            'flags': [1, 2],
+            'offsets': [-1],
+            'history': ['STATUS_BLOCKED', 1, 0],
+        }, TypesMessage)
+
+    def test_defaults_are_not_written(self):
+        self.assertEqual(encode_message({'username': '', 'balance': 0}, Account), b'')
+        self.assertEqual(encode_message({'username': None, 'settings': {}}, Account), b'\x1a\x00')
+        self.assertEqual(encode_message({'nickname': ''}, TypesMessage), b'r\x00')
+
+    def test_field_number_order(self):
+        self.assertSameAsWriter({'settings': {'is_public': True}, 'balance': 3, 'username': 'foo'}, Account)
+
+    def test_maps(self):
+        keys = ['', 'a', 'ab', 'abc', 'b', 'B', 'é', 'z\x00']
+        self.assertSameAsWriter({
+            'counters': {key: index for index, key in enumerate(keys)},
+            'accounts': {key: {'balance': index} for index, key in enumerate(reversed(keys))},
+        }, TypesMessage)
+
+    def test_fallback_to_writer(self):
+        self.assertSameAsWriter({
+            'int64_field': '12',
+            'created_at': '2024-01-15T12:00:00Z',
+            'ttl': '1.5s',
+            'ticks': ['7'],
+        }, TypesMessage)
+        with self.assertRaises(ParseError):
+            encode_message({'balance': 2 ** 40}, Account)
+        with self.assertRaises(ParseError):
+            encode_message({'unknown': 1}, Account)
+
+    def test_table(self):
+        table = get_encoder_table(Account.DESCRIPTOR)
+        self.assertIs(table, get_encoder_table(Account.DESCRIPTOR))
+        self.assertEqual(table['username'][0], 1)
+        self.assertIs(get_encoder_table(TypesMessage.DESCRIPTOR)['optionalCount'], get_encoder_table(TypesMessage.DESCRIPTOR)['optional_count'])
+
+
+class ToBytesTestCase(unittest.TestCase):
+
+    def test_to_bytes(self):
+        data = {'username': 'john', 'balance': 10, 'settings': {'is_public': True}}
+        serializer = AccountSerializer(data)
+        self.assertEqual(serializer.to_bytes(), serializer.protobuf.SerializeToString(deterministic=True))
+        self.assertEqual(Account.FromString(serializer.to_bytes()).username, 'john')
+
+        serializer = UpperAccountSerializer(data)
+        self.assertEqual(Account.FromString(serializer.to_bytes()).username, 'JOHN')
+
+    def test_many(self):
+        items = [{'username': 'user-%d' % index, 'balance': index, 'settings': None} for index in range(1, 4)]
+        serializer = UpperAccountSerializer(items, many=True)
+        payloads = serializer.to_bytes(delimited=False)
+        self.assertEqual(payloads, [message.SerializeToString(deterministic=True) for message in serializer.protobuf])
+        reader = DelimitedReader(io.BytesIO(serializer.to_bytes()), AccountSerializer)
+        self.assertEqual([message.username for message in reader], ['USER-1', 'USER-2', 'USER-3'])
+
+    def test_validated_data(self):
+        serializer = AccountSerializer(data={'username': 'john', 'balance': 1})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.to_bytes(), b'\n\x04john\x10\x01')
+
+    def test_without_schema(self):
+        class NoSchemaSerializer(Serializer):
+            name = fields.CharField()
+
+        with self.assertRaises(AttributeError):
+            NoSchemaSerializer({'name': 'foo'}).to_bytes()
@@ -0,0 +1,148 @@
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+    @staticmethod
+    def validate_is_public(value):
+        if not value:
+            raise ValidationError('Settings must be public')
+        return value
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    validated = 0
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_username(value):
+        if not value:
+            raise ValidationError('Username is required')
+        return value
+
+    @classmethod
+    def validate_balance(cls, value):
+        cls.validated += 1
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+class FailFastAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        fail_fast = True
+
+
+def account(index, balance=1):
+    return {'username': 'user-%d' % index, 'balance': balance, 'settings': {'is_public': True}}
+
+
+BAD = {'username': '', 'balance': -1, 'settings': {'is_public': False}}
+
+
+class FailFastTestCase(unittest.TestCase):
+
+    def setUp(self):
+        AccountSerializer.validated = 0
+
+    def test_all_errors_by_default(self):
+        serializer = AccountSerializer(data=BAD)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {
+            'username': 'Username is required',
+            'balance': 'Balance must be positive',
+            'settings': {'is_public': 'Settings must be public'},
+        })
+
+    def test_fields(self):
+        for serializer_class in (AccountSerializer, CompiledAccountSerializer):
+            with self.subTest(serializer_class=serializer_class.__name__):
+                AccountSerializer.validated = 0
+                serializer = serializer_class(data=BAD)
+                self.assertFalse(serializer.is_valid(fail_fast=True))
+                self.assertEqual(serializer.errors, {'username': 'Username is required'})
+                self.assertEqual(AccountSerializer.validated, 0)
+
+                serializer = serializer_class(data=BAD)
+                self.assertFalse(serializer.is_valid(max_errors=2))
+                self.assertEqual(serializer.errors, {
+                    'username': 'Username is required',
+                    'balance': 'Balance must be positive',
+                })
+
+    def test_nested_errors_are_counted_once(self):
+        data = dict(account(0), settings={'is_public': False})
+        serializer = AccountSerializer(data=data)
+        self.assertFalse(serializer.is_valid(max_errors=2))
+        self.assertEqual(serializer.errors, {'settings': {'is_public': 'Settings must be public'}})
+
+    def test_items(self):
+        items = [account(index, balance=-1 if index in (2, 5, 8) else 1) for index in range(10)]
+        serializer = AccountSerializer(data=items, many=True)
+        self.assertFalse(serializer.is_valid(fail_fast=True))
+        self.assertEqual(serializer.errors, [{}, {}, {'balance': 'Balance must be positive'}])
+        self.assertEqual(AccountSerializer.validated, 3)
+
+        serializer = AccountSerializer(data=items, many=True)
+        self.assertFalse(serializer.is_valid(max_errors=2))
+        self.assertEqual(len(serializer.errors), 6)
+        self.assertEqual(sum(1 for error in serializer.errors if error), 2)
+
+        serializer = AccountSerializer(data=items, many=True)
+        self.assertFalse(serializer.is_valid(max_errors=5))
+        self.assertEqual(len(serializer.errors), 10)
+
+    def test_columnar_falls_back_to_items(self):
+        items = [account(index, balance=-1) for index in range(5)]
+        serializer = AccountSerializer(data=items, many=True, columnar=True)
+        self.assertFalse(serializer.is_valid(fail_fast=True))
+        self.assertEqual(serializer.errors, [{'balance': 'Balance must be positive'}])
+
+    def test_meta(self):
+        serializer = FailFastAccountSerializer(data=BAD)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(list(serializer.errors), ['username'])
+
+        serializer = FailFastAccountSerializer(data=[BAD, BAD], many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, [{'username': 'Username is required'}])
+
+        serializer = FailFastAccountSerializer(data=BAD)
+        self.assertFalse(serializer.is_valid(fail_fast=False))
+        self.assertEqual(len(serializer.errors), 3)
+
+    def test_valid_data(self):
+        serializer = AccountSerializer(data=[account(0), account(1)], many=True)
+        self.assertTrue(serializer.is_valid(fail_fast=True))
+        self.assertEqual(len(serializer.validated_data), 2)
+
+    def test_raise_exception(self):
+        with self.assertRaises(ValidationError) as context:
+            AccountSerializer(data=BAD).is_valid(raise_exception=True, fail_fast=True)
+        self.assertEqual(context.exception.detail, {'username': 'Username is required'})
+
+    def test_invalid_max_errors(self):
+        with self.assertRaises(ValueError):
+            AccountSerializer(data=BAD).is_valid(max_errors=0)
@@ -0,0 +1,156 @@
+import json
+import unittest
+
+from protolizer import Serializer, fields
+from protolizer.helpers import DictMapper
+from protolizer.inputs import ObjectInput, as_input
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class Settings:
+    __slots__ = ('is_public',)
+
+    def __init__(self, is_public):
+        self.is_public = is_public
+
+
+class User:
+
+    def __init__(self, username, balance):
+        self.username = username
+        self._balance = balance
+        self.settings = Settings(True)
+
+    def balance(self):
+        return self._balance
+
+
+class CountingUser(User):
+    reads = 0
+
+    @property
+    def nickname(self):
+        CountingUser.reads += 1
+        return self.username.upper()
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+class LabelSerializer(Serializer):
+    username = fields.CharField()
+    label = fields.CharField(custom=True)
+    initial = fields.CharField(custom=True)
+
+    received = []
+
+    @classmethod
+    def get_custom_label(cls, obj):
+        cls.received.append(obj)
+        return '%s/%s' % (obj.username, obj['username'])
+
+    @classmethod
+    def get_custom_initial(cls, obj):
+        cls.received.append(obj)
+        if isinstance(obj, dict):
+            obj['username'] = obj['username'][0]
+        return obj.username[0]
+
+
+class NicknameSerializer(Serializer):
+    username = fields.CharField()
+    nickname = fields.CharField()
+
+
+class InputAdapterTestCase(unittest.TestCase):
+
+    def test_objects(self):
+        expected = {'username': 'john', 'balance': 10, 'settings': {'is_public': True}}
+        for serializer_class in (AccountSerializer, CompiledAccountSerializer):
+            with self.subTest(serializer_class=serializer_class.__name__):
+                self.assertEqual(serializer_class(User('john', 10)).data, expected)
+                serializer = serializer_class(data=User('john', 10))
+                self.assertTrue(serializer.is_valid())
+                self.assertEqual(serializer.validated_data, expected)
+                self.assertEqual(serializer_class(User('john', 10)).protobuf.settings.is_public, True)
+
+        data = AccountSerializer([User('a', 1), User('b', 2)], many=True).data
+        self.assertEqual([item['balance'] for item in data], [1, 2])
+
+    def test_missing_attributes(self):
+        user = User('john', 10)
+        del user.settings
+        self.assertEqual(AccountSerializer(user).data, {'username': 'john', 'balance': 10, 'settings': None})
+
+    def test_nested_messages(self):
+        data = {'username': 'john', 'balance': 10, 'settings': AccountSettings(is_public=True)}
+        serializer = AccountSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['settings'], {'is_public': True})
+
+    def test_custom_getters_get_a_dict(self):
+        LabelSerializer.received = []
+        data = {'username': 'john'}
+        self.assertEqual(LabelSerializer(data).data, {'username': 'john', 'label': 'john/john', 'initial': 'j'})
+        self.assertEqual(data, {'username': 'john'})
+        received, other = LabelSerializer.received
+        # Getters share one copy of each input.
+        self.assertIs(received, other)
+        self.assertIsInstance(received, DictMapper)
+        self.assertIsInstance(received, dict)
+        self.assertEqual(json.loads(json.dumps(received)), {'username': 'j'})
+        self.assertEqual(received.copy(), {'username': 'j'})
+        self.assertEqual(received.get('missing', 1), 1)
+
+        LabelSerializer.received = []
+        serializer = LabelSerializer(data=data)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {'username': 'john', 'label': 'john/john', 'initial': 'j'})
+        self.assertIs(*LabelSerializer.received)
+
+        self.assertEqual(LabelSerializer(User('jane', 1)).data, {'username': 'jane', 'label': 'jane/jane', 'initial': 'j'})
+        self.assertIsInstance(LabelSerializer.received[-1], ObjectInput)
+
+    def test_attributes_are_read_once(self):
+        CountingUser.reads = 0
+        serializer = NicknameSerializer(data=CountingUser('john', 1))
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {'username': 'john', 'nickname': 'JOHN'})
+        self.assertEqual(CountingUser.reads, 1)
+
+    def test_as_input(self):
+        data = {'a': 1}
+        self.assertIs(as_input(data), data)
+        self.assertEqual(as_input(Account(username='john')), {'username': 'john'})
+        self.assertEqual(as_input('text'), 'text')
+        self.assertIs(as_input(User), User)
+
+        wrapped = as_input(User('john', 10))
+        self.assertIsInstance(wrapped, ObjectInput)
+        self.assertIn('username', wrapped)
+        self.assertNotIn('missing', wrapped)
+        self.assertEqual(wrapped['balance'], 10)
+        with self.assertRaises(KeyError):
+            wrapped['missing']  # noqa
+        self.assertEqual(set(wrapped), {'username', '_balance', 'settings'})
+        self.assertIsInstance(as_input(Settings(False)), ObjectInput)
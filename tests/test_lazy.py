@@ -0,0 +1,155 @@
+import unittest
+
+from google.protobuf.message import DecodeError
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.decoder import decode_message
+from protolizer.lazy import WireInput, split_delimited
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings, FieldsMessage, TypesMessage
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+class SummarySerializer(Serializer):
+    int32_field = fields.IntField()
+    string_field = fields.CharField()
+    repeated_nested_field = AccountSerializer(many=True)
+
+    class Meta:
+        schema = FieldsMessage
+
+
+class LabelSerializer(Serializer):
+    label = fields.CharField(custom=True)
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def get_custom_label(obj):
+        return '%s:%s' % (obj['username'], obj['balance'])
+
+
+# A sub-message that only decoding it would reject (a varint running past its end).
+BROKEN_SETTINGS = b'\x1a\x02\x08\xff'
+
+
+class LazyDecodingTestCase(unittest.TestCase):
+
+    def test_bytes_input(self):
+        payload = Account(username='john', balance=5, settings=AccountSettings(is_public=True)).SerializeToString()
+        expected = {'username': 'john', 'balance': 5, 'settings': {'is_public': True}}
+        for serializer_class in (AccountSerializer, CompiledAccountSerializer):
+            for data in (payload, bytearray(payload), memoryview(payload)):
+                with self.subTest(serializer_class=serializer_class.__name__, type=type(data).__name__):
+                    serializer = serializer_class(data=data)
+                    self.assertTrue(serializer.is_valid())
+                    self.assertEqual(serializer.validated_data, expected)
+        self.assertEqual(AccountSerializer.from_bytes(payload), expected)
+
+    def test_undeclared_fields_are_skipped(self):
+        message = FieldsMessage(
+            int32_field=7,
+            string_field='summary',
+            bytes_field=b'\x00' * 100000,
+            repeated_nested_field=[Account(username='a', balance=1), Account(username='b', balance=2)],
+        )
+        # Invalid UTF-8 in a string field the serializer does not declare.
+        payload = message.SerializeToString() + b'\x3a\x04\xff\xff\xff\xff'
+        with self.assertRaises(DecodeError):
+            FieldsMessage.FromString(payload)
+        self.assertEqual(SummarySerializer.from_bytes(payload), {
+            'int32_field': 7,
+            'string_field': 'summary',
+            'repeated_nested_field': [
+                {'username': 'a', 'balance': 1, 'settings': None},
+                {'username': 'b', 'balance': 2, 'settings': None},
+            ],
+        })
+
+    def test_nested_messages_are_decoded_by_nested_serializers(self):
+        payload = Account(username='john', balance=-1).SerializeToString() + BROKEN_SETTINGS
+        serializer = AccountSerializer(data=payload)
+        self.assertFalse(serializer.is_valid(fail_fast=True))
+        self.assertEqual(serializer.errors, {'balance': 'Balance must be positive'})
+        with self.assertRaises(DecodeError):
+            AccountSerializer(data=payload).is_valid()
+
+        wire_input = WireInput(payload, Account.DESCRIPTOR, nested=frozenset(['settings']))
+        self.assertIsInstance(wire_input['settings'], WireInput)
+
+    def test_custom_getters_read_every_field(self):
+        payload = Account(username='john', balance=3).SerializeToString()
+        self.assertEqual(LabelSerializer.from_bytes(payload), {'label': 'john:3'})
+
+    def test_matches_decode_message(self):
+        message = TypesMessage(
+            int64_field=-3,
+            uint64_field=2 ** 64 - 1,
+            sint32_field=-9,
+            fixed32_field=4,
+            sfixed64_field=-2,
+            status=7,
+            counters={'a': 1, 'b': 0},
+            accounts={'x': Account(username='foo')},
+            samples=[1, -1, 0],
+            readings=[0.5, -0.0],
+            ratios=[0.1],
+            nickname='',
+            payload=b'\x00\x01',
+            history=[1, 2],
+        )
+        message.created_at.seconds = 1700000000
+        message.optional_count.value = 0
+        payload = message.SerializeToString()
+        # Records given twice are merged, as parsing does.
+        payload += TypesMessage(int64_field=5, samples=[2], accounts={'y': Account()}).SerializeToString()
+        self.assertEqual(dict(WireInput(payload, TypesMessage.DESCRIPTOR)), decode_message(TypesMessage.FromString(payload)))
+
+        defaults = FieldsMessage(float_field=-0.0).SerializeToString() + b'\x08\x00\x28\x00'
+        self.assertEqual(dict(WireInput(defaults, FieldsMessage.DESCRIPTOR)), {'float_field': -0.0})
+
+    def test_many(self):
+        items = [{'username': 'user-%d' % index, 'balance': index, 'settings': {'is_public': True}} for index in range(1, 4)]
+        payload = AccountSerializer(items, many=True).to_bytes()
+        self.assertEqual(len(split_delimited(payload)), 3)
+        self.assertEqual(AccountSerializer.from_bytes(payload, many=True), items)
+        serializer = AccountSerializer(data=split_delimited(payload), many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, items)
+
+    def test_invalid_data(self):
+        with self.assertRaises(DecodeError):
+            AccountSerializer.from_bytes(b'\x0a\x05jo')
+        with self.assertRaises(DecodeError):
+            AccountSerializer.from_bytes(b'\x05\x0a', many=True)
+        serializer = AccountSerializer(data=Account(username='john', balance=-1).SerializeToString())
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.data, {'username': 'john', 'balance': -1})
@@ -0,0 +1,117 @@
+import unittest
+
+from google.protobuf.field_mask_pb2 import FieldMask
+
+from protolizer import Serializer, fields, ValidationError
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+    note = fields.CharField(custom=True)
+
+    notes = 0
+
+    class Meta:
+        schema = AccountSettings
+
+    @classmethod
+    def get_custom_note(cls, obj):
+        cls.notes += 1
+        return 'note'
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_username(value):
+        if not value:
+            raise ValidationError('Username is required')
+        return value
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+ACCOUNT = {'username': 'john', 'balance': 10, 'settings': {'is_public': True}}
+
+
+class FieldMaskTestCase(unittest.TestCase):
+
+    def test_output_is_pruned(self):
+        SettingsSerializer.notes = 0
+        serializer = AccountSerializer(ACCOUNT, fields=['username', 'settings.is_public'])
+        self.assertEqual(serializer.data, {'username': 'john', 'settings': {'is_public': True}})
+        self.assertEqual(SettingsSerializer.notes, 0)
+
+        self.assertEqual(AccountSerializer(ACCOUNT, fields=['balance']).data, {'balance': 10})
+        self.assertEqual(AccountSerializer(ACCOUNT, fields=['settings']).data['settings'], {
+            'is_public': True, 'note': 'note',
+        })
+        self.assertEqual(SettingsSerializer.notes, 1)
+
+    def test_field_mask_message(self):
+        mask = FieldMask(paths=['balance', 'settings.is_public'])
+        self.assertEqual(AccountSerializer(ACCOUNT, fields=mask).protobuf, Account(
+            balance=10, settings=AccountSettings(is_public=True),
+        ))
+        serializer = CompiledAccountSerializer(ACCOUNT, fields=mask)
+        self.assertEqual(serializer.protobuf, AccountSerializer(ACCOUNT, fields=mask).protobuf)
+
+    def test_input_is_pruned(self):
+        serializer = AccountSerializer(data={'username': '', 'balance': '5'}, fields=['balance'])
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {'balance': 5})
+
+        serializer = AccountSerializer(data={'username': '', 'balance': '5'}, fields=['username'])
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'username': 'Username is required'})
+
+    def test_many(self):
+        serializer = AccountSerializer([ACCOUNT, ACCOUNT], many=True, fields=['username'])
+        self.assertEqual(serializer.data, [{'username': 'john'}, {'username': 'john'}])
+        self.assertEqual(serializer.protobuf, [Account(username='john')] * 2)
+
+    def test_invalid_paths(self):
+        with self.assertRaises(ValueError):
+            AccountSerializer(ACCOUNT, fields=['email']).data
+        with self.assertRaises(ValueError):
+            AccountSerializer(ACCOUNT, fields=['username.first']).data
+        with self.assertRaises(ValueError):
+            AccountSerializer(ACCOUNT, fields=['settings.email']).data
+        with self.assertRaises(TypeError):
+            AccountSerializer(ACCOUNT, fields='username')
+
+    def test_masked_plans_are_cached(self):
+        AccountSerializer(ACCOUNT, fields=['username', 'balance']).data
+        plan = AccountSerializer(ACCOUNT, fields=['balance', 'username']).get_plan()
+        self.assertIs(AccountSerializer._masked_plans[frozenset(['username', 'balance'])], plan)  # noqa
+        self.assertEqual([entry.name for entry in plan], ['username', 'balance'])
+
+    def test_unmasked_serializers_are_unchanged(self):
+        AccountSerializer(ACCOUNT, fields=['settings.is_public']).data
+        self.assertEqual(AccountSerializer(ACCOUNT).data, {
+            'username': 'john', 'balance': 10, 'settings': {'is_public': True, 'note': 'note'},
+        })
+
+
+class AsyncFieldMaskTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_nested_mask(self):
+        serializer = AccountSerializer(data=ACCOUNT, fields=['settings.is_public'])
+        self.assertTrue(await serializer.ais_valid())
+        self.assertEqual(serializer.validated_data, {'settings': {'is_public': True}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.metrics import InMemoryMetrics, Observation, add_hook, flush, hooks, pending, remove_hook, to_prometheus
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+ACCOUNTS = [
+    {'username': 'user-%d' % index, 'balance': index + 1, 'settings': {'is_public': True}}
+    for index in range(3)
+]
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.observations = []
+        self.metrics = InMemoryMetrics()
+        add_hook(self.observations.append)
+        add_hook(self.metrics, output_bytes=True)
+
+    def tearDown(self):
+        remove_hook(self.observations.append)
+        remove_hook(self.metrics)
+
+    def test_observations(self):
+        messages = AccountSerializer(ACCOUNTS, many=True).protobuf
+        self.assertEqual(self.observations, [])
+        flush()
+        self.assertEqual(len(self.observations), 1)
+        observation = self.observations[0]
+        self.assertIsInstance(observation, Observation)
+        self.assertEqual(observation.serializer, 'AccountSerializer')
+        self.assertEqual(observation.operation, 'protobuf')
+        self.assertEqual(observation.items, 3)
+        self.assertEqual(observation.output_bytes, sum(message.ByteSize() for message in messages))
+        self.assertGreater(observation.seconds, 0)
+
+        serializer = AccountSerializer(ACCOUNTS[0])
+        serializer.data  # noqa
+        serializer.data  # noqa
+        flush()
+        self.assertEqual([o.operation for o in self.observations[1:]], ['data'])
+        self.assertEqual(self.observations[1].items, 1)
+
+    def test_protobuf_reports_one_observation(self):
+        AccountSerializer(ACCOUNTS[0]).protobuf  # noqa
+        AccountSerializer(ACCOUNTS[0]).to_bytes()
+        flush()
+        self.assertEqual([o.operation for o in self.observations], ['protobuf', 'to_bytes'])
+
+    def test_output_bytes_are_opt_in(self):
+        remove_hook(self.metrics)
+        try:
+            AccountSerializer(ACCOUNTS[0]).protobuf  # noqa
+            payload = AccountSerializer(ACCOUNTS[0]).to_bytes()
+        finally:
+            add_hook(self.metrics, output_bytes=True)
+        protobuf, to_bytes = self.observations
+        self.assertEqual(protobuf.output_bytes, 0)
+        self.assertEqual(to_bytes.operation, 'to_bytes')
+        self.assertEqual(to_bytes.output_bytes, len(payload))
+
+    def test_buffered_aggregation(self):
+        metrics = InMemoryMetrics(buffer_size=2)
+        metrics(Observation('AccountSerializer', 'data', 1, 0.5))
+        self.assertEqual(metrics.series, {})
+        metrics(Observation('AccountSerializer', 'data', 1, 0.5))
+        self.assertEqual(metrics.series[('AccountSerializer', 'data')][0].count, 2)
+        metrics(Observation('AccountSerializer', 'data', 1, 0.5))
+        self.assertEqual(metrics.snapshot()['AccountSerializer']['operations']['data']['conversions'], 3)
+
+    def test_validation_failures(self):
+        items = [dict(account, balance=-1) for account in ACCOUNTS[:2]] + [{'username': 'x', 'balance': -5}]
+        self.assertFalse(AccountSerializer(data=items, many=True).is_valid())
+        self.assertTrue(AccountSerializer(data=ACCOUNTS[0]).is_valid())
+
+        flush()
+        failed, passed = self.observations
+        self.assertEqual(failed.operation, 'is_valid')
+        self.assertEqual(failed.items, 3)
+        self.assertEqual(failed.failures, {'balance': 3})
+        self.assertIsNone(passed.failures)
+
+        snapshot = self.metrics.snapshot()['AccountSerializer']
+        self.assertEqual(snapshot['failures'], {'balance': 3})
+        self.assertEqual(snapshot['operations']['is_valid']['conversions'], 2)
+        self.assertEqual(snapshot['operations']['is_valid']['items'], 4)
+
+    def test_prometheus(self):
+        AccountSerializer(ACCOUNTS, many=True).protobuf  # noqa
+        AccountSerializer(ACCOUNTS[0]).protobuf  # noqa
+        AccountSerializer(data={'username': 'x', 'balance': -1}).is_valid()
+        text = to_prometheus(self.metrics)
+        lines = text.splitlines()
+
+        self.assertIn('# TYPE protolizer_conversions_total counter', lines)
+        self.assertIn('protolizer_conversions_total{serializer="AccountSerializer",operation="protobuf"} 2', lines)
+        self.assertIn('protolizer_conversion_items_bucket{serializer="AccountSerializer",operation="protobuf",le="1.0"} 1', lines)
+        self.assertIn('protolizer_conversion_items_bucket{serializer="AccountSerializer",operation="protobuf",le="10.0"} 2', lines)
+        self.assertIn('protolizer_conversion_items_count{serializer="AccountSerializer",operation="protobuf"} 2', lines)
+        self.assertIn('protolizer_conversion_seconds_bucket{serializer="AccountSerializer",operation="protobuf",le="+Inf"} 2', lines)
+        self.assertIn('protolizer_validation_failures_total{serializer="AccountSerializer",field="balance"} 1', lines)
+        self.assertTrue(any(line.startswith('protolizer_output_bytes_total{serializer="AccountSerializer"} ') for line in lines))
+        self.assertTrue(text.endswith('\n'))
+
+        self.metrics.clear()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+    def test_observations_are_passed_on_in_batches(self):
+        batches = []
+
+        class Batched:
+            observe_many = batches.append
+
+        batched = Batched()
+        add_hook(batched)
+        try:
+            for _ in range(3):
+                AccountSerializer(ACCOUNTS[0]).data  # noqa
+            self.assertEqual(len(pending), 3)
+        finally:
+            remove_hook(batched)
+        self.assertEqual(pending, [])
+        self.assertEqual([len(batch) for batch in batches], [3])
+        self.assertEqual(Observation(*batches[0][0]).operation, 'data')
+        self.assertEqual(len(self.observations), 3)
+        self.assertEqual(self.metrics.snapshot()['AccountSerializer']['operations']['data']['conversions'], 3)
+
+    def test_prometheus_without_output_bytes(self):
+        metrics = InMemoryMetrics()
+        metrics(Observation('AccountSerializer', 'protobuf', 1, 0.5))
+        text = to_prometheus(metrics)
+        self.assertIn('protolizer_conversions_total{serializer="AccountSerializer",operation="protobuf"} 1', text)
+        self.assertNotIn('output_bytes_total', text)
+
+    def test_label_escaping(self):
+        self.metrics(Observation('Weird"\\\nName', 'data', 1, 0.5))
+        self.assertIn(
+            'protolizer_conversions_total{serializer="Weird\\"\\\\\\nName",operation="data"} 1',
+            to_prometheus(self.metrics).splitlines(),
+        )
+
+    def test_remove_hook(self):
+        remove_hook(self.metrics)
+        with self.assertRaises(ValueError):
+            remove_hook(self.metrics)
+        add_hook(self.metrics)
+        self.assertEqual(hooks.count(self.metrics), 1)
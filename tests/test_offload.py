@@ -0,0 +1,103 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+
+from protolizer import Serializer, fields
+from protolizer.aio import LoopMonitor
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+
+tenant: ContextVar = ContextVar('tenant', default='none')
+
+
+class TenantSerializer(AccountSerializer):
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        ret['username'] = '%s/%s' % (tenant.get(), ret['username'])
+        return ret
+
+
+def accounts(count):
+    return [{'username': 'user-%d' % index, 'balance': index + 1} for index in range(count)]
+
+
+class OffloadTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_thread_executor(self):
+        expected = AccountSerializer(accounts(100), many=True).protobuf
+        serializer = AccountSerializer(accounts(100), many=True)
+        self.assertEqual(await serializer.to_protobuf_async(), expected)
+        self.assertGreaterEqual(serializer.max_blocking_time, 0)
+
+        serializer = AccountSerializer(accounts(1)[0])
+        with ThreadPoolExecutor(1) as executor:
+            self.assertEqual(await serializer.to_protobuf_async(executor), expected[0])
+
+    async def test_context_variables_are_copied_to_the_thread(self):
+        token = tenant.set('acme')
+        try:
+            with ThreadPoolExecutor(1) as executor:
+                message = await TenantSerializer(accounts(1)[0]).to_protobuf_async(executor)
+            messages = await TenantSerializer(accounts(2), many=True).to_protobuf_async()
+        finally:
+            tenant.reset(token)
+        self.assertEqual(message.username, 'acme/user-0')
+        self.assertEqual([message.username for message in messages], ['acme/user-0', 'acme/user-1'])
+
+    async def test_process_executor(self):
+        items = accounts(50)
+        with ProcessPoolExecutor(2) as executor:
+            messages = await AccountSerializer(items, many=True).to_protobuf_async(executor)
+            self.assertEqual(messages, AccountSerializer(items, many=True).protobuf)
+
+            serializer = AccountSerializer(data=items, many=True)
+            self.assertTrue(serializer.is_valid())
+            self.assertEqual(await serializer.to_protobuf_async(executor), messages)
+
+            with self.assertRaises(ValueError):
+                await AccountSerializer(items[0]).to_protobuf_async(executor)
+
+    async def test_cooperative_mode(self):
+        ticks = 0
+        done = False
+
+        async def ticker():
+            nonlocal ticks
+            while not done:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+        serializer = AccountSerializer(iter(accounts(100)), many=True)
+        messages = await serializer.to_protobuf_async(yield_every=10)
+        done = True
+        await task
+
+        self.assertEqual(messages, AccountSerializer(accounts(100), many=True).protobuf)
+        self.assertGreaterEqual(ticks, 10)
+
+    async def test_loop_monitor(self):
+        with LoopMonitor() as monitor:
+            await asyncio.sleep(0.01)
+        self.assertLess(monitor.max_blocking_time, 0.02)
+
+        with LoopMonitor() as monitor:
+            time.sleep(0.05)
+            await asyncio.sleep(0)
+        self.assertGreaterEqual(monitor.max_blocking_time, 0.04)
+
+
+if __name__ == '__main__':
+    unittest.main()
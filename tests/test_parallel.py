@@ -0,0 +1,99 @@
+import pickle
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.exceptions import InvalidDataError
+from protolizer.helpers import SparseErrors
+from protolizer.parallel import SerializerSpec, convert
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+def accounts(count):
+    return [{'username': 'user-%d' % index, 'balance': index + 1} for index in range(count)]
+
+
+class ParallelTestCase(unittest.TestCase):
+
+    def test_matches_sequential_conversion(self):
+        items = accounts(50)
+        expected = AccountSerializer(items, many=True).protobuf
+        self.assertEqual(convert(AccountSerializer, items, workers=2, chunk_size=7), expected)
+        self.assertEqual(convert(AccountSerializer, iter(items), workers=2, mode='data'), expected)
+        self.assertEqual(convert(AccountSerializer, [], workers=2), [])
+
+    def test_list_serializer_workers(self):
+        items = accounts(20)
+        expected = AccountSerializer(items, many=True).protobuf
+        self.assertEqual(AccountSerializer(items, many=True, workers=2).protobuf, expected)
+
+        serializer = AccountSerializer(data=items, many=True, workers=2)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.protobuf, expected)
+
+    def test_errors_keep_their_indexes(self):
+        items = accounts(10)
+        items[2]['balance'] = -1
+        items[8]['balance'] = -1
+        with ThreadPoolExecutor(2) as executor:
+            with self.assertRaises(ValidationError) as ctx:
+                convert(AccountSerializer, items, chunk_size=3, mode='data', executor=executor)
+        errors = ctx.exception.detail
+        self.assertEqual(len(errors), 10)
+        self.assertEqual(errors[2], {'balance': 'Balance must be positive'})
+        self.assertEqual(errors[8], {'balance': 'Balance must be positive'})
+        self.assertEqual(errors[0], {})
+
+    def test_sparse_errors_stay_sparse(self):
+        items = accounts(10)
+        items[2]['balance'] = -1
+        items[8]['balance'] = -1
+        expected = {2: {'balance': 'Balance must be positive'}, 8: {'balance': 'Balance must be positive'}}
+        for mode in ('data', 'instance'):
+            with self.subTest(mode=mode), ThreadPoolExecutor(2) as executor:
+                with self.assertRaises(ValidationError) as ctx:
+                    convert(AccountSerializer, items, chunk_size=3, mode=mode, executor=executor, sparse_errors=True)
+                errors = ctx.exception.detail
+                self.assertIsInstance(errors, SparseErrors)
+                self.assertEqual(errors, expected)
+                self.assertEqual(errors.size, 10)
+
+        with self.assertRaises(ValidationError) as ctx:
+            AccountSerializer(items, many=True, workers=2, sparse_errors=True).protobuf  # noqa
+        self.assertIsInstance(ctx.exception.detail, SparseErrors)
+        self.assertEqual(ctx.exception.detail, expected)
+
+    def test_worker_exceptions_are_raised(self):
+        with self.assertRaises(InvalidDataError) as ctx:
+            convert(AccountSerializer, [{'balance': 'abc'}], workers=1)
+        self.assertEqual(ctx.exception.field, 'balance')
+
+    def test_serializer_must_be_importable(self):
+        class LocalSerializer(AccountSerializer):
+            pass
+
+        with self.assertRaises(ValueError):
+            convert(LocalSerializer, accounts(1))
+        with self.assertRaises(ValueError):
+            convert(AccountSerializer, accounts(1), mode='json')
+
+        spec = SerializerSpec.from_class(AccountSerializer, context={'a': 1})
+        self.assertIs(pickle.loads(pickle.dumps(spec)).resolve(), AccountSerializer)
+
+
+if __name__ == '__main__':
+    unittest.main()
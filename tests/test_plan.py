@@ -0,0 +1,109 @@
+import copy
+import unittest
+from unittest import mock
+
+from protolizer import Serializer, fields, ValidationError
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField(proto_field='balance')
+
+    class Meta:
+        schema = Account
+
+    def validate_balance(self, value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class ExtendedAccountSerializer(AccountSerializer):
+
+    @staticmethod
+    def validate_username(value):
+        return value.upper()
+
+
+class DynamicFieldsSerializer(AccountSerializer):
+
+    def get_fields(self):
+        declared = super().get_fields()
+        del declared['balance']
+        return declared
+
+
+class ParentRecordingField(fields.CharField):
+    seen = []
+
+    def to_internal_value(self, data):
+        self.seen.append(('to_internal_value', type(self.parent).__name__, type(self.root).__name__))
+        return super().to_internal_value(data)
+
+    def to_representation(self, value):
+        self.seen.append(('to_representation', type(self.parent).__name__, type(self.root).__name__))
+        return super().to_representation(value)
+
+
+class ParentSettingsSerializer(Serializer):
+    theme = ParentRecordingField()
+
+
+class ParentAccountSerializer(Serializer):
+    username = ParentRecordingField()
+    settings = ParentSettingsSerializer()
+
+
+class ExecutionPlanTestCase(unittest.TestCase):
+
+    def test_plan_is_built_once_per_class(self):
+        plan = AccountSerializer._plan  # noqa
+        self.assertIsInstance(plan, tuple)
+        self.assertEqual([entry.name for entry in plan], ['username', 'balance'])
+        self.assertIs(AccountSerializer({}).get_plan(), plan)
+        self.assertIs(AccountSerializer({}).get_plan(), plan)
+
+    def test_instances_do_not_copy_fields(self):
+        with mock.patch('copy.deepcopy', wraps=copy.deepcopy) as deepcopy:
+            serializer = AccountSerializer({'username': 'John Doe', 'balance': 10})
+            self.assertEqual(serializer.data, {'username': 'John Doe', 'balance': 10})
+        deepcopy.assert_not_called()
+
+    def test_validate_hooks_are_resolved_per_class(self):
+        serializer = ExtendedAccountSerializer(data={'username': 'john', 'balance': -1})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'balance': 'Balance must be positive'})
+
+        serializer = ExtendedAccountSerializer(data={'username': 'john', 'balance': 1})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {'username': 'JOHN', 'balance': 1})
+
+    def test_overridden_get_fields_is_respected(self):
+        serializer = DynamicFieldsSerializer({'username': 'John Doe', 'balance': 10})
+        self.assertEqual(serializer.data, {'username': 'John Doe'})
+
+    def test_instance_fields_are_respected(self):
+        serializer = AccountSerializer({'username': 'John Doe', 'balance': 10})
+        del serializer.fields['balance']
+        self.assertEqual(serializer.data, {'username': 'John Doe'})
+
+    def test_parent_and_root_are_the_running_serializers(self):
+        ParentRecordingField.seen = []
+        serializer = ParentAccountSerializer({'username': 'john', 'settings': {'theme': 'dark'}})
+        self.assertEqual(serializer.data, {'username': 'john', 'settings': {'theme': 'dark'}})
+        self.assertEqual(sorted(set(ParentRecordingField.seen)), [
+            ('to_internal_value', 'ParentAccountSerializer', 'ParentAccountSerializer'),
+            ('to_internal_value', 'ParentSettingsSerializer', 'ParentAccountSerializer'),
+            ('to_representation', 'ParentAccountSerializer', 'ParentAccountSerializer'),
+            ('to_representation', 'ParentSettingsSerializer', 'ParentAccountSerializer'),
+        ])
+
+    def test_parent_is_none_outside_a_call(self):
+        field = ParentAccountSerializer._plan[0].field  # noqa
+        self.assertIsNone(field.parent)
+        self.assertIs(field.root, field)
+
+
+if __name__ == '__main__':
+    unittest.main()
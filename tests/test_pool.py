@@ -0,0 +1,99 @@
+import threading
+import unittest
+
+from protolizer import Serializer, fields
+from protolizer.exceptions import InvalidDataError
+from protolizer.pool import SerializerPool
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+
+class DynamicSerializer(AccountSerializer):
+    calls = 0
+
+    def get_fields(self):
+        DynamicSerializer.calls += 1
+        return super().get_fields()
+
+
+class SerializerPoolTestCase(unittest.TestCase):
+
+    def test_reuses_instances(self):
+        pool = SerializerPool(AccountSerializer, max_size=2)
+        with pool.borrow({'username': 'john', 'balance': 1}) as serializer:
+            self.assertEqual(serializer.data, {'username': 'john', 'balance': 1})
+        with pool.borrow({'username': 'jane', 'balance': 2}) as other:
+            self.assertIs(other, serializer)
+            self.assertEqual(other.protobuf, Account(username='jane', balance=2))
+        self.assertEqual(pool.stats, {'hits': 1, 'misses': 1, 'discarded': 0, 'idle': 1})
+
+    def test_reset(self):
+        pool = SerializerPool(AccountSerializer)
+        serializer = pool.acquire(data={'username': 'john', 'balance': 'abc'})
+        with self.assertRaises(InvalidDataError):
+            serializer.is_valid()
+        pool.release(serializer)
+
+        serializer = pool.acquire(data={'username': 'john', 'balance': 5}, context={'a': 1})
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data, {'username': 'john', 'balance': 5})
+        self.assertEqual(serializer.context, {'a': 1})
+        pool.release(serializer)
+        self.assertFalse(hasattr(serializer, 'initial_data'))
+        self.assertIsNone(serializer.instance)
+
+        with self.assertRaises(AssertionError):
+            pool.acquire().errors
+
+    def test_many_and_bound_fields(self):
+        pool = SerializerPool(DynamicSerializer, prefill=1, many=True)
+        calls = DynamicSerializer.calls
+        for index in range(3):
+            with pool.borrow(data=[{'username': 'user', 'balance': index}]) as serializer:
+                self.assertTrue(serializer.is_valid())
+                self.assertEqual(serializer.protobuf, [Account(username='user', balance=index)])
+        self.assertEqual(DynamicSerializer.calls, calls)
+        self.assertEqual(pool.stats['hits'], 3)
+
+        with self.assertRaises(ValueError):
+            pool.release(AccountSerializer())
+
+    def test_size_limit(self):
+        pool = SerializerPool(AccountSerializer, max_size=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        self.assertEqual(len(pool), 1)
+        self.assertEqual(pool.stats, {'hits': 0, 'misses': 2, 'discarded': 1, 'idle': 1})
+
+    def test_threads(self):
+        pool = SerializerPool(AccountSerializer, max_size=4)
+        failures = []
+
+        def work(offset):
+            for index in range(200):
+                item = {'username': 'user-%d' % offset, 'balance': offset * 1000 + index}
+                with pool.borrow(item) as serializer:
+                    if serializer.data != item:
+                        failures.append(item)
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+        stats = pool.stats
+        self.assertEqual(stats['hits'] + stats['misses'], 1600)
+        self.assertLessEqual(stats['idle'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import io
+import threading
+import unittest
+
+import protolizer
+from protolizer import Serializer, fields, ValidationError
+from protolizer.profiling import active_profile
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+    settings = SettingsSerializer()
+    label = fields.CharField(custom=True)
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+    @classmethod
+    def get_custom_label(cls, obj):
+        return 'label'
+
+    def pre_serialize(self, data):
+        for item in data if isinstance(data, list) else [data]:
+            item.pop('label', None)
+        return data
+
+
+class DynamicSerializer(Serializer):
+    username = fields.CharField()
+
+    def get_fields(self):
+        return {'username': fields.CharField()}
+
+
+class CompiledAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        compile = True
+
+
+ACCOUNTS = [
+    {'username': 'user-%d' % index, 'balance': index + 1, 'settings': {'is_public': True}}
+    for index in range(3)
+]
+
+
+class ProfileTestCase(unittest.TestCase):
+
+    def test_records_phases_per_field(self):
+        with protolizer.profile() as profile:
+            messages = AccountSerializer(ACCOUNTS, many=True).protobuf
+        self.assertEqual([message.username for message in messages], ['user-0', 'user-1', 'user-2'])
+
+        stats = profile.as_dict()
+        account = stats['AccountSerializer']
+        self.assertEqual(account['balance']['run_validation']['calls'], 3)
+        self.assertEqual(account['balance']['validate_balance']['calls'], 3)
+        self.assertEqual(account['username']['to_representation']['calls'], 3)
+        self.assertEqual(account['label']['get_custom_label']['calls'], 3)
+        self.assertEqual(account['']['pre_serialize']['calls'], 1)
+        self.assertEqual(account['']['to_protobuf']['calls'], 3)
+        # Nested serializers are profiled with their own fields.
+        self.assertEqual(stats['SettingsSerializer']['is_public']['run_validation']['calls'], 3)
+        self.assertGreaterEqual(
+            account['settings']['run_validation']['time'],
+            stats['SettingsSerializer']['is_public']['run_validation']['time'],
+        )
+
+    def test_compiled_serializers_are_profiled(self):
+        with protolizer.profile() as profile:
+            data = CompiledAccountSerializer(ACCOUNTS[0]).data
+        self.assertEqual(data, dict(ACCOUNTS[0], label='label'))
+        self.assertEqual(profile.as_dict()['CompiledAccountSerializer']['username']['run_validation']['calls'], 1)
+
+    def test_validation_errors_are_recorded(self):
+        with protolizer.profile() as profile:
+            serializer = AccountSerializer(data=dict(ACCOUNTS[0], balance=-1))
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'balance': 'Balance must be positive'})
+        self.assertEqual(profile.as_dict()['AccountSerializer']['balance']['validate_balance']['calls'], 1)
+
+    def test_plan_copies_are_cached_per_class(self):
+        with protolizer.profile() as profile:
+            for _ in range(3):
+                AccountSerializer(ACCOUNTS[0]).data  # noqa
+                AccountSerializer(ACCOUNTS[0], fields=['username']).data  # noqa
+                DynamicSerializer({'username': 'john'}).data  # noqa
+        # Plans built per instance are not kept.
+        self.assertEqual(set(profile._plans), {  # noqa
+            (AccountSerializer, None), (SettingsSerializer, None), (AccountSerializer, frozenset(['username'])),
+        })
+        self.assertEqual(profile.as_dict()['DynamicSerializer']['username']['to_representation']['calls'], 3)
+
+    def test_disabled_outside_the_block(self):
+        with protolizer.profile() as profile:
+            pass
+        self.assertIsNone(active_profile.get())
+        AccountSerializer(ACCOUNTS[0]).data  # noqa
+        self.assertEqual(profile.as_dict(), {})
+        self.assertEqual(profile.report(), [])
+
+    def test_other_threads_are_not_profiled(self):
+        with protolizer.profile() as profile:
+            thread = threading.Thread(target=lambda: AccountSerializer(ACCOUNTS[0]).data)
+            thread.start()
+            thread.join()
+        self.assertEqual(profile.as_dict(), {})
+
+    def test_report(self):
+        with protolizer.profile() as profile:
+            AccountSerializer(ACCOUNTS, many=True).data  # noqa
+        rows = profile.report(sort='calls')
+        self.assertEqual(rows[0][3], max(row[3] for row in rows))
+        self.assertEqual(len(profile.report(limit=2)), 2)
+        times = [row[4] for row in profile.report()]
+        self.assertEqual(times, sorted(times, reverse=True))
+        with self.assertRaises(ValueError):
+            profile.report(sort='name')
+
+        out = io.StringIO()
+        profile.print_report(file=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('serializer'))
+        self.assertEqual(len(lines), len(rows) + 1)
@@ -0,0 +1,126 @@
+import json
+import pickle
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.helpers import ReturnList, SparseErrors
+from protolizer.metrics import count_failures
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class AsyncAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    async def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class SparseAccountSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+        sparse_errors = True
+
+
+class TeamSerializer(Serializer):
+    name = fields.CharField()
+    members = AccountSerializer(many=True, sparse_errors=True)
+
+
+ERROR = {'balance': 'Balance must be positive'}
+
+
+def accounts(size, bad=(2, 7)):
+    return [{'username': 'user-%d' % index, 'balance': -1 if index in bad else index} for index in range(size)]
+
+
+class SparseErrorsTestCase(unittest.TestCase):
+
+    def test_sparse_errors(self):
+        serializer = AccountSerializer(data=accounts(10), many=True, sparse_errors=True)
+        self.assertFalse(serializer.is_valid())
+        errors = serializer.errors
+        self.assertIsInstance(errors, SparseErrors)
+        self.assertEqual(errors, {2: ERROR, 7: ERROR})
+        self.assertEqual(errors.size, 10)
+        self.assertIs(errors.serializer, serializer)
+
+        dense = errors.dense()
+        self.assertIsInstance(dense, ReturnList)
+        self.assertIs(dense.serializer, serializer)
+        dense_serializer = AccountSerializer(data=accounts(10), many=True)
+        dense_serializer.is_valid()
+        self.assertEqual(dense, dense_serializer.errors)
+
+        self.assertEqual(json.loads(json.dumps(errors)), {'2': ERROR, '7': ERROR})
+
+    def test_valid_data(self):
+        serializer = SparseAccountSerializer(data=accounts(5, bad=()), many=True)
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.errors, {})
+        self.assertIsInstance(serializer.errors, SparseErrors)
+        self.assertEqual(serializer.errors.dense(), [])
+
+    def test_meta_and_columnar(self):
+        for kwargs in ({}, {'columnar': True}):
+            with self.subTest(**kwargs):
+                serializer = SparseAccountSerializer(data=accounts(10), many=True, **kwargs)
+                self.assertFalse(serializer.is_valid())
+                self.assertEqual(list(serializer.errors.items()), [(2, ERROR), (7, ERROR)])
+                self.assertEqual(serializer.errors.size, 10)
+
+    def test_fail_fast(self):
+        serializer = SparseAccountSerializer(data=accounts(10), many=True)
+        self.assertFalse(serializer.is_valid(fail_fast=True))
+        self.assertEqual(serializer.errors, {2: ERROR})
+        self.assertEqual(serializer.errors.dense(), [{}, {}, ERROR])
+
+    def test_nested(self):
+        serializer = TeamSerializer(data={'name': 'team', 'members': accounts(4)})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors, {'members': {2: ERROR}})
+        self.assertEqual(count_failures(serializer.errors['members']), {'balance': 1})
+
+    def test_iter_data(self):
+        instance = accounts(5, bad=(3,))
+        items = SparseAccountSerializer(instance, many=True).iter_data()
+        with self.assertRaises(ValidationError) as context:
+            list(items)
+        self.assertEqual(context.exception.detail, {3: ERROR})
+        self.assertEqual(context.exception.detail.size, 4)
+
+    def test_pickle(self):
+        serializer = SparseAccountSerializer(data=accounts(10), many=True)
+        serializer.is_valid()
+        errors = pickle.loads(pickle.dumps(serializer.errors))
+        self.assertEqual(errors, {2: ERROR, 7: ERROR})
+        self.assertEqual(errors.size, 10)
+        self.assertIsNone(errors.serializer)
+
+
+class AsyncSparseErrorsTestCase(unittest.IsolatedAsyncioTestCase):
+
+    async def test_async(self):
+        serializer = AsyncAccountSerializer(data=accounts(6), many=True, sparse_errors=True)
+        self.assertFalse(await serializer.ais_valid())
+        self.assertEqual(serializer.errors, {2: ERROR})
+        self.assertEqual(len(serializer.errors.dense()), 6)
@@ -0,0 +1,207 @@
+import io
+import os
+import socket
+import tempfile
+import threading
+import unittest
+
+from google.protobuf.internal.decoder import _DecodeVarint  # noqa
+from google.protobuf.internal.encoder import _VarintBytes  # noqa
+from google.protobuf.message import DecodeError
+
+from protolizer import Serializer, fields, ValidationError
+from protolizer.stream import DelimitedReader, DelimitedWriter, MappedReader
+from protolizer.wire import decode_varint, encode_varint
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class CountingStream(io.BytesIO):
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+
+def accounts(count):
+    return [{'username': 'user-%d' % index, 'balance': index + 1} for index in range(count)]
+
+
+class VarintTestCase(unittest.TestCase):
+
+    def test_matches_protobuf(self):
+        for value in [0, 1, 127, 128, 300, 2 ** 32, 2 ** 64 - 1]:
+            with self.subTest(value=value):
+                self.assertEqual(encode_varint(value), _VarintBytes(value))
+                buffer = b'x' + encode_varint(value)
+                self.assertEqual(decode_varint(buffer, 1), _DecodeVarint(buffer, 1))
+
+    def test_truncated_varint(self):
+        with self.assertRaises(IndexError):
+            decode_varint(b'\x80\x80')
+        with self.assertRaises(DecodeError):
+            decode_varint(b'\xff' * 11)
+
+
+class DelimitedStreamTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        stream = CountingStream()
+        with DelimitedWriter(stream, AccountSerializer) as writer:
+            writer.write(accounts(1)[0])
+            writer.write_many(accounts(100))
+            writer.write_message(Account(username='raw'))
+        self.assertEqual(stream.writes, 1)
+
+        stream.seek(0)
+        messages = list(DelimitedReader(stream, AccountSerializer, buffer_size=7))
+        self.assertEqual(len(messages), 102)
+        self.assertEqual(messages[1], Account(username='user-0', balance=1))
+        self.assertEqual(messages[-1], Account(username='raw'))
+
+    def test_framing_matches_protobuf(self):
+        stream = io.BytesIO()
+        with DelimitedWriter(stream, AccountSerializer) as writer:
+            writer.write_many(accounts(2))
+        expected = b''.join(
+            _VarintBytes(message.ByteSize()) + message.SerializeToString()
+            for message in AccountSerializer(accounts(2), many=True).protobuf
+        )
+        self.assertEqual(stream.getvalue(), expected)
+
+    def test_buffer_size(self):
+        stream = CountingStream()
+        writer = DelimitedWriter(stream, AccountSerializer, buffer_size=100)
+        writer.write_many(accounts(50))
+        self.assertGreater(stream.writes, 1)
+        self.assertLess(stream.writes, 50)
+        writer.close()
+        self.assertEqual(len(list(DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer))), 50)
+
+    def test_reader_outputs(self):
+        stream = io.BytesIO()
+        with DelimitedWriter(stream, AccountSerializer) as writer:
+            writer.write_many(accounts(3))
+        reader = DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer)
+        self.assertEqual(list(reader.data()), accounts(3))
+
+        reader = DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer)
+        self.assertEqual(list(reader.validated_data()), accounts(3))
+
+        reader = DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer)
+        serializers = list(reader.serializers())
+        self.assertIsInstance(serializers[0], AccountSerializer)
+        self.assertEqual(serializers[0].protobuf, Account(username='user-0', balance=1))
+
+    def test_invalid_messages(self):
+        stream = io.BytesIO()
+        with DelimitedWriter(stream, AccountSerializer) as writer:
+            writer.write_message(Account(username='john', balance=-1))
+            writer.write_message(Account(username='jane', balance=1))
+
+        reader = DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer)
+        with self.assertRaises(ValidationError):
+            list(reader.validated_data())
+        reader = DelimitedReader(io.BytesIO(stream.getvalue()), AccountSerializer)
+        self.assertEqual(list(reader.validated_data(raise_exception=False)), [{'username': 'jane', 'balance': 1}])
+
+    def test_truncated_stream(self):
+        payload = Account(username='john').SerializeToString()
+        stream = io.BytesIO(_VarintBytes(len(payload)) + payload[:-1])
+        with self.assertRaises(DecodeError):
+            list(DelimitedReader(stream, AccountSerializer))
+
+    def test_sockets(self):
+        left, right = socket.socketpair()
+
+        def send():
+            with left, DelimitedWriter(left, AccountSerializer, buffer_size=256) as writer:
+                writer.write_many(accounts(500))
+
+        thread = threading.Thread(target=send)
+        thread.start()
+        with right:
+            messages = list(DelimitedReader(right, AccountSerializer, buffer_size=1000))
+        thread.join()
+        self.assertEqual(len(messages), 500)
+        self.assertEqual(messages[-1].username, 'user-499')
+
+    def test_schema_is_required(self):
+        class NoSchemaSerializer(Serializer):
+            username = fields.CharField()
+
+        with self.assertRaises(AttributeError):
+            DelimitedWriter(io.BytesIO(), NoSchemaSerializer)
+
+
+
+class MappedReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        with os.fdopen(fd, 'wb') as f, DelimitedWriter(f, AccountSerializer) as writer:
+            writer.write_many(accounts(20))
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_random_access(self):
+        with MappedReader(self.path, AccountSerializer) as reader:
+            self.assertEqual(len(reader), 20)
+            self.assertIsInstance(reader[3], AccountSerializer)
+            self.assertEqual(reader[3].data, {'username': 'user-3', 'balance': 4})
+            self.assertEqual(reader[-1].data['username'], 'user-19')
+            self.assertEqual(reader.message(0), Account(username='user-0', balance=1))
+            self.assertEqual(bytes(reader.record(0)), Account(username='user-0', balance=1).SerializeToString())
+            with self.assertRaises(IndexError):
+                reader[20]  # noqa
+
+    def test_slices_and_filters(self):
+        with open(self.path, 'rb') as f, MappedReader(f, AccountSerializer) as reader:
+            tail = reader[-5:]
+            self.assertEqual(len(tail), 5)
+            self.assertEqual([serializer.data['balance'] for serializer in tail], [16, 17, 18, 19, 20])
+            self.assertEqual(tail[::2][1].data['username'], 'user-17')
+
+            picked = reader[[7, 2]]
+            self.assertEqual([message.username for message in picked.messages()], ['user-7', 'user-2'])
+
+            for key in ('7', b'7', 1.0, None, ['1'], [[1]]):
+                with self.subTest(key=key), self.assertRaises(TypeError):
+                    reader[key]  # noqa
+
+            matches = list(reader.filter(lambda message: message.balance % 10 == 0))
+            self.assertEqual([serializer.data['username'] for serializer in matches], ['user-9', 'user-19'])
+
+    def test_empty_and_truncated_files(self):
+        with open(self.path, 'wb'):
+            pass
+        with MappedReader(self.path, AccountSerializer) as reader:
+            self.assertEqual(len(reader), 0)
+            self.assertEqual(list(reader), [])
+
+        with open(self.path, 'wb') as f:
+            f.write(b'\x05abc')
+        with self.assertRaises(DecodeError):
+            MappedReader(self.path, AccountSerializer)
+
+
+if __name__ == '__main__':
+    unittest.main()
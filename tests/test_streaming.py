@@ -0,0 +1,104 @@
+import types
+import unittest
+
+from protolizer import Serializer, fields, ValidationError
+from tests.config.generated_proto.protobuf_pb2 import Account
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField()
+    balance = fields.IntField()
+
+    class Meta:
+        schema = Account
+
+    @staticmethod
+    def validate_balance(value):
+        if value < 0:
+            raise ValidationError('Balance must be positive')
+        return value
+
+
+class HiddenBalanceSerializer(AccountSerializer):
+
+    class Meta:
+        schema = Account
+
+    def pre_serialize(self, data):
+        if isinstance(data, list):
+            return [{'username': item['username'].upper()} for item in data]
+        return {'username': data['username']}
+
+
+def accounts(count, consumed=None):
+    for index in range(count):
+        if consumed is not None:
+            consumed.append(index)
+        yield {'username': 'user-%d' % index, 'balance': index}
+
+
+class StreamingTestCase(unittest.TestCase):
+
+    def test_iter_data_matches_data(self):
+        items = list(accounts(5))
+        serializer = AccountSerializer(items, many=True)
+        self.assertEqual(list(serializer.iter_data()), serializer.data)
+        self.assertEqual(
+            list(AccountSerializer(items, many=True).iter_protobuf()),
+            AccountSerializer(items, many=True).protobuf,
+        )
+
+    def test_generators_are_consumed_lazily(self):
+        consumed = []
+        serializer = AccountSerializer(accounts(10, consumed), many=True)
+        stream = serializer.iter_protobuf()
+        self.assertIsInstance(stream, types.GeneratorType)
+        self.assertEqual(consumed, [])
+
+        first = next(stream)
+        self.assertEqual(first, Account(username='user-0'))
+        self.assertEqual(consumed, [0])
+        self.assertEqual(len(list(stream)), 9)
+
+    def test_chunks(self):
+        serializer = AccountSerializer(accounts(5), many=True)
+        chunks = list(serializer.iter_data(chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[2], [{'username': 'user-4', 'balance': 4}])
+
+        with self.assertRaises(ValueError):
+            AccountSerializer([], many=True).iter_data(chunk_size=0)
+
+    def test_pre_serialize_per_item_and_per_chunk(self):
+        messages = list(HiddenBalanceSerializer(accounts(3), many=True).iter_protobuf())
+        self.assertEqual(messages, [Account(username='user-%d' % index) for index in range(3)])
+
+        chunks = list(HiddenBalanceSerializer(accounts(3), many=True).iter_protobuf(chunk_size=2))
+        self.assertEqual(chunks, [
+            [Account(username='USER-0'), Account(username='USER-1')],
+            [Account(username='USER-2')],
+        ])
+
+    def test_protobuf_instances(self):
+        messages = (Account(username='john', balance=index) for index in range(1, 4))
+        data = list(AccountSerializer(messages, many=True).iter_data())
+        self.assertEqual(data[2], {'username': 'john', 'balance': 3})
+
+    def test_validated_data(self):
+        serializer = AccountSerializer(data=list(accounts(3)), many=True)
+        with self.assertRaises(AssertionError):
+            serializer.iter_data()
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(list(serializer.iter_protobuf()), serializer.protobuf)
+
+    def test_validation_errors(self):
+        items = [{'username': 'john', 'balance': 1}, {'username': 'jane', 'balance': -1}]
+        stream = AccountSerializer(iter(items), many=True).iter_data()
+        self.assertEqual(next(stream)['username'], 'john')
+        with self.assertRaises(ValidationError) as ctx:
+            next(stream)
+        self.assertEqual(ctx.exception.detail, [{}, {'balance': 'Balance must be positive'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
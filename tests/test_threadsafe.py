@@ -0,0 +1,108 @@
+import sys
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from protolizer import Serializer, fields, ValidationError
+from tests.config.generated_proto.protobuf_pb2 import Account, AccountSettings
+
+
+class SettingsSerializer(Serializer):
+    is_public = fields.BooleanField()
+
+    class Meta:
+        schema = AccountSettings
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data['is_public'] = self.context.get('is_public', data['is_public'])
+        return data
+
+
+class AccountSerializer(Serializer):
+    username = fields.CharField(custom=True)
+    balance = fields.IntField()
+    settings = SettingsSerializer(context='self')
+
+    class Meta:
+        schema = Account
+
+    def get_custom_username(self, obj):
+        return '%s%s' % (self.context.get('prefix', ''), obj['username'])
+
+    def validate_balance(self, value):
+        if value > self.context.get('limit', value):
+            raise ValidationError('Balance is over the limit')
+        return value
+
+    def pre_serialize(self, data):
+        for item in data if isinstance(data, list) else [data]:
+            item['balance'] += self.context.get('bonus', 0)
+        return data
+
+
+def account(index):
+    return {'username': 'user-%d' % index, 'balance': index, 'settings': {'is_public': index % 2}}
+
+
+def context(index):
+    return {'prefix': 'p%d-' % (index % 7), 'is_public': index % 3 == 0, 'bonus': index % 5}
+
+
+def convert(index):
+    obj, ctx = account(index), context(index)
+    return (
+        AccountSerializer.dump(obj, context=ctx),
+        AccountSerializer.to_message(obj, context=ctx),
+        AccountSerializer.load(obj, context=ctx),
+        AccountSerializer(obj, context=ctx).data,
+    )
+
+
+class StatelessApiTestCase(unittest.TestCase):
+
+    def test_matches_instance_api(self):
+        obj, ctx = account(3), context(3)
+        self.assertEqual(AccountSerializer.dump(obj, context=ctx), AccountSerializer(obj, context=ctx).data)
+        self.assertEqual(AccountSerializer.dump(obj, context=ctx), {
+            'username': 'p3-user-3', 'balance': 3, 'settings': {'is_public': True},
+        })
+        self.assertEqual(AccountSerializer.to_message(obj, context=ctx), AccountSerializer(obj, context=ctx).protobuf)
+        self.assertEqual(AccountSerializer.to_message(obj, context=ctx).balance, 6)
+
+        items = [account(index) for index in range(5)]
+        self.assertEqual(AccountSerializer.dump(items, many=True), AccountSerializer(items, many=True).data)
+        self.assertEqual(AccountSerializer.to_message(items, many=True), AccountSerializer(items, many=True).protobuf)
+        self.assertEqual(AccountSerializer.dump(AccountSerializer.to_message(obj)), AccountSerializer.dump(obj))
+
+    def test_load(self):
+        serializer = AccountSerializer(data=account(3), context=context(3))
+        self.assertTrue(serializer.is_valid())
+        self.assertEqual(AccountSerializer.load(account(3), context=context(3)), serializer.validated_data)
+
+        with self.assertRaises(ValidationError) as ctx:
+            AccountSerializer.load(account(100), context={'limit': 10})
+        self.assertEqual(ctx.exception.detail, {'balance': 'Balance is over the limit'})
+        with self.assertRaises(ValidationError) as ctx:
+            AccountSerializer.load([account(1), account(100)], context={'limit': 10}, many=True)
+        self.assertEqual(ctx.exception.detail, [{}, {'balance': 'Balance is over the limit'}])
+
+    def test_shared_fields_are_not_modified(self):
+        AccountSerializer.dump(account(1), context={'prefix': 'x'})
+        AccountSerializer(account(1), context={'prefix': 'y'}).data
+        for entry in AccountSerializer._plan:  # noqa
+            self.assertIn(entry.field._context, ({}, 'self'))
+
+    def test_threads_match_single_thread(self):
+        expected = [convert(index) for index in range(200)]
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(8) as executor:
+                for _ in range(5):
+                    self.assertEqual(list(executor.map(convert, range(200))), expected)
+        finally:
+            sys.setswitchinterval(interval)
+
+
+if __name__ == '__main__':
+    unittest.main()
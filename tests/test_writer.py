@@ -0,0 +1,82 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from google.protobuf.json_format import ParseDict, ParseError
+
+from protolizer.writer import get_writer_table, write_message
+from tests.config.generated_proto.protobuf_pb2 import Account, FieldsMessage, TypesMessage
+
+
+class WriterTestCase(unittest.TestCase):
+
+    def assertSameAsParseDict(self, data, schema):
+        self.assertEqual(write_message(data, schema()), ParseDict(data, schema()))
+
+    def test_matches_parse_dict(self):
+        self.assertSameAsParseDict({
+            'int32_field': 1,
+            'float_field': 1.5,
+            'double_field': 2,
+            'bool_field': True,
+            'string_field': 'foo',
+            'bytes_field': 'Zm9v',
+            'repeated_string_field': ['a', 'b'],
+            'nested_field': {'username': 'foo', 'settings': {}},
+            'repeated_nested_field': [{'username': 'bar', 'balance': 2}, {}],
+        }, FieldsMessage)
+        self.assertSameAsParseDict({
+            'int64_field': '12',
+            'uint64_field': 2 ** 63,
+            'status': 'STATUS_ACTIVE',
+            'created_at': '2024-01-15T12:00:00Z',
+            'ttl': '1.5s',
+            'optionalCount': 3,
+            'counters': {'a': 1},
+            'accounts': {'x': {'username': 'foo'}},
+            'samples': [1, 2, 3],
+            'readings': [1, 2.5],
+            'nickname': '',
+            'ratios': [0.5],
+            'ticks': ['7'],
+        }, TypesMessage)
+
+    def test_none_clears_field(self):
+        message = write_message({'username': None, 'settings': None, 'balance': 1}, Account())
+        self.assertEqual(message, Account(balance=1))
+        self.assertFalse(message.HasField('settings'))
+
+    def test_native_values(self):
+        message = write_message({
+            'created_at': datetime(2024, 1, 15, 12, 0, tzinfo=timezone.utc),
+            'ttl': timedelta(seconds=5),
+            'status': 2,
+            'accounts': {'x': Account(username='foo')},
+        }, TypesMessage())
+        self.assertEqual(message.created_at.ToDatetime(), datetime(2024, 1, 15, 12, 0))
+        self.assertEqual(message.ttl.ToTimedelta(), timedelta(seconds=5))
+        self.assertEqual(message.status, 2)
+        self.assertEqual(message.accounts['x'].username, 'foo')
+
+    def test_errors_match_parse_dict(self):
+        for data in [
+            {'balance': 'abc'},
+            {'balance': True},
+            {'balance': 2 ** 40},
+            {'username': 1},
+            {'unknown': 1},
+            {'settings': 'foo'},
+        ]:
+            with self.subTest(data=data):
+                with self.assertRaises(ParseError):
+                    ParseDict(data, Account())
+                with self.assertRaises(ParseError):
+                    write_message(data, Account())
+
+    def test_writer_tables_are_cached(self):
+        table = get_writer_table(TypesMessage.DESCRIPTOR)
+        self.assertIs(table, get_writer_table(TypesMessage.DESCRIPTOR))
+        self.assertIs(table['optionalCount'], table['optional_count'])
+
+
+if __name__ == '__main__':
+    unittest.main()